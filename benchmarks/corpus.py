@@ -0,0 +1,148 @@
+# benchmarks/corpus.py
+# -*- coding: utf-8 -*-
+"""
+corpus.py – deterministic synthetic inputs for benchmarks
+
+* WAV: harmonic chord tones over a steady click, plus seeded noise
+  (16-bit PCM via the stdlib wave module)
+* MIDI: format-0 SMF with a seeded melody over a bass line, written byte
+  by byte so no MIDI library is needed
+* MusicXML: one-part partwise score of seeded quarter notes
+* The same (count, duration, seed) always yields byte-identical files; a
+  corpus directory is only regenerated when its parameters change
+"""
+
+from __future__ import annotations
+import json
+import os
+import random
+import struct
+import wave
+from typing import Dict
+
+import numpy as np
+
+CORPUS_VERSION = 1
+
+SCALE = [60, 62, 64, 65, 67, 69, 71, 72]  # C major, MIDI note numbers
+STEPS = ["C", "D", "E", "F", "G", "A", "B", "C"]
+
+# ─── WAV ──────────────────────────────────────────────────────────────────────
+def make_wav(path: str, seconds: float, seed: int, sr: int = 22050, bpm: float = 120.0) -> None:
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sr)) / sr
+    root = 110.0 * 2 ** (rng.integers(0, 12) / 12)
+    y = np.zeros_like(t)
+    for ratio in (1.0, 1.25, 1.5):  # major triad
+        for h in range(1, 4):
+            y += np.sin(2 * np.pi * root * ratio * h * t) / (h * 3)
+
+    # decaying click on every beat so tempo and onset detectors have work to do
+    beat = 60.0 / bpm
+    env = np.exp(-(t % beat) * 30.0)
+    y = 0.3 * y / np.max(np.abs(y)) + 0.4 * env * np.sin(2 * np.pi * 1000 * t)
+    y += 0.01 * rng.standard_normal(len(t))
+    pcm = (np.clip(y, -1.0, 1.0) * 32767).astype("<i2")
+
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sr)
+        w.writeframes(pcm.tobytes())
+
+# ─── MIDI ─────────────────────────────────────────────────────────────────────
+def _vlq(n: int) -> bytes:
+    out = [n & 0x7F]
+    n >>= 7
+    while n:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    return bytes(reversed(out))
+
+def make_midi(path: str, seconds: float, seed: int, bpm: float = 120.0, ppq: int = 480) -> None:
+    rng = random.Random(seed)
+    beats = max(1, int(seconds * bpm / 60.0))
+    events = []  # (tick, order, bytes); note-offs sort before note-ons at the same tick
+    step = rng.randrange(len(SCALE))
+    for b in range(beats):
+        tick = b * ppq
+        step = min(max(step + rng.choice((-2, -1, 1, 2)), 0), len(SCALE) - 1)
+        melody = SCALE[step] + 12
+        events.append((tick, 1, bytes([0x90, melody, rng.randint(70, 110)])))
+        events.append((tick + ppq // 2, 0, bytes([0x80, melody, 0])))
+        if b % 4 == 0:
+            bass = SCALE[rng.choice((0, 3, 4, 5))] - 24
+            events.append((tick, 1, bytes([0x91, bass, 90])))
+            events.append((tick + 4 * ppq - 1, 0, bytes([0x81, bass, 0])))
+    events.sort(key=lambda e: (e[0], e[1]))
+
+    tempo = int(60_000_000 / bpm)
+    track = bytearray()
+    track += b"\x00\xff\x51\x03" + tempo.to_bytes(3, "big")
+    track += b"\x00\xff\x58\x04\x04\x02\x18\x08"   # 4/4
+    track += b"\x00\xc0\x00\x00\xc1\x20"           # piano, acoustic bass
+    last = 0
+    for tick, _, msg in events:
+        track += _vlq(tick - last) + msg
+        last = tick
+    track += b"\x00\xff\x2f\x00"
+
+    with open(path, "wb") as f:
+        f.write(b"MThd" + struct.pack(">IHHH", 6, 0, 1, ppq))
+        f.write(b"MTrk" + struct.pack(">I", len(track)) + bytes(track))
+
+# ─── MusicXML ─────────────────────────────────────────────────────────────────
+def make_musicxml(path: str, seconds: float, seed: int, bpm: float = 120.0) -> None:
+    rng = random.Random(seed)
+    measures = max(1, int(seconds * bpm / 60.0) // 4)
+    body = []
+    for m in range(1, measures + 1):
+        attrs = ("<attributes><divisions>1</divisions><key><fifths>0</fifths></key>"
+                 "<time><beats>4</beats><beat-type>4</beat-type></time>"
+                 "<clef><sign>G</sign><line>2</line></clef></attributes>") if m == 1 else ""
+        notes = []
+        for _ in range(4):
+            i = rng.randrange(len(STEPS))
+            octave = 5 if i == len(STEPS) - 1 else 4
+            notes.append(f"<note><pitch><step>{STEPS[i]}</step><octave>{octave}</octave></pitch>"
+                         "<duration>1</duration><type>quarter</type></note>")
+        body.append(f'<measure number="{m}">{attrs}{"".join(notes)}</measure>')
+
+    xml = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<!DOCTYPE score-partwise PUBLIC "-//Recordare//DTD MusicXML 3.1 Partwise//EN" '
+           '"http://www.musicxml.org/dtds/partwise.dtd">\n'
+           '<score-partwise version="3.1"><part-list><score-part id="P1">'
+           '<part-name>Synth</part-name></score-part></part-list>'
+           f'<part id="P1">{"".join(body)}</part></score-partwise>\n')
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(xml)
+
+# ─── Corpus ───────────────────────────────────────────────────────────────────
+def build_corpus(root: str, files: int = 8, seconds: float = 10.0,
+                 seed: int = 0, sr: int = 22050) -> Dict[str, str]:
+    """
+    Create (or reuse) <root>/{audio,midi,musicxml} with `files` inputs each.
+
+    :return: {"audio": dir, "midi": dir, "musicxml": dir}
+    """
+    params = {"version": CORPUS_VERSION, "files": files, "seconds": seconds, "seed": seed, "sr": sr}
+    dirs = {kind: os.path.join(root, kind) for kind in ("audio", "midi", "musicxml")}
+    stamp = os.path.join(root, "corpus.json")
+    try:
+        with open(stamp, "r", encoding="utf-8") as f:
+            if json.load(f) == params:
+                return dirs
+    except (OSError, ValueError):
+        pass
+
+    for d in dirs.values():
+        os.makedirs(d, exist_ok=True)
+        for name in os.listdir(d):
+            os.remove(os.path.join(d, name))
+    for i in range(files):
+        make_wav(os.path.join(dirs["audio"], f"synth_{i:03d}.wav"), seconds, seed + i, sr=sr)
+        make_midi(os.path.join(dirs["midi"], f"synth_{i:03d}.mid"), seconds, seed + i)
+        make_musicxml(os.path.join(dirs["musicxml"], f"synth_{i:03d}.musicxml"), seconds, seed + i)
+    with open(stamp, "w", encoding="utf-8") as f:
+        json.dump(params, f)
+    return dirs
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# benchmarks/run_benchmarks.py
+# -*- coding: utf-8 -*-
+"""
+run_benchmarks.py – plugin and pipeline benchmarks on a synthetic corpus
+
+* Builds a deterministic corpus (see corpus.py) of --files inputs per type
+* Runs every registered plugin, in dependency order, over its inputs and
+  records files/sec, latency percentiles and peak-RSS growth per plugin
+* Runs the full run_pipeline in a fresh process (result cache off) and
+  records wall time, files/sec and the process's peak RSS
+* Appends one JSON line per run to --history (default
+  benchmarks/.work/history.jsonl, untracked) and compares it with the
+  last run that used the same corpus parameters
+
+    python benchmarks/run_benchmarks.py --files 8 --seconds 10
+    python benchmarks/run_benchmarks.py --plugins midi_analysis,audio_analysis --repeat 3
+    python benchmarks/run_benchmarks.py --fail-on-regression   # for CI / pre-deploy
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+SRC_DIR = os.path.join(ROOT, "src")
+for p in (SRC_DIR, BENCH_DIR):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+from corpus import build_corpus  # noqa: E402
+
+DEFAULT_WORK_DIR = os.path.join(BENCH_DIR, ".work")
+DEFAULT_HISTORY = os.path.join(DEFAULT_WORK_DIR, "history.jsonl")
+# latency changes smaller than this are treated as noise
+NOISE_FLOOR_MS = 5.0
+
+def _select(plugins: List[Dict[str, Any]], names: Optional[List[str]]) -> List[Dict[str, Any]]:
+    return [p for p in plugins if not names or p["name"] in names]
+
+def _stats(latencies: List[float]) -> Dict[str, Any]:
+    if not latencies:
+        return {"calls": 0}
+    ms = np.asarray(latencies) * 1000.0
+    return {
+        "calls": len(ms),
+        "files_per_s": len(ms) / (ms.sum() / 1000.0) if ms.sum() > 0 else None,
+        "cold_ms": float(ms[0]),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p90_ms": float(np.percentile(ms, 90)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+    }
+
+# ─── Per-plugin ───────────────────────────────────────────────────────────────
+def bench_plugins(dirs: Dict[str, str], out_dir: str, names: Optional[List[str]] = None,
+                  repeat: int = 1) -> Dict[str, Dict[str, Any]]:
+    """
+    Call each plugin on every corpus file of its input type, `repeat` times.
+    Plugins run in scheduler order and successful first-round results are
+    recorded in the context, so downstream plugins see their inputs.
+    """
+    import main
+    import audio_cache
+    import midi_cache
+    from analysis_context import AnalysisContext
+    from plugin_result import PluginResult
+
+    audio_cache.reset()
+    midi_cache.reset()
+    files_by_type = {t: sorted(os.path.join(d, f) for f in os.listdir(d)) for t, d in dirs.items()}
+    ctx = AnalysisContext()
+    results: Dict[str, Dict[str, Any]] = {}
+
+    for p in _select(main.resolve_execution_order(main.PLUGINS), names):
+        types = main._input_types(p)
+        if "report" in types:
+            continue
+        files = [f for t in types for f in files_by_type.get(t, [])]
+        latencies, errors, rss = [], 0, []
+        for r in range(repeat):
+            if p.get("batch"):
+                # batch plugins: one call per chunk, its latency spread over the chunk
+                calls = []
+                for chunk in main._batches(files, p.get("max_batch_size") or 0, 1):
+                    res, sample = main._timed_batch(p["func"], chunk, out_dir, ctx)
+                    calls += [(f, r_, sample, len(chunk)) for f, r_ in zip(chunk, res)]
+            else:
+                calls = [(f, *main._timed_call(p["func"], f, out_dir, ctx.for_file(f)), 1)
+                         for f in files]
+            for f, res, sample, n in calls:
+                latencies.append(sample["wall_s"] / n)
+                if sample["rss_delta_kb"] is not None:
+                    rss.append(sample["rss_delta_kb"])
+                # normalised as the pipeline does, so errors and ctx inputs match it
+                res = PluginResult.from_raw(res, p["name"], f, p.get("result_schema"))
+                errors += not res.ok
+                if res.ok and r == 0:
+                    ctx.record(p["name"], f, res.data)
+        stats = _stats(latencies)
+        stats.update({"files": len(files), "errors": errors,
+                      "peak_rss_delta_kb": max(rss) if rss else None})
+        results[p["name"]] = stats
+        print(f"  {p['name'].ljust(24)} {stats.get('p50_ms', 0):9.1f} ms p50  "
+              f"{stats['errors']:3d} errors")
+    return results
+
+# ─── Full pipeline ────────────────────────────────────────────────────────────
+def _pipeline_job(dirs: Dict[str, str], out_dir: str, names: Optional[List[str]],
+                  workers: int, jobs: int) -> Dict[str, Any]:
+    """Runs in a fresh spawned process so peak RSS covers the pipeline alone."""
+    import main
+    from profiler import _max_rss_kb
+
+    if names:
+        main.PLUGINS[:] = _select(main.PLUGINS, names)
+    t0 = time.perf_counter()
+    out = main.run_pipeline(dirs["audio"], dirs["midi"], dirs["musicxml"], out_dir,
+                            workers=workers, jobs=jobs, cache_dir=None)
+    wall = time.perf_counter() - t0
+    with open(out["profile"], "r", encoding="utf-8") as f:
+        profile = json.load(f)
+    files = sum(len(os.listdir(d)) for d in dirs.values())
+    return {
+        "wall_s": wall,
+        "files": files,
+        "files_per_s": files / wall if wall > 0 else None,
+        "results": len(out["reports"]),
+        "peak_rss_kb": _max_rss_kb(),
+        "slowest": {name: round(p["wall_s"], 3)
+                    for name, p in list(profile["plugins"].items())[:3]},
+    }
+
+def bench_pipeline(dirs: Dict[str, str], out_dir: str, names: Optional[List[str]] = None,
+                   workers: int = 1, jobs: int = 1) -> Dict[str, Any]:
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as ex:
+        return ex.submit(_pipeline_job, dirs, out_dir, names, workers, jobs).result()
+
+# ─── History ──────────────────────────────────────────────────────────────────
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _previous(history: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    last = None
+    try:
+        with open(history, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    if entry.get("params") == params:
+                        last = entry
+    except OSError:
+        pass
+    return last
+
+def compare(prev: Dict[str, Any], cur: Dict[str, Any], threshold: float) -> List[str]:
+    """Human-readable regressions of `cur` against `prev`."""
+    found = []
+    for name, s in cur.get("plugins", {}).items():
+        old = prev.get("plugins", {}).get(name, {}).get("p50_ms")
+        new = s.get("p50_ms")
+        if old and new and new > old * (1 + threshold) and new - old > NOISE_FLOOR_MS:
+            found.append(f"{name}: p50 {old:.1f} ms → {new:.1f} ms")
+    old = (prev.get("pipeline") or {}).get("files_per_s")
+    new = (cur.get("pipeline") or {}).get("files_per_s")
+    if old and new and new < old / (1 + threshold):
+        found.append(f"pipeline: {old:.2f} → {new:.2f} files/s")
+    return found
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark plugins and the pipeline on a synthetic corpus")
+    ap.add_argument("--files",      type=int, default=8, help="Inputs per type (default: 8)")
+    ap.add_argument("--seconds",    type=float, default=10.0, help="Duration of each input")
+    ap.add_argument("--seed",       type=int, default=0)
+    ap.add_argument("--plugins",    default="", help="Comma-separated plugin names (default: all)")
+    ap.add_argument("--repeat",     type=int, default=1, help="Calls per file in the per-plugin run")
+    ap.add_argument("--workers",    type=int, default=1, help="run_pipeline --workers")
+    ap.add_argument("--jobs",       type=int, default=1, help="run_pipeline --jobs")
+    ap.add_argument("--no-pipeline", action="store_true", help="Skip the full-pipeline run")
+    ap.add_argument("--work-dir",   default=DEFAULT_WORK_DIR)
+    ap.add_argument("--history",    default=DEFAULT_HISTORY)
+    ap.add_argument("--threshold",  type=float, default=0.2,
+                    help="Relative slowdown reported as a regression (default: 0.2)")
+    ap.add_argument("--fail-on-regression", action="store_true",
+                    help="Exit with status 1 when a regression is found")
+    ns = ap.parse_args(argv)
+
+    names = [n.strip() for n in ns.plugins.split(",") if n.strip()] or None
+    dirs = build_corpus(os.path.join(ns.work_dir, "corpus"), ns.files, ns.seconds, ns.seed)
+    params = {"files": ns.files, "seconds": ns.seconds, "seed": ns.seed,
+              "plugins": names, "repeat": ns.repeat, "workers": ns.workers, "jobs": ns.jobs}
+
+    print("Per-plugin:")
+    entry: Dict[str, Any] = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "params": params,
+        "plugins": bench_plugins(dirs, os.path.join(ns.work_dir, "plugins_out"), names, ns.repeat),
+    }
+    if not ns.no_pipeline:
+        print("Pipeline:")
+        entry["pipeline"] = bench_pipeline(dirs, os.path.join(ns.work_dir, "pipeline_out"),
+                                           names, ns.workers, ns.jobs)
+        pl = entry["pipeline"]
+        print(f"  {pl['files']} files in {pl['wall_s']:.2f}s "
+              f"({pl['files_per_s']:.2f} files/s, peak RSS {pl['peak_rss_kb']} KB)")
+
+    prev = _previous(ns.history, params)
+    os.makedirs(os.path.dirname(os.path.abspath(ns.history)), exist_ok=True)
+    with open(ns.history, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+    print(f"Recorded in {ns.history}")
+
+    if prev is None:
+        return 0
+    regressions = compare(prev, entry, ns.threshold)
+    for r in regressions:
+        print(f"⚠️  regression since {prev.get('commit')}: {r}")
+    return 1 if regressions and ns.fail_on_regression else 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -1,11 +1,14 @@
 """
 Essentia Runner Script
-Runs Essentia audio analysis in WSL.
+Runs Essentia audio analysis through the persistent Essentia worker
+(src/essentia_worker.py) instead of a fresh interpreter per file.
 """
 import os
-import subprocess
+import sys
 import logging
-import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from essentia_worker import get_worker  # noqa: E402
 
 # Configure logging
 logging.basicConfig(
@@ -16,7 +19,7 @@ logging.basicConfig(
 
 def run_essentia(audio_path: str, output_path: str) -> dict:
     """
-    Runs Essentia analysis on an audio file in WSL.
+    Runs Essentia analysis on an audio file in the shared worker.
 
     Args:
         audio_path (str): Path to the input audio file.
@@ -30,27 +33,14 @@ def run_essentia(audio_path: str, output_path: str) -> dict:
             logging.error(f"Audio file not found: {audio_path}")
             return {"error": "Audio file not found"}
 
-        # Convert Windows path to WSL path
-        wsl_audio_path = audio_path.replace('\\', '/').replace('C:', '/mnt/c')
-        wsl_output_path = output_path.replace('\\', '/').replace('C:', '/mnt/c')
-
-        # Run Essentia command in WSL
-        cmd = [
-            "wsl",
-            "python3", "-c",
-            f"import essentia.standard as es; audio = es.MonoLoader(filename='{wsl_audio_path}')(); "
-            f"bpm = es.RhythmExtractor2013()(audio)[0]; "
-            f"with open('{wsl_output_path}', 'w') as f: f.write(str(bpm))"
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-
-        if result.returncode != 0:
-            logging.error(f"Essentia failed: {result.stderr}")
-            return {"error": f"Essentia failed: {result.stderr}"}
-
-        # Read the output
-        with open(output_path, 'r') as f:
-            bpm = float(f.read())
+        result = list(get_worker().analyze([audio_path]))[0]
+        if "error" in result:
+            logging.error(f"Essentia failed: {result['error']}")
+            return {"error": f"Essentia failed: {result['error']}"}
+
+        bpm = float(result["bpm"])
+        with open(output_path, 'w') as f:
+            f.write(str(bpm))
 
         logging.info(f"Essentia analysis completed: BPM = {bpm}")
         return {"status": "success", "bpm": bpm}
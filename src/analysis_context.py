@@ -0,0 +1,188 @@
+# src/analysis_context.py
+# -*- coding: utf-8 -*-
+"""
+analysis_context.py – structured pipeline context
+
+* Results are indexed by (plugin, file): O(1) lookups instead of scanning
+  every result of a plugin for a matching "file"
+* Each file gets its own namespace, so keys returned or written by a
+  plugin for one file no longer overwrite another file's
+* Still a dict: ctx[plugin] is the list of that plugin's results, and
+  free-form keys (ctx["genre"] = ...) keep working
+* record() and every read through a FileContext or snapshot take one
+  lock, so plugins running on scheduler threads (--jobs) or pickled for
+  process workers never see a half-merged result
+"""
+
+from __future__ import annotations
+import os
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, MutableMapping, Optional
+
+# bookkeeping keys that are not merged into a file's namespace
+_META_KEYS = {"status", "plugin_name"}
+
+def _norm(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+class AnalysisContext(dict):
+    """Run-wide context; see module docstring."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._index: Dict[tuple, Dict[str, Any]] = {}
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.RLock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.lock = threading.RLock()
+
+    def record(self, plugin: str, file: str, result: Dict[str, Any]) -> None:
+        """Store `plugin`'s result for `file` and merge its keys into the file's namespace."""
+        with self.lock:
+            entries = self.get(plugin)
+            if not isinstance(entries, list):
+                entries = []
+                self[plugin] = entries
+            entries.append(result)
+            key = _norm(file)
+            self._index[(plugin, key)] = result
+            ns = self._files.setdefault(key, {})
+            ns.update(result)
+            for k in _META_KEYS:
+                ns.pop(k, None)
+
+    def result(self, plugin: str, file: str, default: Any = None) -> Any:
+        """`plugin`'s result for `file`, or `default`."""
+        return self._index.get((plugin, _norm(file)), default)
+
+    def results(self, plugin: str) -> List[Dict[str, Any]]:
+        with self.lock:
+            entries = self.get(plugin)
+            return list(entries) if isinstance(entries, list) else []
+
+    def plugins(self) -> List[str]:
+        with self.lock:
+            return sorted({plugin for plugin, _ in self._index})
+
+    def namespace(self, file: str) -> Dict[str, Any]:
+        """Flat keys merged from every result recorded for `file`."""
+        with self.lock:
+            return self._files.setdefault(_norm(file), {})
+
+    def for_file(self, file: str) -> "FileContext":
+        """Dict-like view handed to single-file plugins."""
+        return FileContext(self, file)
+
+    def subset(self, files: Iterable[str]) -> "AnalysisContext":
+        """
+        Context holding run-wide keys plus only `files`' results and
+        namespaces; what a process worker receives for one batch instead
+        of the whole run.
+        """
+        keys = {_norm(f) for f in files}
+        with self.lock:
+            recorded = set(self.plugins())
+            sub = AnalysisContext({k: v for k, v in self.items() if k not in recorded})
+            for (plugin, key), res in self._index.items():
+                if key in keys:
+                    sub._index[(plugin, key)] = res
+                    sub.setdefault(plugin, []).append(res)
+            for key in keys & self._files.keys():
+                sub._files[key] = dict(self._files[key])
+        return sub
+
+class FileContext(MutableMapping):
+    """
+    The context as seen while processing one file.
+
+    Lookups check the file's namespace, then results recorded for this
+    file under that plugin name, then run-wide keys. Writes stay in the
+    file's namespace.
+
+    Pickling (process workers) produces a plain-dict snapshot holding only
+    this file's data, so shipping it does not grow with the corpus.
+    """
+
+    def __init__(self, ctx: AnalysisContext, file: str):
+        self._ctx = ctx
+        self._file = file
+        self._ns = ctx.namespace(file)
+
+    def __getitem__(self, key: str) -> Any:
+        with self._ctx.lock:
+            if key in self._ns:
+                return self._ns[key]
+            hit = self._ctx.result(key, self._file)
+            if hit is not None:
+                return hit
+            return self._ctx[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        with self._ctx.lock:
+            self._ns[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        with self._ctx.lock:
+            del self._ns[key]
+
+    def __iter__(self) -> Iterator[str]:
+        with self._ctx.lock:
+            keys = list(self._ns) + self._ctx.plugins() + list(self._ctx)
+        seen = set()
+        for key in keys:
+            if key not in seen and key in self:
+                seen.add(key)
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, key: object) -> bool:
+        with self._ctx.lock:
+            return (key in self._ns
+                    or self._ctx.result(key, self._file) is not None
+                    or dict.__contains__(self._ctx, key))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Plain dict of everything visible for this file, minus other files' results."""
+        with self._ctx.lock:
+            recorded = set(self._ctx.plugins())
+            snap = {k: v for k, v in self._ctx.items() if k not in recorded}
+            for plugin in recorded:
+                hit = self._ctx.result(plugin, self._file)
+                if hit is not None:
+                    snap[plugin] = hit
+            snap.update(self._ns)
+        return snap
+
+    def __reduce__(self):
+        return (dict, (self.snapshot(),))
+
+def lookup(ctx: Optional[MutableMapping], plugin: str, file: str, default: Any = None) -> Any:
+    """
+    `plugin`'s result for `file` from any context flavour: an AnalysisContext,
+    a FileContext (or its pickled snapshot), or a legacy dict of result lists.
+    """
+    if ctx is None:
+        return default
+    if isinstance(ctx, AnalysisContext):
+        return ctx.result(plugin, file, default)
+    if isinstance(ctx, FileContext):
+        return ctx._ctx.result(plugin, file, default)
+    entry = ctx.get(plugin)
+    if isinstance(entry, dict):
+        return entry
+    if isinstance(entry, list):
+        key = _norm(file)
+        for r in entry:
+            path = (r.get("file") or r.get("input_file")) if isinstance(r, dict) else None
+            if path and _norm(path) == key:
+                return r
+    return default
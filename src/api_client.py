@@ -1,20 +1,316 @@
 # ────────────────────────────────────────────────────────────────
 # File: src/api_client.py  (full replacement)
 # ────────────────────────────────────────────────────────────────
+"""
+Client for the analysis API.
+
+* One keep-alive requests.Session per client with a connection pool of
+  pool_size, shared by every call (and every thread) of that client
+* Connection errors, timeouts and 429/502/503/504 are retried with
+  exponential backoff and jitter (Retry-After is honoured); other HTTP
+  errors (400 unsupported type, 413, 500 plugin error) are raised, not
+  retried and not answered locally
+* A circuit breaker opens after failure_threshold calls in a row have
+  exhausted their retries; while open, calls skip the network and run
+  the plugins in-process (local_fallback), and after reset_timeout one
+  probe call is let through
+* analyze_many() uploads files in bulk, bulk_size per /analyze/batch
+  request; AsyncAnalysisClient runs the same calls from asyncio with at
+  most `concurrency` in flight
+"""
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import functools
 import json
 import logging
 import os
+import random
 import requests
 import pathlib
-from typing import Dict, Any, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Callable, Dict, Any, List, Optional
 
-from plugin_registry import PLUGINS
+from plugin_registry import PLUGINS, discover
 
 logger = logging.getLogger(__name__)
 API_BASE = os.getenv("AIMUSIC_API_URL", "http://127.0.0.1:8000")
 
+DEFAULT_TIMEOUT = 10.0           # seconds per HTTP attempt
+DEFAULT_ANALYZE_TIMEOUT = 600.0  # seconds for a waited /analyze call
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5            # seconds before the first retry, doubled each time
+DEFAULT_MAX_BACKOFF = 8.0
+DEFAULT_POOL_SIZE = 16
+DEFAULT_BULK_SIZE = 32           # files per /analyze/batch request
+DEFAULT_CONCURRENCY = 8
+RETRY_STATUS = frozenset({429, 502, 503, 504})
+
+LOCAL_INPUT_TYPES = {".wav": "wav", ".mid": "midi", ".midi": "midi",
+                     ".musicxml": "musicxml", ".xml": "musicxml"}
+
+
+class CircuitOpen(RuntimeError):
+    """Raised instead of calling the server while the breaker is open."""
+
+
+class ServerUnavailable(requests.HTTPError):
+    """A retryable status (429/502/503/504) persisted through every retry."""
+
+
+# failures that mean the server could not serve the call; only these fall back
+UNAVAILABLE = (requests.ConnectionError, requests.Timeout, ServerUnavailable, CircuitOpen)
+
+
+class CircuitBreaker:
+    """
+    :param failure_threshold: Failed calls in a row that open the circuit.
+    :param reset_timeout: Seconds the circuit stays open before one probe.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(int(failure_threshold), 1)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        """Whether a call may go to the server now (half-open: one probe at a time)."""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures, self.opened_at, self._probing = 0, None, False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning(f"API circuit open after {self.failures} failed calls")
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class AnalysisClient:
+    """
+    Pooled, retrying client with in-process fallback.
+
+    :param base_url: Server root (default: $AIMUSIC_API_URL).
+    :param retries: Retries per call after the first attempt.
+    :param breaker: Shared CircuitBreaker (default: a new one).
+    :param local_fallback: Run plugins in-process when the server cannot
+                           be reached; False raises instead.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, timeout: float = DEFAULT_TIMEOUT,
+                 retries: int = DEFAULT_RETRIES, backoff: float = DEFAULT_BACKOFF,
+                 max_backoff: float = DEFAULT_MAX_BACKOFF, pool_size: int = DEFAULT_POOL_SIZE,
+                 breaker: Optional[CircuitBreaker] = None, local_fallback: bool = True):
+        self.base_url = (base_url or API_BASE).rstrip("/")
+        self.timeout = timeout
+        self.retries = max(int(retries), 0)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.local_fallback = local_fallback
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "AnalysisClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ── transport ───────────────────────────────────────────────────────────
+    def send(self, method: str, endpoint: str, uploads: Optional[List[tuple]] = None,
+             timeout: Optional[float] = None, **kwargs: Any) -> requests.Response:
+        """
+        One HTTP call with retries. `uploads` is a list of (field, path);
+        the files are reopened for every attempt.
+        """
+        for _, path in uploads or ():
+            if not os.path.isfile(path):
+                raise FileNotFoundError(path)
+        if not self.breaker.allow():
+            raise CircuitOpen(f"API circuit open; not calling {endpoint}")
+        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        error: Optional[Exception] = None
+        served = False
+        try:
+            for attempt in range(self.retries + 1):
+                retry_after = None
+                try:
+                    with contextlib.ExitStack() as stack:
+                        if uploads:
+                            kwargs["files"] = [(field, (os.path.basename(path), stack.enter_context(open(path, "rb"))))
+                                               for field, path in uploads]
+                        resp = self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+                except (requests.ConnectionError, requests.Timeout) as exc:
+                    error = exc
+                else:
+                    if resp.status_code not in RETRY_STATUS:
+                        served = True
+                        break
+                    error = ServerUnavailable(f"{resp.status_code} from {url}", response=resp)
+                    retry_after = resp.headers.get("Retry-After")
+                if attempt < self.retries:
+                    time.sleep(self._delay(attempt, retry_after))
+        finally:
+            # anything but a served response (incl. unexpected errors) counts
+            # as a failure, which also ends a half-open probe
+            if served:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+        if not served:
+            raise error
+        resp.raise_for_status()
+        return resp
+
+    def _delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                pass
+        return min(self.backoff * 2 ** attempt, self.max_backoff) * random.uniform(0.5, 1.0)
+
+    # ── calls ───────────────────────────────────────────────────────────────
+    def request_analysis(self, endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST a JSON payload; if the server is unavailable run the endpoint's plugin locally."""
+        try:
+            return self.send("POST", endpoint, json=payload).json()
+        except UNAVAILABLE as exc:
+            if not self.local_fallback:
+                raise
+            logger.warning(f"API request failed ({exc}); using local plugin")
+            plugin_name = endpoint.strip("/").replace("-", "_")
+            file_path = payload.get("file_path") or payload.get("input_file")
+            return analyze_file(file_path, plugin_name)
+
+    def analyze(self, file_path: str, plugin_name: Optional[str] = None) -> Dict[str, Any]:
+        """Upload one file to /analyze and wait for its results."""
+        try:
+            return self.send("POST", "analyze", uploads=[("file", file_path)],
+                             params=_params(plugin_name), timeout=DEFAULT_ANALYZE_TIMEOUT).json()
+        except UNAVAILABLE as exc:
+            if not self.local_fallback:
+                raise
+            logger.warning(f"API analysis of {file_path} failed ({exc}); running locally")
+            return {"status": "success", "results": run_local(file_path, plugin_name), "local": True}
+
+    def analyze_many(self, file_paths: List[str], plugin_name: Optional[str] = None,
+                     bulk_size: int = DEFAULT_BULK_SIZE) -> List[Dict[str, Any]]:
+        """
+        Analyse many files, bulk_size per request. Returns one entry per
+        file, in order: {"file", "results"[, "sha256" | "local"]}.
+        """
+        out: List[Dict[str, Any]] = []
+        for chunk in _chunks(file_paths, bulk_size):
+            out.extend(self._analyze_chunk(chunk, plugin_name))
+        return out
+
+    def _analyze_chunk(self, paths: List[str], plugin_name: Optional[str]) -> List[Dict[str, Any]]:
+        try:
+            resp = self.send("POST", "analyze/batch", uploads=[("files", p) for p in paths],
+                             params=_params(plugin_name), timeout=DEFAULT_ANALYZE_TIMEOUT)
+            entries = resp.json()["results"]
+            return [dict(entry, file=path) for path, entry in zip(paths, entries)]
+        except UNAVAILABLE as exc:
+            if not self.local_fallback:
+                raise
+            logger.warning(f"API batch of {len(paths)} files failed ({exc}); running locally")
+            return [{"file": p, "results": run_local(p, plugin_name), "local": True} for p in paths]
+
+
+class AsyncAnalysisClient:
+    """
+    AnalysisClient for asyncio code: calls run on a pool of `concurrency`
+    threads sharing the client's keep-alive connections, so at most that
+    many are in flight.
+    """
+
+    def __init__(self, client: Optional[AnalysisClient] = None,
+                 concurrency: int = DEFAULT_CONCURRENCY, **client_kwargs: Any):
+        self.concurrency = max(int(concurrency), 1)
+        client_kwargs.setdefault("pool_size", max(self.concurrency, DEFAULT_POOL_SIZE))
+        self.client = client or AnalysisClient(**client_kwargs)
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="api-client")
+
+    async def _call(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def request_analysis(self, endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._call(self.client.request_analysis, endpoint, payload)
+
+    async def analyze(self, file_path: str, plugin_name: Optional[str] = None) -> Dict[str, Any]:
+        return await self._call(self.client.analyze, file_path, plugin_name)
+
+    async def analyze_many(self, file_paths: List[str], plugin_name: Optional[str] = None,
+                           bulk_size: int = DEFAULT_BULK_SIZE) -> List[Dict[str, Any]]:
+        """Bulk requests of bulk_size files, up to `concurrency` at once; results in order."""
+        chunks = _chunks(file_paths, bulk_size)
+        parts = await asyncio.gather(*(self._call(self.client._analyze_chunk, c, plugin_name)
+                                       for c in chunks))
+        return [entry for part in parts for entry in part]
+
+    async def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self.client.close()
+
+    async def __aenter__(self) -> "AsyncAnalysisClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+
+def _chunks(file_paths: List[str], bulk_size: int) -> List[List[str]]:
+    """Consecutive runs of at most bulk_size files (at least one per run)."""
+    size = max(int(bulk_size), 1)
+    return [file_paths[i:i + size] for i in range(0, len(file_paths), size)]
+
+def _params(plugin_name: Optional[str]) -> Dict[str, str]:
+    params = {"wait": "true"}
+    if plugin_name:
+        params["plugin_name"] = plugin_name
+    return params
+
 
 def analyze_file(
     file_path: str,
@@ -23,23 +319,52 @@ def analyze_file(
     analysis_context: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
     """Call another registered plugin directly inside the same process."""
-    plugin = next(p for p in PLUGINS if p.name == plugin_name)
+    if not PLUGINS:
+        discover()
+    plugin = next(p for p in PLUGINS if p["name"] == plugin_name)
     pathlib.Path(output_dir).mkdir(parents=True, exist_ok=True)
-    return plugin.module(file_path, output_dir, analysis_context=analysis_context or {})
+    if plugin.get("batch"):
+        result = plugin["func"]([file_path], output_dir)
+        return result[0] if isinstance(result, list) and result else result
+    return plugin["func"](file_path, output_dir, analysis_context=analysis_context or {})
+
+
+def run_local(file_path: str, plugin_name: Optional[str] = None,
+              output_dir: str = "reports/tmp") -> List[Dict[str, Any]]:
+    """The named plugin, or every plugin for the file's input type, run in-process."""
+    if plugin_name:
+        names = [plugin_name]
+    else:
+        if not PLUGINS:
+            discover()
+        input_type = LOCAL_INPUT_TYPES.get(os.path.splitext(file_path)[1].lower())
+        names = [p["name"] for p in PLUGINS if p["input_type"] == input_type]
+    results = []
+    for name in names:
+        try:
+            results.append(analyze_file(file_path, name, output_dir))
+        except Exception as exc:
+            results.append({"status": "error", "plugin_name": name, "error": str(exc)})
+    return results
+
+
+# ─── Run-wide instance ────────────────────────────────────────────────────────
+_CLIENT: Optional[AnalysisClient] = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_client(**kwargs) -> AnalysisClient:
+    """Shared AnalysisClient (one connection pool and breaker per process)."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = AnalysisClient(**kwargs)
+        return _CLIENT
 
 
 def request_analysis(endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
     """POST to the FastAPI backend if running; otherwise fall back to local call."""
-    url = f"{API_BASE.rstrip('/')}/{endpoint.lstrip('/')}"
-    try:
-        resp = requests.post(url, json=payload, timeout=10)
-        resp.raise_for_status()
-        return resp.json()
-    except requests.RequestException as exc:
-        logger.warning(f"API request failed ({exc}); using local plugin")
-        plugin_name = endpoint.replace("-", "_")
-        file_path = payload.get("file_path") or payload.get("input_file")
-        return analyze_file(file_path, plugin_name)
+    return get_client().request_analysis(endpoint, payload)
 
 
 if __name__ == "__main__":
@@ -47,9 +372,16 @@ if __name__ == "__main__":
 
     ap = argparse.ArgumentParser()
     ap.add_argument("plugin")
-    ap.add_argument("file")
+    ap.add_argument("files", nargs="+")
     ap.add_argument("--out", default="reports/tmp")
+    ap.add_argument("--remote", action="store_true",
+                    help="Send the files to the API server (in bulk) instead of running locally")
     ns = ap.parse_args()
 
-    result = analyze_file(ns.file, ns.plugin, ns.out)
-    print(json.dumps(result, indent=2))
+    if ns.remote:
+        result = get_client().analyze_many(ns.files, ns.plugin)
+    elif len(ns.files) == 1:
+        result = analyze_file(ns.files[0], ns.plugin, ns.out)
+    else:
+        result = [analyze_file(f, ns.plugin, ns.out) for f in ns.files]
+    print(json.dumps(result, indent=2, default=str))
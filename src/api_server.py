@@ -1,12 +1,32 @@
 """
 API Server Plugin
 Exposes the AI Music Assistant pipeline as a REST API using FastAPI.
+
+/analyze streams the upload to a unique temp file while hashing it and
+queues a job on a bounded worker pool, returning its id at once (429
+when the queue is full); /jobs/{id} reports status and results and
+/jobs/{id}/events streams progress as server-sent events. Uploads whose
+content was analysed before reuse the stored results (cache/results),
+and an identical upload arriving while its job runs joins that job.
+/analyze/batch takes many files in one multipart request and runs them
+as a single job.
 """
+import asyncio
+import hashlib
+import json
 import os
 import logging
-from typing import List, Dict
+import tempfile
+import threading
+from typing import List, Dict, Optional
 from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from job_queue import JobQueue, Job, QueueFull
 from plugin_registry import PLUGINS
+from profiler import METRICS, measure
+import result_store
+from result_store import ResultStore
 
 # Configure logging
 logging.basicConfig(
@@ -15,7 +35,24 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+UPLOAD_DIR = "temp"
+UPLOAD_CHUNK = 1 << 20
+REPORTS_DIR = "reports"
+# uploads larger than this are refused with 413 (0: no limit)
+MAX_UPLOAD_MB = float(os.getenv("API_MAX_UPLOAD_MB", "0"))
+# most files accepted by one /analyze/batch request
+MAX_BATCH_FILES = int(os.getenv("API_MAX_BATCH_FILES", "64"))
+# seconds between event checks while a client is streaming /jobs/{id}/events
+EVENT_POLL_INTERVAL = 0.25
+
 app = FastAPI(title="AI Music Assistant API")
+jobs = JobQueue(workers=int(os.getenv("API_JOB_WORKERS", "2")),
+                max_pending=int(os.getenv("API_MAX_PENDING_JOBS", "16")))
+store = None if os.getenv("API_NO_CACHE") else ResultStore(os.getenv("API_CACHE_DIR", result_store.DEFAULT_ROOT))
+# (content sha256, plugin names) → id of the job analysing that content;
+# read on the event loop, cleared from job worker threads
+_inflight: Dict[tuple, str] = {}
+_inflight_lock = threading.Lock()
 
 @app.on_event("startup")
 async def startup_event():
@@ -23,56 +60,304 @@ async def startup_event():
     # Ensure logs directory exists
     os.makedirs('logs', exist_ok=True)
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    jobs.shutdown(wait=False)
+
+def _input_type(filename: str) -> str:
+    """Plugin input type for an uploaded file name."""
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext in [".wav"]:
+        return "wav"
+    elif ext in [".mid", ".midi"]:
+        return "midi"
+    elif ext in [".musicxml", ".xml"]:
+        return "musicxml"
+    raise HTTPException(status_code=400, detail="Unsupported file type")
+
+async def _spool(file: UploadFile) -> tuple:
+    """
+    Stream the upload in UPLOAD_CHUNK pieces to a uniquely named file
+    under UPLOAD_DIR, hashing as it goes. Returns (path, sha256, bytes).
+    """
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    ext = os.path.splitext(file.filename or "")[1].lower()
+    fd, path = tempfile.mkstemp(dir=UPLOAD_DIR, suffix=ext)
+    digest, size = hashlib.sha256(), 0
+    limit = int(MAX_UPLOAD_MB * 1024 * 1024)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if limit and size > limit:
+                    raise HTTPException(status_code=413, detail=f"Upload exceeds {MAX_UPLOAD_MB:g} MB")
+                digest.update(chunk)
+                await run_in_threadpool(f.write, chunk)
+    except BaseException:
+        _remove(path)
+        raise
+    return path, digest.hexdigest(), size
+
+def _remove(path: str) -> None:
+    if store is not None:
+        store.forget(path)
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _cached(file_path: str, plugin: Dict) -> tuple:
+    """(config hash, stored result or None) of `plugin` for this content."""
+    if store is None:
+        return None, None
+    cfg = result_store.config_hash(plugin, PLUGINS, REPORTS_DIR)
+    return cfg, store.get(file_path, plugin["name"], cfg)
+
+def _all_cached(file_path: str, plugins_to_run: List[Dict]) -> Optional[List[Dict]]:
+    """Stored results of every plugin, or None if any one must run."""
+    results = []
+    for plugin in plugins_to_run:
+        _, hit = _cached(file_path, plugin)
+        if hit is None:
+            return None
+        results.append(hit)
+    for plugin in plugins_to_run:
+        METRICS.observe(plugin["name"], cached=True)
+    return results
+
+def run_plugins(file_path: str, plugins_to_run: List[Dict], job: Optional[Job] = None) -> List[Dict]:
+    """Run each plugin on one file (or reuse its stored result), reporting progress to `job`."""
+    results = []
+    for i, plugin in enumerate(plugins_to_run):
+        cfg, result = _cached(file_path, plugin)
+        if result is not None:
+            METRICS.observe(plugin["name"], cached=True)
+            ok = True
+        else:
+            with measure() as sample:
+                try:
+                    if plugin.get("batch"):
+                        result = plugin["func"]([file_path], output_dir=REPORTS_DIR)
+                        result = result[0] if isinstance(result, list) and result else result
+                    else:
+                        result = plugin["func"](file_path, output_dir=REPORTS_DIR)
+                except Exception as e:
+                    result = {"status": "error", "error": str(e)}
+            ok = isinstance(result, dict) and result.get("status") == "success"
+            METRICS.observe(plugin["name"], sample, error=not ok)
+            if ok and store is not None:
+                store.put(file_path, plugin["name"], cfg, result)
+            logging.info(f"Ran plugin {plugin['name']} on {file_path}: {result}")
+        results.append(result)
+        if job is not None:
+            job.progress(i + 1, len(plugins_to_run), plugin=plugin["name"], ok=ok)
+    return results
+
+def _accepted(job: Job, deduplicated: bool = False) -> JSONResponse:
+    return JSONResponse(status_code=202, content={
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}",
+        "events_url": f"/jobs/{job.id}/events",
+        "deduplicated": deduplicated,
+    })
+
 @app.post("/analyze")
-async def analyze_file(file: UploadFile = File(...), plugin_name: str = None) -> Dict:
+async def analyze_file(file: UploadFile = File(...), plugin_name: str = None,
+                       wait: bool = False) -> Dict:
     """
-    Analyzes an uploaded file using the specified plugin or all plugins.
+    Queues analysis of an uploaded file using the specified plugin or all plugins.
 
     Args:
         file: Uploaded audio/MIDI/MusicXML file.
         plugin_name: Name of the plugin to run (optional).
+        wait: Hold the request until the job finishes and return its
+              results, as the synchronous endpoint used to.
 
     Returns:
-        Dict: Analysis results.
+        Dict: The job id and where to poll it (or the results with wait).
     """
+    input_type = _input_type(file.filename)
+    plugins_to_run = [p for p in PLUGINS if p["input_type"] == input_type and (plugin_name is None or p["name"] == plugin_name)]
+    if not plugins_to_run:
+        raise HTTPException(status_code=400, detail=f"No plugins found for input type {input_type} or plugin name {plugin_name}")
+    if jobs.depth >= jobs.max_pending:
+        # refuse before spooling the upload
+        raise HTTPException(status_code=429, detail="Too many queued jobs",
+                            headers={"Retry-After": "5"})
+
+    file_path, digest, size = await _spool(file)
+    logging.info(f"Received file: {file.filename} -> {file_path} ({size} bytes, sha256 {digest[:12]})")
+    if store is not None:
+        store.remember(file_path, digest)
+
+    # identical content already being analysed with the same plugins: join that job
+    key = (digest, tuple(p["name"] for p in plugins_to_run))
+    with _inflight_lock:
+        running = jobs.get(_inflight.get(key, ""))
+    if running is not None and running.finished is None and not wait:
+        _remove(file_path)
+        return _accepted(running, deduplicated=True)
+
+    # identical content analysed before: answer from the result store, as
+    # an already finished job unless the caller waits for the results
+    cached = await run_in_threadpool(_all_cached, file_path, plugins_to_run)
+    if cached is not None:
+        _remove(file_path)
+        result = {"status": "success", "results": cached, "sha256": digest}
+        if wait:
+            return dict(result, deduplicated=True)
+        job = jobs.completed("analyze", result, meta={"filename": file.filename, "sha256": digest})
+        return _accepted(job, deduplicated=True)
+
+    def work(job: Job) -> Dict:
+        try:
+            return {"status": "success", "results": run_plugins(file_path, plugins_to_run, job),
+                    "sha256": digest}
+        finally:
+            _remove(file_path)
+            with _inflight_lock:
+                if _inflight.get(key) == job.id:
+                    del _inflight[key]
+
     try:
-        # Save uploaded file
-        file_path = f"temp/{file.filename}"
-        os.makedirs("temp", exist_ok=True)
-        with open(file_path, "wb") as f:
-            f.write(await file.read())
-        logging.info(f"Received file: {file_path}")
-
-        # Determine input type based on file extension
-        ext = os.path.splitext(file_path)[1].lower()
-        if ext in [".wav"]:
-            input_type = "wav"
-        elif ext in [".mid", ".midi"]:
-            input_type = "midi"
-        elif ext in [".musicxml", ".xml"]:
-            input_type = "musicxml"
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported file type")
+        job = jobs.submit("analyze", work, meta={"filename": file.filename, "sha256": digest},
+                          on_reject=lambda: _remove(file_path))
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e),
+                            headers={"Retry-After": str(e.retry_after)})
+    with _inflight_lock:
+        if job.finished is None:
+            _inflight[key] = job.id
+
+    if wait:
+        try:
+            # shielded: a client hanging up must not cancel the job itself
+            return await asyncio.shield(asyncio.wrap_future(job.future))
+        except Exception as e:
+            logging.error(f"Error in API analysis: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    return _accepted(job)
+
+@app.post("/analyze/batch")
+async def analyze_batch(files: List[UploadFile] = File(...), plugin_name: str = None,
+                        wait: bool = False) -> Dict:
+    """
+    Queues analysis of many uploaded files as one job. Each file's entry in
+    the job result holds its name, sha256 and per-plugin results; stored
+    results are reused as in /analyze.
 
-        # Run plugins
-        results = []
+    Args:
+        files: Uploaded audio/MIDI/MusicXML files (at most API_MAX_BATCH_FILES).
+        plugin_name: Name of the plugin to run (optional).
+        wait: Hold the request until the job finishes and return its results.
+    """
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_FILES} files per batch")
+    plans = []
+    for file in files:
+        input_type = _input_type(file.filename)
         plugins_to_run = [p for p in PLUGINS if p["input_type"] == input_type and (plugin_name is None or p["name"] == plugin_name)]
         if not plugins_to_run:
-            raise HTTPException(status_code=400, detail=f"No plugins found for input type {input_type} or plugin name {plugin_name}")
+            raise HTTPException(status_code=400, detail=f"No plugins found for {file.filename} ({input_type}) or plugin name {plugin_name}")
+        plans.append((file.filename, plugins_to_run))
+    if jobs.depth >= jobs.max_pending:
+        raise HTTPException(status_code=429, detail="Too many queued jobs",
+                            headers={"Retry-After": "5"})
 
-        for plugin in plugins_to_run:
-            result = plugin["func"](file_path, output_dir="reports")
-            results.append(result)
-            logging.info(f"Ran plugin {plugin['name']} on {file_path}: {result}")
+    spooled: List[tuple] = []
+    try:
+        for file in files:
+            spooled.append(await _spool(file))
+    except BaseException:
+        for path, _, _ in spooled:
+            _remove(path)
+        raise
+    if store is not None:
+        for path, digest, _ in spooled:
+            store.remember(path, digest)
+    logging.info(f"Received batch of {len(spooled)} files")
+
+    def work(job: Job) -> Dict:
+        out = []
+        try:
+            for i, ((name, plugins_to_run), (path, digest, _)) in enumerate(zip(plans, spooled)):
+                out.append({"file": name, "sha256": digest,
+                            "results": run_plugins(path, plugins_to_run)})
+                _remove(path)
+                job.progress(i + 1, len(spooled), file=name)
+            return {"status": "success", "results": out}
+        finally:
+            for path, _, _ in spooled:
+                _remove(path)
+
+    def reject() -> None:
+        for path, _, _ in spooled:
+            _remove(path)
+
+    try:
+        job = jobs.submit("analyze_batch", work, meta={"files": len(spooled)}, on_reject=reject)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e),
+                            headers={"Retry-After": str(e.retry_after)})
+
+    if wait:
+        try:
+            return await asyncio.shield(asyncio.wrap_future(job.future))
+        except Exception as e:
+            logging.error(f"Error in API batch analysis: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    return _accepted(job)
+
+def _job_or_404(job_id: str) -> Job:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str) -> Dict:
+    """Status, progress and (once done) results of a job."""
+    return _job_or_404(job_id).to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str) -> StreamingResponse:
+    """Server-sent events: queued, started, progress..., then done or error."""
+    job = _job_or_404(job_id)
+
+    async def stream():
+        sent = 0
+        while True:
+            events = job.events[sent:]
+            for ev in events:
+                yield f"event: {ev['event']}\ndata: {json.dumps(ev, default=str)}\n\n"
+            sent += len(events)
+            if job.finished is not None and sent >= len(job.events):
+                return
+            await asyncio.sleep(EVENT_POLL_INTERVAL)
 
-        # Clean up
-        os.remove(file_path)
-        return {"status": "success", "results": results}
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
 
-    except Exception as e:
-        logging.error(f"Error in API analysis: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> str:
+    """Cumulative per-plugin counters in Prometheus text format."""
+    q = jobs.stats()
+    lines = [
+        "# HELP api_job_queue_depth Jobs queued or running",
+        "# TYPE api_job_queue_depth gauge",
+        f"api_job_queue_depth {q['depth']}",
+        "# HELP api_jobs_rejected_total Jobs refused with 429",
+        "# TYPE api_jobs_rejected_total counter",
+        f"api_jobs_rejected_total {q['rejected']}",
+    ]
+    return METRICS.render_prometheus() + "\n".join(lines) + "\n"
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -25,7 +25,9 @@ logger = logging.getLogger(__name__)
     description="Applies style transformations to MIDI inputs for acoustic guitar songs",
     input_type="midi",
     phase=5,
-    requires=["genre_classifier"]
+    requires=["genre_classifier"],
+    batch=True,
+    max_batch_size=32
 )
 def style_transfer(midi_paths: List[str], output_dir: str = "reports", analysis_context: dict = None) -> List[Dict[str, Any]]:
     """
@@ -7,9 +7,7 @@ import os
 import logging
 import json
 
-import librosa
-import numpy as np
-
+from feature_engine import from_context
 from plugin_registry import register_plugin
 
 # Configure logging
@@ -23,7 +21,8 @@ logging.basicConfig(
     name="audio_analysis",
     input_type="audio",
     description="Extracts basic audio features like RMS and spectral centroid from WAV files",
-    phase=1
+    phase=1,
+    requires=["spectral_features"]
 )
 def audio_analysis(path: str, output_dir: str = "reports", analysis_context: dict = None) -> dict:
     """
@@ -42,12 +41,10 @@ def audio_analysis(path: str, output_dir: str = "reports", analysis_context: dic
             logging.error(f"Audio file not found: {path}")
             return {"status": "error", "error": "Audio file not found", "input": path}
 
-        # Load audio, preserve native sample rate
-        y, sr = librosa.load(path, sr=None)
-
-        # Compute features
-        rms_val = float(np.mean(librosa.feature.rms(y=y)))
-        spec_cent = float(np.mean(librosa.feature.spectral_centroid(y=y, sr=sr)))
+        # Shared single-pass STFT features (spectral_features plugin)
+        spectral = from_context(analysis_context, path)
+        rms_val = spectral["rms"]
+        spec_cent = spectral["spectral_centroid"]
 
         features = {
             "rms": round(rms_val, 6),
@@ -0,0 +1,155 @@
+# src/audio_cache.py
+# -*- coding: utf-8 -*-
+"""
+audio_cache.py – run-scoped decoded-audio cache
+
+* Each file is decoded once per run (native rate, all channels)
+* Mono / resampled variants are derived from that decode, not re-read
+* Entries are keyed by (path, mtime, size, sr, mono) and LRU-evicted
+  against a memory budget
+* Returned arrays are read-only because they are shared between plugins
+"""
+
+from __future__ import annotations
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger("main")
+
+DEFAULT_BUDGET_MB = 1024
+
+class AudioCache:
+    """LRU cache of (waveform, sample_rate) pairs bounded by total bytes."""
+
+    def __init__(self, budget_mb: float = DEFAULT_BUDGET_MB):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self._entries: "OrderedDict[tuple, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._file_locks: Dict[tuple, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.decodes = 0
+        self.evictions = 0
+
+    # ── public API ────────────────────────────────────────────────────────────
+    def load(self, path: str, sr: Optional[int] = None, mono: bool = True) -> Tuple[Any, int]:
+        """
+        Same contract as librosa.load(path, sr=sr, mono=mono).
+
+        :param path: Audio file to read.
+        :param sr: Target sample rate, or None for the file's native rate.
+        :param mono: Down-mix to one channel.
+        :return: (read-only float32 array, sample rate)
+        """
+        stamp = _stamp(path)
+        key = (stamp, sr, mono)
+        hit = self._get(key)
+        if hit is not None:
+            return hit
+
+        # one decode per file even when several threads ask at once
+        with self._file_lock(stamp):
+            hit = self._get(key, count=False)
+            if hit is not None:
+                return hit
+
+            y, native_sr = self._native(stamp)
+            out_sr = native_sr
+            if mono and y.ndim > 1:
+                import librosa
+                y = librosa.to_mono(y)
+            if sr is not None and sr != native_sr:
+                import librosa
+                y = librosa.resample(y, orig_sr=native_sr, target_sr=sr)
+                out_sr = sr
+            if y.flags.writeable:
+                y.setflags(write=False)
+            self._put(key, (y, out_sr))
+            return y, out_sr
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._file_locks.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.decodes = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "decodes": self.decodes,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "budget_bytes": self.budget_bytes,
+            }
+
+    # ── internals ─────────────────────────────────────────────────────────────
+    def _native(self, stamp: tuple) -> Tuple[Any, int]:
+        """Native-rate, all-channel decode, itself cached under sr=None/mono=False."""
+        key = (stamp, None, False)
+        hit = self._get(key, count=False)
+        if hit is not None:
+            return hit
+        import librosa
+        y, sr = librosa.load(stamp[0], sr=None, mono=False)
+        y.setflags(write=False)
+        with self._lock:
+            self.decodes += 1
+        self._put(key, (y, sr))
+        return y, sr
+
+    def _file_lock(self, stamp: tuple) -> threading.Lock:
+        with self._lock:
+            return self._file_locks.setdefault(stamp, threading.Lock())
+
+    def _get(self, key: tuple, count: bool = True) -> Optional[Tuple[Any, int]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            if count:
+                if entry is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+            return entry
+
+    def _put(self, key: tuple, entry: Tuple[Any, int]) -> None:
+        size = entry[0].nbytes
+        with self._lock:
+            if size > self.budget_bytes or key in self._entries:
+                return
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.budget_bytes:
+                _, (old, _) = self._entries.popitem(last=False)
+                self._bytes -= old.nbytes
+                self.evictions += 1
+
+def _stamp(path: str) -> tuple:
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+# ─── Run-wide instance ────────────────────────────────────────────────────────
+# Each worker process of a --workers pool gets its own copy.
+_CACHE = AudioCache()
+
+def load_audio(path: str, sr: Optional[int] = None, mono: bool = True) -> Tuple[Any, int]:
+    """Decoded waveform for `path` from the run-wide cache (see AudioCache.load)."""
+    return _CACHE.load(path, sr=sr, mono=mono)
+
+def reset(budget_mb: Optional[float] = None) -> None:
+    """Drop all cached audio; called by run_pipeline at the start of a run."""
+    _CACHE.clear()
+    if budget_mb is not None:
+        _CACHE.budget_bytes = int(budget_mb * 1024 * 1024)
+
+def stats() -> Dict[str, Any]:
+    return _CACHE.stats()
@@ -1,9 +1,8 @@
 import os
 import logging
-import librosa
-import numpy as np
 from typing import Dict, Any
 import json
+from feature_engine import features as spectral_features
 
 # Configure logging
 logging.basicConfig(
@@ -20,13 +19,11 @@ def main(file_path: str, output_dir: str) -> Dict[str, Any]:
     try:
         logger.info(f"Extracting features from audio file: {file_path}")
         
-        # Load audio
-        audio, sr = librosa.load(file_path, sr=None, mono=True)
-        
-        # Extract features
-        tempo, _ = librosa.beat.beat_track(y=audio, sr=sr)
-        spectral_centroid = np.mean(librosa.feature.spectral_centroid(y=audio, sr=sr))
-        rms = np.mean(librosa.feature.rms(y=audio))
+        # Shared single-pass STFT features; tempo comes from the same flux envelope
+        spectral = spectral_features(file_path)
+        tempo = spectral["tempo"]
+        spectral_centroid = spectral["spectral_centroid"]
+        rms = spectral["rms"]
         
         # Prepare features dictionary
         features = {
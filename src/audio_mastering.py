@@ -1,10 +1,11 @@
 import os
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import soundfile as sf
-import librosa
 import numpy as np
 from pedalboard import Pedalboard, Compressor, HighShelfFilter, Gain
+from audio_cache import load_audio
+from audio_stream import AudioStream
 
 # Configure logging
 logging.basicConfig(
@@ -17,44 +18,87 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def main(file_path: str, output_dir: str) -> Dict[str, Any]:
+# samples per channel read, processed and written at a time in streaming mode
+BLOCK_SIZE = 65536
+
+def make_board() -> Pedalboard:
+    """The mastering chain."""
+    return Pedalboard([
+        Compressor(threshold_db=-20, ratio=4),
+        HighShelfFilter(cutoff_frequency_hz=8000, gain_db=2),
+        Gain(gain_db=3)
+    ])
+
+def _output_path(file_path: str, output_dir: str) -> str:
+    return os.path.join(output_dir, f"mastered_{os.path.basename(file_path)}")
+
+def master_stream(file_path: str, output_file: str, board: Pedalboard,
+                  block_size: int = BLOCK_SIZE) -> int:
+    """
+    Read, master and write `file_path` one block at a time. The board's
+    state (compressor envelope, filter memory) carries over between
+    blocks, so the result matches processing the whole file at once.
+    Returns the sample rate.
+    """
+    stream = AudioStream(file_path)
+    sr = stream.samplerate
+    board.reset()
+    with sf.SoundFile(output_file, "w", samplerate=sr, channels=max(stream.channels, 2)) as out:
+        for block in stream.blocks(block_size, mono=False):
+            if block.shape[1] == 1:  # mono in, stereo out (as the in-memory path does)
+                block = np.repeat(block, 2, axis=1)
+            processed = board(np.ascontiguousarray(block.T), sr, reset=False)
+            out.write(np.ascontiguousarray(processed.T))
+    return sr
+
+def main(file_path: str, output_dir: str, streaming: bool = True,
+         block_size: int = BLOCK_SIZE, board: Optional[Pedalboard] = None) -> Dict[str, Any]:
+    """
+    Master one file into output_dir/mastered_<name>.
+
+    :param streaming: Process in blocks of `block_size` samples with
+                      constant memory; False masters the whole file in
+                      memory at once.
+    :param board: Chain to use (default: a fresh make_board()).
+    """
     try:
         logger.info(f"Processing audio file: {file_path}")
-        
-        # Load audio
-        audio, sr = librosa.load(file_path, sr=None, mono=False)
-        if len(audio.shape) == 1:
-            audio = np.asfortranarray([audio, audio])
-        
-        logger.info(f"Input audio shape: {audio.shape}, dtype: {audio.dtype}, sample rate: {sr}")
-        
-        # Create a mastering chain with Pedalboard
-        board = Pedalboard([
-            Compressor(threshold_db=-20, ratio=4),
-            HighShelfFilter(cutoff_frequency_hz=8000, gain_db=2),
-            Gain(gain_db=3)
-        ])
-        mastered_audio = board(audio, sr)
-        
-        # Ensure the audio is in the correct format for soundfile
-        mastered_audio = np.array(mastered_audio, dtype=np.float32)
-        # Transpose from (channels, samples) to (samples, channels) for soundfile
-        mastered_audio = mastered_audio.T
-        
-        logger.info(f"Mastered audio shape: {mastered_audio.shape}, dtype: {mastered_audio.dtype}")
-        
-        # Save the mastered audio
-        output_file = os.path.join(output_dir, f"mastered_{os.path.basename(file_path)}")
-        sf.write(output_file, mastered_audio, sr)
+        board = board or make_board()
+        output_file = _output_path(file_path, output_dir)
+
+        if streaming:
+            sr = master_stream(file_path, output_file, board, block_size)
+        else:
+            # Load audio
+            audio, sr = load_audio(file_path, sr=None, mono=False)
+            if len(audio.shape) == 1:
+                audio = np.asfortranarray([audio, audio])
+
+            logger.info(f"Input audio shape: {audio.shape}, dtype: {audio.dtype}, sample rate: {sr}")
+            mastered_audio = board(audio, sr)
+
+            # soundfile wants C-contiguous (samples, channels): transpose
+            # one block at a time rather than copying the whole array
+            with sf.SoundFile(output_file, "w", samplerate=sr, channels=mastered_audio.shape[0]) as out:
+                for i in range(0, mastered_audio.shape[1], block_size):
+                    out.write(np.ascontiguousarray(mastered_audio[:, i:i + block_size].T))
         logger.info(f"Mastered audio saved to {output_file}")
-        
+
         return {
             "status": "success",
             "input_file": file_path,
             "output_file": output_file,
             "sample_rate": sr
         }
-    
+
     except Exception as e:
         logger.error(f"Error processing audio file {file_path}: {e}")
-        return {"status": "error", "error": str(e)}
\ No newline at end of file
+        return {"status": "error", "error": str(e)}
+
+def master_batch(file_paths: List[str], output_dir: str,
+                 block_size: int = BLOCK_SIZE) -> List[Dict[str, Any]]:
+    """Master many files in streaming mode with one board, reset between files."""
+    os.makedirs(output_dir, exist_ok=True)
+    board = make_board()
+    return [main(p, output_dir, streaming=True, block_size=block_size, board=board)
+            for p in file_paths]
@@ -7,6 +7,7 @@ import logging
 import numpy as np
 import librosa
 from typing import List, Dict
+from analysis_context import lookup
 from plugin_registry import register_plugin
 
 # Configure logging
@@ -21,7 +22,9 @@ logging.basicConfig(
     description="Identifies instrument roles",
     input_type="wav",
     phase=1,
-    requires=["analyze_features"]
+    requires=["analyze_features"],
+    batch=True,
+    max_batch_size=32
 )
 def analyze_roles(audio_paths: List[str], output_dir: str, analysis_context: dict) -> List[Dict]:
     """
@@ -46,7 +49,7 @@ def analyze_roles(audio_paths: List[str], output_dir: str, analysis_context: dic
                 continue
 
             # Retrieve features from context
-            features = next((r for r in analysis_context.get("analyze_features", []) if r["file"] == audio_path), None)
+            features = lookup(analysis_context, "analyze_features", audio_path)
             if not features or "error" in features:
                 logging.warning(f"No valid features for {audio_path}")
                 results.append({"file": audio_path, "error": "Feature analysis unavailable"})
@@ -0,0 +1,230 @@
+# src/audio_stream.py
+# -*- coding: utf-8 -*-
+"""
+audio_stream.py – constant-memory access to long recordings
+
+* PCM / float WAV data chunks are memory-mapped (np.memmap); other
+  formats soundfile can read are pulled in blocks with soundfile.blocks
+* AudioStream.blocks() yields float32 blocks, optionally overlapping and
+  down-mixed, so nothing ever holds the whole file
+* analyze() computes frame RMS, spectral centroid, rolloff, a
+  spectral-flux onset envelope and a min/max waveform envelope from one
+  STFT pass over those blocks (feature_engine builds on it)
+
+Frames follow librosa's center=False convention (no edge padding), so
+means can differ slightly from librosa.feature.* with the default
+center=True on very short files.
+"""
+
+from __future__ import annotations
+import os
+import struct
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_FRAME_LENGTH = 2048
+DEFAULT_HOP_LENGTH = 512
+# frames per analysis block; a block holds hop * this + overlap samples
+FRAMES_PER_BLOCK = 256
+# spectral rolloff: frequency below which this share of the energy lies
+ROLLOFF_PERCENT = 0.85
+
+_WAVE_FORMAT_PCM = 1
+_WAVE_FORMAT_FLOAT = 3
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+# (format, bits per sample) → (numpy dtype, scale to [-1, 1], offset)
+_WAV_DTYPES = {
+    (_WAVE_FORMAT_PCM, 8): ("u1", 1 / 128.0, -128.0),
+    (_WAVE_FORMAT_PCM, 16): ("<i2", 1 / 32768.0, 0.0),
+    (_WAVE_FORMAT_PCM, 32): ("<i4", 1 / 2147483648.0, 0.0),
+    (_WAVE_FORMAT_FLOAT, 32): ("<f4", 1.0, 0.0),
+    (_WAVE_FORMAT_FLOAT, 64): ("<f8", 1.0, 0.0),
+}
+
+def _wav_layout(path: str) -> Optional[Dict[str, Any]]:
+    """Header of a little-endian WAV whose samples numpy can map directly, else None."""
+    with open(path, "rb") as f:
+        head = f.read(12)
+        if len(head) < 12 or head[:4] != b"RIFF" or head[8:12] != b"WAVE":
+            return None
+        fmt = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            cid, size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+            if cid == b"fmt ":
+                body = f.read(size)
+                tag, channels, sr = struct.unpack("<HHI", body[:8])
+                bits = struct.unpack("<H", body[14:16])[0]
+                if tag == _WAVE_FORMAT_EXTENSIBLE and size >= 26:
+                    tag = struct.unpack("<H", body[24:26])[0]
+                fmt = (tag, channels, sr, bits)
+            elif cid == b"data":
+                if fmt is None or (fmt[0], fmt[3]) not in _WAV_DTYPES:
+                    return None
+                tag, channels, sr, bits = fmt
+                dtype, scale, offset = _WAV_DTYPES[(tag, bits)]
+                width = bits // 8 * channels
+                size = min(size, os.path.getsize(path) - f.tell())  # truncated files
+                return {"offset": f.tell(), "dtype": dtype, "scale": scale, "bias": offset,
+                        "channels": channels, "samplerate": sr, "frames": size // width}
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+
+class AudioStream:
+    """
+    One audio file opened for block reads.
+
+    :ivar samplerate: Native sample rate.
+    :ivar channels: Channel count.
+    :ivar frames: Length in samples per channel.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._layout = _wav_layout(path)
+        if self._layout is not None:
+            self.samplerate = self._layout["samplerate"]
+            self.channels = self._layout["channels"]
+            self.frames = self._layout["frames"]
+        else:
+            import soundfile as sf
+            info = sf.info(path)
+            self.samplerate, self.channels, self.frames = info.samplerate, info.channels, info.frames
+
+    @property
+    def duration(self) -> float:
+        return self.frames / float(self.samplerate) if self.samplerate else 0.0
+
+    @property
+    def memory_mapped(self) -> bool:
+        return self._layout is not None
+
+    def blocks(self, blocksize: int = 65536, overlap: int = 0,
+               mono: bool = True) -> Iterator[np.ndarray]:
+        """
+        float32 blocks of `blocksize` samples; each starts `overlap` samples
+        before the previous one ended. The last block may be shorter.
+        Mono blocks are 1-D, otherwise (samples, channels).
+        """
+        step = blocksize - overlap
+        if step <= 0:
+            raise ValueError("overlap must be smaller than blocksize")
+        if self._layout is not None:
+            source = self._mapped_blocks(blocksize, step)
+        else:
+            import soundfile as sf
+            source = sf.blocks(self.path, blocksize=blocksize, overlap=overlap,
+                               dtype="float32", always_2d=True)
+        for block in source:
+            if mono:
+                block = block.mean(axis=1, dtype=np.float32) if block.shape[1] > 1 else block[:, 0]
+            yield block
+
+    def _mapped_blocks(self, blocksize: int, step: int) -> Iterator[np.ndarray]:
+        lay = self._layout
+        if self.frames == 0:
+            return
+        mm = np.memmap(self.path, dtype=lay["dtype"], mode="r", offset=lay["offset"],
+                       shape=(self.frames, self.channels))
+        try:
+            for start in range(0, self.frames, step):
+                raw = mm[start:start + blocksize]
+                block = raw.astype(np.float32)
+                if lay["bias"]:
+                    block += lay["bias"]
+                if lay["scale"] != 1.0:
+                    block *= lay["scale"]
+                yield block
+                if start + blocksize >= self.frames:
+                    break
+        finally:
+            del mm
+
+def open_stream(path: str) -> AudioStream:
+    return AudioStream(path)
+
+# ─── Single-pass analysis ─────────────────────────────────────────────────────
+def analyze(path: str, frame_length: int = DEFAULT_FRAME_LENGTH,
+            hop_length: int = DEFAULT_HOP_LENGTH,
+            envelope_points: int = 0) -> Dict[str, Any]:
+    """
+    Stream `path` once (mono) and return:
+
+    * sr, duration, frames (analysis frames), hop_length, frame_length
+    * rms, centroid, rolloff – per-frame arrays, one value per hop
+    * rms_mean, centroid_mean, rolloff_mean – their means
+    * onset_env – spectral-flux onset strength, one value per hop
+    * envelope – (mins, maxs) arrays of `envelope_points` buckets when > 0
+    """
+    stream = AudioStream(path)
+    sr = stream.samplerate
+    overlap = frame_length - hop_length
+    blocksize = hop_length * FRAMES_PER_BLOCK + overlap
+    window = np.hanning(frame_length + 1)[:-1].astype(np.float32)
+    freqs = np.fft.rfftfreq(frame_length, d=1.0 / sr)
+
+    n_frames = 0
+    rms, cent, rolloff, onset = [], [], [], []
+    prev_log: Optional[np.ndarray] = None
+
+    env: Optional[Tuple[np.ndarray, np.ndarray]] = None
+    if envelope_points > 0:
+        bucket = max(1, -(-stream.frames // envelope_points))
+        n_buckets = max(1, -(-stream.frames // bucket))
+        env = (np.full(n_buckets, np.inf, np.float32), np.full(n_buckets, -np.inf, np.float32))
+    pos = 0  # index of the next sample not yet seen by the envelope
+
+    for i, block in enumerate(stream.blocks(blocksize, overlap, mono=True)):
+        new = block if i == 0 else block[overlap:]
+        if env is not None and len(new):
+            first, last = pos // bucket, (pos + len(new) - 1) // bucket
+            edges = np.arange(first, last + 1) * bucket - pos
+            edges[0] = 0
+            env[0][first:last + 1] = np.minimum(env[0][first:last + 1], np.minimum.reduceat(new, edges))
+            env[1][first:last + 1] = np.maximum(env[1][first:last + 1], np.maximum.reduceat(new, edges))
+        pos += len(new)
+
+        if len(block) < frame_length:
+            if n_frames:
+                continue  # tail shorter than a frame, already covered by overlap
+            block = np.pad(block, (0, frame_length - len(block)))
+        frames = np.lib.stride_tricks.sliding_window_view(block, frame_length)[::hop_length]
+
+        rms.append(np.sqrt(np.mean(frames.astype(np.float64) ** 2, axis=1)))
+        mag = np.abs(np.fft.rfft(frames * window, axis=1))
+        total = mag.sum(axis=1)
+        cent.append(np.divide(mag @ freqs, total, out=np.zeros_like(total), where=total > 0))
+        # first bin whose cumulative energy reaches ROLLOFF_PERCENT of the frame's
+        power = mag.astype(np.float64) ** 2
+        cum = np.cumsum(power, axis=1)
+        idx = (cum < ROLLOFF_PERCENT * cum[:, -1:]).sum(axis=1)
+        rolloff.append(np.where(cum[:, -1] > 0, freqs[np.minimum(idx, len(freqs) - 1)], 0.0))
+
+        log_mag = np.log1p(mag)
+        ref = np.vstack([log_mag[:1] if prev_log is None else prev_log[None], log_mag[:-1]])
+        onset.append(np.maximum(log_mag - ref, 0.0).mean(axis=1))
+        prev_log = log_mag[-1]
+        n_frames += len(frames)
+
+    def joined(parts):
+        return np.concatenate(parts) if parts else np.zeros(0)
+
+    out: Dict[str, Any] = {
+        "sr": sr,
+        "duration": stream.duration,
+        "frames": n_frames,
+        "hop_length": hop_length,
+        "frame_length": frame_length,
+        "rms": joined(rms),
+        "centroid": joined(cent),
+        "rolloff": joined(rolloff),
+        "onset_env": joined(onset),
+    }
+    for key in ("rms", "centroid", "rolloff"):
+        out[f"{key}_mean"] = float(out[key].mean()) if n_frames else 0.0
+    if env is not None:
+        out["envelope"] = (np.where(np.isinf(env[0]), 0, env[0]), np.where(np.isinf(env[1]), 0, env[1]))
+    return out
@@ -5,6 +5,7 @@ Summarizes analysis results from previous plugins.
 import os
 import logging
 from typing import List, Dict
+from analysis_context import lookup
 from plugin_registry import register_plugin
 
 # Configure logging
@@ -19,7 +20,9 @@ logging.basicConfig(
     description="Summarizes analysis results",
     input_type="wav",
     phase=1,
-    requires=["analyze_wav", "analyze_features", "analyze_vocals", "analyze_roles", "extract_structure"]
+    requires=["analyze_wav", "analyze_features", "analyze_vocals", "analyze_roles", "extract_structure"],
+    batch=True,
+    max_batch_size=32
 )
 def generate_summary(audio_paths: List[str], output_dir: str, analysis_context: dict) -> List[Dict]:
     """
@@ -44,11 +47,11 @@ def generate_summary(audio_paths: List[str], output_dir: str, analysis_context:
                 continue
 
             # Aggregate data from previous plugins
-            waveform = next((r for r in analysis_context.get("analyze_wav", []) if r["file"] == audio_path), {})
-            features = next((r for r in analysis_context.get("analyze_features", []) if r["file"] == audio_path), {})
-            vocals = next((r for r in analysis_context.get("analyze_vocals", []) if r["file"] == audio_path), {})
-            roles = next((r for r in analysis_context.get("analyze_roles", []) if r["file"] == audio_path), {})
-            structure = next((r for r in analysis_context.get("extract_structure", []) if r["file"] == audio_path), {})
+            waveform = lookup(analysis_context, "analyze_wav", audio_path, {})
+            features = lookup(analysis_context, "analyze_features", audio_path, {})
+            vocals = lookup(analysis_context, "analyze_vocals", audio_path, {})
+            roles = lookup(analysis_context, "analyze_roles", audio_path, {})
+            structure = lookup(analysis_context, "extract_structure", audio_path, {})
 
             # Check for errors
             errors = [r.get("error") for r in [waveform, features, vocals, roles, structure] if "error" in r]
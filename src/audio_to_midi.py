@@ -1,12 +1,12 @@
 """
 Audio to MIDI Plugin
-Transcribes audio to MIDI using basic_pitch.
+Transcribes audio to MIDI using basic_pitch, with the model kept loaded
+and windows from a whole batch of files sent through it together.
 """
 import os
 import logging
-from basic_pitch.inference import predict
-from basic_pitch import ICASSP_2022_MODEL_PATH
-from typing import Dict
+from typing import Dict, List
+from transcription_engine import get_engine
 from plugin_registry import register_plugin
 
 # Configure logging
@@ -16,50 +16,55 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+ONSET_THRESHOLD = 0.5
+FRAME_THRESHOLD = 0.3
+
 @register_plugin(
     name="audio_to_midi",
     description="Transcribes audio to MIDI using basic_pitch",
     input_type="wav",
-    phase=3
+    phase=3,
+    batch=True,
+    max_batch_size=16,
+    result_schema={"output_file": "str", "note_count": "int", "audio_seconds": "float",
+                   "realtime_factor": "float?"}
 )
-def audio_to_midi(audio_path: str, output_dir: str = "reports", analysis_context: dict = None) -> Dict:
+def audio_to_midi(audio_paths: List[str], output_dir: str = "reports", analysis_context: dict = None) -> List[Dict]:
     """
     Transcribes audio to MIDI.
 
     Args:
-        audio_path (str): Path to the input WAV file.
+        audio_paths (List[str]): Paths to the input WAV files.
         output_dir (str): Directory to save the output MIDI.
         analysis_context (dict): Context from previous plugins (not used here).
 
     Returns:
-        Dict: Result of the transcription process.
+        List[Dict]: Result of the transcription process, per file.
     """
     try:
-        if not os.path.exists(audio_path):
-            logging.error(f"Audio file not found: {audio_path}")
-            return {"error": "Audio file not found"}
-
-        os.makedirs(output_dir, exist_ok=True)
-        output_path = os.path.join(output_dir, f"transcribed_{os.path.basename(audio_path)}.mid")
-
-        # Transcribe audio to MIDI
-        midi_data, _, _ = predict(
-            audio_path,
-            model_path=ICASSP_2022_MODEL_PATH,
-            onset_threshold=0.5,
-            frame_threshold=0.3
-        )
-
-        # Save MIDI file
-        midi_data.write(output_path)
-        logging.info(f"Audio transcribed to MIDI: {output_path}")
+        results = {}
+        todo = []
+        for audio_path in audio_paths:
+            if not os.path.exists(audio_path):
+                logging.error(f"Audio file not found: {audio_path}")
+                results[audio_path] = {"file": audio_path, "error": "Audio file not found"}
+            else:
+                todo.append({"path": audio_path, "onset_threshold": ONSET_THRESHOLD,
+                             "frame_threshold": FRAME_THRESHOLD})
 
-        return {
-            "status": "success",
-            "input_file": audio_path,
-            "output_file": output_path
-        }
+        engine = get_engine()
+        for res in engine.transcribe(todo, output_dir=output_dir):
+            res.pop("midi", None)
+            if "error" in res:
+                logging.error(f"Error in audio_to_midi for {res['file']}: {res['error']}")
+            else:
+                res["input_file"] = res["file"]
+                logging.info(f"Audio transcribed to MIDI: {res['output_file']} "
+                             f"({res['realtime_factor']}x realtime)")
+            results[res["file"]] = res
+        logging.info(f"Transcription throughput: {engine.stats()}")
+        return [results[p] for p in audio_paths]
 
     except Exception as e:
         logging.error(f"Error in audio_to_midi: {str(e)}")
-        return {"error": str(e)}
\ No newline at end of file
+        return [{"error": str(e)}]
@@ -4,10 +4,8 @@ Generates waveform visualizations for audio files.
 """
 import os
 import logging
-import numpy as np
-import soundfile as sf
-import matplotlib.pyplot as plt
 from typing import List, Dict
+from waveform_peaks import WaveformRenderer, peaks_json
 from plugin_registry import register_plugin
 
 # Configure logging
@@ -17,15 +15,22 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# min/max columns in the JSON overview for the web UI
+PEAK_COLUMNS = 2000
+
 @register_plugin(
     name="visualize_audio",
     description="Generates audio visualizations",
     input_type="wav",
-    phase=1
+    phase=1,
+    batch=True,
+    max_batch_size=16,
+    result_schema={"visualization": "str", "peaks": "str"}
 )
 def visualize_audio(audio_paths: List[str], output_dir: str, analysis_context: dict) -> List[Dict]:
     """
-    Generates waveform visualizations for WAV files.
+    Generates waveform visualizations for WAV files, drawn from cached
+    min/max peak pyramids, plus the peak data as JSON.
 
     Args:
         audio_paths (List[str]): List of WAV file paths.
@@ -38,6 +43,8 @@ def visualize_audio(audio_paths: List[str], output_dir: str, analysis_context: d
     results = []
     os.makedirs(output_dir, exist_ok=True)
 
+    # one figure / Agg canvas per batch, cleared between files
+    renderer = WaveformRenderer(width_px=1000, height_px=400)
     for audio_path in audio_paths:
         try:
             if not os.path.exists(audio_path):
@@ -45,28 +52,18 @@ def visualize_audio(audio_paths: List[str], output_dir: str, analysis_context: d
                 results.append({"file": audio_path, "error": "File not found"})
                 continue
 
-            # Load audio
-            audio, sr = sf.read(audio_path)
-            if len(audio.shape) > 1:
-                audio = np.mean(audio, axis=1)
-            logging.info(f"Loaded audio for visualization: {audio_path}")
-
-            # Generate waveform plot
+            # Generate waveform plot (one column per pixel)
             base = os.path.splitext(os.path.basename(audio_path))[0]
             output_path = os.path.join(output_dir, f"{base}_waveform.png")
-            time = np.arange(len(audio)) / sr
-            plt.figure(figsize=(10, 4))
-            plt.plot(time, audio, color='blue')
-            plt.title(f"Waveform of {base}")
-            plt.xlabel("Time (s)")
-            plt.ylabel("Amplitude")
-            plt.savefig(output_path)
-            plt.close()
+            renderer.render(audio_path, output_path, title=f"Waveform of {base}")
+            peaks_path = peaks_json(audio_path, os.path.join(output_dir, f"{base}_peaks.json"),
+                                    columns=PEAK_COLUMNS)
             logging.info(f"Generated waveform visualization: {output_path}")
 
             result = {
                 "file": audio_path,
-                "visualization": output_path
+                "visualization": output_path,
+                "peaks": peaks_path
             }
             results.append(result)
 
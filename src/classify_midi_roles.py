@@ -5,8 +5,8 @@ Returns a dictionary of {track_name: role}.
 """
 
 import os
-import pretty_midi
 import logging
+from midi_cache import load_pretty_midi
 from plugin_registry import register_plugin
 
 logging.basicConfig(
@@ -27,7 +27,7 @@ def classify_midi_roles(midi_path, output_dir=None, analysis_context=None):
             logging.error(f"MIDI file not found: {midi_path}")
             return {"status": "error", "error": "File not found"}
         
-        midi_data = pretty_midi.PrettyMIDI(midi_path)
+        midi_data = load_pretty_midi(midi_path)
         roles = {}
         for idx, inst in enumerate(midi_data.instruments):
             name = inst.name if inst.name else f"Track {idx+1}"
@@ -0,0 +1,87 @@
+# src/drum_model.py
+# -*- coding: utf-8 -*-
+"""
+drum_model.py – the drum transformer shared by Drumify and DrummAroo
+
+* One GPT-2 checkpoint (models/drumify), loaded once per process and
+  path; None when it is unavailable, so callers fall back to their
+  rule-based grooves
+* Input onsets seed a 1/16-second grid; generated tokens map back to GM
+  drum pitches through a genre vocabulary
+* Sampling temperature is 1 + energy × complexity factor; generate()
+  runs a batch of seeds that share one temperature in a single call
+"""
+
+from __future__ import annotations
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("main")
+
+MODEL_PATH = "models/drumify"                       # checkpoint folder
+MAX_LENGTH = 128                                    # 128 × 1/16-note steps
+STEPS_PER_SECOND = 16
+DEFAULT_PITCH = 36                                  # kick
+
+# Map genre → MIDI drum pitches (GM), keyed by model token
+GENRE_VOCAB = {
+    "rock":  {1: 36, 2: 38, 3: 42},                # kick, snare, closed hat
+    "funk":  {1: 36, 2: 38, 3: 42, 4: 46},         # add open hat
+    "latin": {1: 36, 2: 38, 3: 42, 4: 39},         # add clap
+    "swing": {1: 36, 2: 40, 3: 42},                # sidestick snare
+    "default": {1: 36, 2: 38, 3: 42},              # fallback
+}
+
+_MODELS: Dict[str, Any] = {}
+_MODELS_LOCK = threading.Lock()
+
+def get_model(path: str = MODEL_PATH) -> Optional[Any]:
+    """The transformer at `path` (loaded on first use), or None when the checkpoint is unavailable."""
+    with _MODELS_LOCK:
+        if path not in _MODELS:
+            try:
+                from transformers import GPT2LMHeadModel
+                model = GPT2LMHeadModel.from_pretrained(path)
+                model.eval()
+                logger.info(f"Loaded drum transformer from {path}")
+            except Exception as e:
+                model = None
+                logger.warning(f"Could not load drum model at '{path}': {e}. Falling back to rule-based drums.")
+            _MODELS[path] = model
+        return _MODELS[path]
+
+def vocab_for(genre: Optional[str]) -> Dict[int, int]:
+    return GENRE_VOCAB.get(genre or "default", GENRE_VOCAB["default"])
+
+def sampling_temperature(energy: float, complexity_factor: float = 1.0) -> float:
+    return 1.0 + energy * complexity_factor
+
+def encode_onsets(onsets) -> np.ndarray:
+    """Onsets (seconds) → seed flags on the 1/16-second grid, MAX_LENGTH steps."""
+    input_ids = np.zeros(MAX_LENGTH, dtype=np.int64)
+    steps = (np.asarray(onsets, dtype=np.float64) * STEPS_PER_SECOND).astype(np.int64)
+    input_ids[steps[(steps >= 0) & (steps < MAX_LENGTH)]] = 1  # just a seed flag
+    return input_ids
+
+def generate(model: Any, seeds: np.ndarray, temperature: float) -> np.ndarray:
+    """Sample token sequences for a (batch, MAX_LENGTH) array of seeds in one call."""
+    import torch
+
+    with torch.no_grad():
+        out = model.generate(
+            torch.tensor(np.atleast_2d(seeds), dtype=torch.long),
+            max_length=MAX_LENGTH,
+            temperature=temperature,
+            do_sample=True,
+        )
+    return out.cpu().numpy()
+
+def decode(tokens: np.ndarray, vocab: Dict[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Generated tokens → (onset seconds, GM pitch) of every non-zero step."""
+    tokens = np.asarray(tokens)
+    steps = np.nonzero(tokens)[0]
+    pitches = np.array([vocab.get(int(t), DEFAULT_PITCH) for t in tokens[steps]], dtype=np.int64)
+    return steps / float(STEPS_PER_SECOND), pitches
@@ -7,27 +7,20 @@ import os
 import logging
 import pretty_midi
 import numpy as np
-import torch
-from transformers import GPT2LMHeadModel
 from typing import Dict
+from drum_model import (GENRE_VOCAB, MAX_LENGTH, MODEL_PATH, decode, encode_onsets,  # noqa: F401
+                        generate, get_model, sampling_temperature)
+from midi_cache import load_pretty_midi
+from piano_roll import load_piano_roll
 from plugin_registry import register_plugin
 
 # ---------------------------------------------------------------------------
 # Configuration
 # ---------------------------------------------------------------------------
-MODEL_PATH = "models/drumify"                       # checkpoint folder
+# The transformer, genre vocabulary and onset encoding live in drum_model,
+# shared with DrummAroo
 DEFAULT_TEMPO = 120
 DEFAULT_ENERGY = 0.5
-MAX_LENGTH = 128                                    # 128 × 1/16-note steps
-
-# Map genre → MIDI drum pitches (GM)
-GENRE_VOCAB = {
-    "rock":  {1: 36, 2: 38, 3: 42},                # kick, snare, closed hat
-    "funk":  {1: 36, 2: 38, 3: 42, 4: 46},         # add open hat
-    "latin": {1: 36, 2: 38, 3: 42, 4: 39},         # add clap
-    "swing": {1: 36, 2: 40, 3: 42},                # sidestick snare
-    "default": {1: 36, 2: 38, 3: 42},              # fallback
-}
 
 # ---------------------------------------------------------------------------
 # Logging
@@ -38,19 +31,6 @@ logging.basicConfig(
     format="%(asctime)s - %(levelname)s - %(message)s",
 )
 
-# ---------------------------------------------------------------------------
-# Load model (once at import time)
-# ---------------------------------------------------------------------------
-try:
-    MODEL = GPT2LMHeadModel.from_pretrained(MODEL_PATH)
-    MODEL.eval()
-    logging.info("Loaded Drumify transformer model.")
-except Exception as e:
-    MODEL = None
-    logging.warning(
-        f"Could not load Drumify model at '{MODEL_PATH}': {e}. Falling back to rule-based drums."
-    )
-
 # ---------------------------------------------------------------------------
 # Helper: very lightweight genre guess if the caller provides none
 # ---------------------------------------------------------------------------
@@ -107,7 +87,7 @@ def drumify(
             logging.error(msg)
             return {"error": msg}
 
-        midi_in = pretty_midi.PrettyMIDI(midi_path)
+        midi_in = load_pretty_midi(midi_path)
         if not midi_in.instruments:
             msg = "No instruments in MIDI file"
             logging.error(msg)
@@ -116,8 +96,8 @@ def drumify(
         # -------------------------------------------------------------------
         # Extract onsets from *first* track (good enough for a seed)
         # -------------------------------------------------------------------
-        onsets = [n.start for n in midi_in.instruments[0].notes]
-        if not onsets:
+        onsets = load_piano_roll(midi_path).onsets(track=0)
+        if not len(onsets):
             msg = "No notes detected"
             logging.error(msg)
             return {"error": msg}
@@ -145,11 +125,7 @@ def drumify(
         # -------------------------------------------------------------------
         # Encode onsets into transformer input (16th-note grid)
         # -------------------------------------------------------------------
-        input_ids = np.zeros(MAX_LENGTH, dtype=np.int64)
-        for o in onsets:
-            step = int(o * 16)
-            if step < MAX_LENGTH:
-                input_ids[step] = 1  # just a seed flag
+        input_ids = encode_onsets(onsets)
 
         # -------------------------------------------------------------------
         # Generate drum sequence
@@ -157,28 +133,16 @@ def drumify(
         drum_midi = pretty_midi.PrettyMIDI()
         drum_track = pretty_midi.Instrument(program=0, is_drum=True, name=f"Drums ({genre})")
 
-        if MODEL:
-            inp = torch.tensor([input_ids], dtype=torch.long)
-            with torch.no_grad():
-                out = MODEL.generate(
-                    inp,
-                    max_length=MAX_LENGTH,
-                    temperature=1.0 + energy * complexity_factor,
-                    do_sample=True,
-                )
-            gen_ids = out[0].cpu().numpy()
-
-            for t, token in enumerate(gen_ids):
-                if token == 0:
-                    continue
-                onset = t / 16.0
-                pitch = vocab.get(token, 36)  # default kick
+        model = get_model()
+        if model:
+            gen_ids = generate(model, input_ids, sampling_temperature(energy, complexity_factor))[0]
+            for onset, pitch in zip(*decode(gen_ids, vocab)):
                 drum_track.notes.append(
                     pretty_midi.Note(
                         velocity=int(100 * energy),
-                        pitch=pitch,
-                        start=onset,
-                        end=onset + 0.1,
+                        pitch=int(pitch),
+                        start=float(onset),
+                        end=float(onset) + 0.1,
                     )
                 )
         else:
@@ -1,13 +1,13 @@
 # src/drummaroo_plugin.py
 from __future__ import annotations
-import os
-import pretty_midi, numpy as np
+from drum_model import GENRE_VOCAB
+from drummaroo_service import get_service
 from plugin_registry import register_plugin
 from typing import Dict, Any
 
 @register_plugin(
     name="drummaroo",
-    description="DrummAroo stub (test-mode) generates a simple 4-bar kick pattern",
+    description="DrummAroo drum generation (shared warm service; genre from analysis_context)",
     input_type=["midi","wav"],
     phase=3
 )
@@ -17,15 +17,11 @@ def drummaroo(
     analysis_context: dict | None = None,
     test_mode: bool = True
 ) -> Dict[str, Any]:
-    os.makedirs(output_dir, exist_ok=True)
-    # stub: always 4 bars, kick on downbeat
-    midi = pretty_midi.PrettyMIDI()
-    drum = pretty_midi.Instrument(is_drum=True, program=0, name="DrummAroo Stub")
-    for bar in range(4):
-        onset = float(bar)
-        note = pretty_midi.Note(velocity=100, pitch=36, start=onset, end=onset+0.1)
-        drum.notes.append(note)
-    midi.instruments.append(drum)
-    out = os.path.join(output_dir, f"drummaroo_stub.mid")
-    midi.write(out)
-    return {"status":"success","output_file":out}
+    genre = (analysis_context or {}).get("genre")
+    style = genre if genre in GENRE_VOCAB else "default"
+    try:
+        result = get_service().generate(out_dir=output_dir, input_path=input_path, style=style)
+    except Exception as exc:
+        return {"error": str(exc)}
+    return {"status": "success", "input_file": input_path, "output_file": result["output_file"],
+            "style": style, "bars": result["bars"], "note_count": len(result["notes"]["pitch"])}
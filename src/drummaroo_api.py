@@ -7,25 +7,41 @@ SRC  = os.path.join(ROOT, "src")
 if SRC not in sys.path:
     sys.path.insert(0, SRC)
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+from typing import Optional
+
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
 from pydantic import BaseModel, Field
-import pretty_midi
 
-from drummaroo_plugin import drummaroo
+import note_codec
+from drum_model import GENRE_VOCAB, MODEL_PATH
+from drummaroo_service import get_service, note_rows, output_path, write_midi
 # ────────────────────────────────────────────────────────────────────────────────
 
+# Concurrent /generate requests arriving within MAX_WAIT_MS of each other
+# share one inference pass (at most MAX_BATCH requests).
+service = get_service(
+    model_path=os.getenv("DRUMMAROO_MODEL", MODEL_PATH),
+    max_batch=int(os.getenv("DRUMMAROO_MAX_BATCH", "16")),
+    max_wait=float(os.getenv("DRUMMAROO_MAX_WAIT_MS", "10")) / 1000.0,
+)
+
 app = FastAPI(
     title="DrummAroo API",
     description="Generate drum MIDI for an input clip",
-    version="0.1",
+    version="0.2",
 )
 
 class GenerateRequest(BaseModel):
     input_path: str   = Field(..., description="Path to source MIDI or WAV on disk")
     out_dir:    str   = Field("reports", description="Where to write drum MIDI")
-    style:      str   = Field("post-folk", description="Percussion style")
+    style:      str   = Field("default", description=f"Percussion style: {', '.join(GENRE_VOCAB)}")
     swing:      float = Field(0.0, ge=0.0, le=1.0, description="Swing amount 0–1")
     complexity: float = Field(0.5, ge=0.0, le=1.0, description="Rhythmic complexity 0–1")
+    bars:       Optional[int] = Field(None, ge=1, le=1024, description="Length in bars (default: match the input)")
+    write_file: bool  = Field(True, description="Also write the MIDI file to out_dir")
 
 class Note(BaseModel):
     pitch:    int
@@ -35,44 +51,87 @@ class Note(BaseModel):
 
 class GenerateResponse(BaseModel):
     status:      str
-    output_file: str
+    output_file: Optional[str] = None
     notes:       list[Note]
 
+@app.on_event("startup")
+async def startup_event():
+    # load the model before the first request rather than during it
+    await run_in_threadpool(service.warm)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await run_in_threadpool(service.close)
+
+# Accept types /generate can answer with, preferred first on ties
+OFFERED = [note_codec.JSON, note_codec.PACKED, note_codec.MIDI]
+if note_codec.msgpack_available():
+    OFFERED.append(note_codec.MSGPACK)
+
 @app.post("/generate", response_model=GenerateResponse)
-def generate(req: GenerateRequest):
+async def generate(req: GenerateRequest, accept: Optional[str] = Header(None)):
+    """
+    JSON by default. Clients sending Accept: application/vnd.aimusic.notes
+    (packed columns), application/x-msgpack or audio/midi get the notes in
+    that encoding without one JSON object per note; status, output file,
+    tempo and bars are then in X-* headers (msgpack carries them inline).
+    """
+    media_type = note_codec.negotiate(accept, OFFERED)
+    if media_type is None:
+        raise HTTPException(406, detail=f"Acceptable types: {', '.join(OFFERED)}")
     try:
-        result = drummaroo(
+        # reading the input happens here; the batcher only runs the model
+        future = await run_in_threadpool(
+            service.submit,
             input_path=req.input_path,
-            out_dir=req.out_dir,
             style=req.style,
             swing=req.swing,
-            complexity=req.complexity
+            complexity=req.complexity,
+            bars=req.bars,
         )
+        # shielded: a disconnecting client must not cancel the batcher's Future
+        result = await asyncio.shield(asyncio.wrap_future(future))
+        output_file = None
+        if req.write_file:
+            output_file = await run_in_threadpool(
+                write_midi, result["notes"], output_path(req.out_dir, req.input_path), result["tempo"])
+    except FileNotFoundError as e:
+        raise HTTPException(404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"DrummAroo error: {e}")
 
-    midi_path = result["output_file"]
-    if not os.path.isfile(midi_path):
-        raise HTTPException(404, detail=f"Output MIDI not found: {midi_path}")
-
-    pm = pretty_midi.PrettyMIDI(midi_path)
-    drums = pm.instruments[0]
-    notes = [
-        Note(
-            pitch=n.pitch,
-            start=round(n.start,4),
-            end=round(n.end,4),
-            velocity=n.velocity
-        )
-        for n in drums.notes
-    ]
+    notes = result["notes"]
+    if media_type == note_codec.PACKED:
+        return Response(note_codec.pack_notes(notes), media_type=media_type,
+                        headers=_headers(result, output_file))
+    if media_type == note_codec.MIDI:
+        body = await run_in_threadpool(note_codec.to_midi, notes, result["tempo"])
+        return Response(body, media_type=media_type, headers=_headers(result, output_file))
+    if media_type == note_codec.MSGPACK:
+        body = note_codec.to_msgpack(notes, status="success", output_file=output_file,
+                                     tempo=result["tempo"], bars=result["bars"])
+        return Response(body, media_type=media_type)
 
     return GenerateResponse(
         status="success",
-        output_file=midi_path,
-        notes=notes
+        output_file=output_file,
+        notes=note_rows(result["notes"])
     )
 
+def _headers(result: dict, output_file: Optional[str]) -> dict:
+    headers = {"X-Status": "success", "X-Note-Count": str(len(result["notes"]["pitch"])),
+               "X-Tempo": str(result["tempo"]), "X-Bars": str(result["bars"])}
+    if output_file:
+        headers["X-Output-File"] = output_file
+    return headers
+
+@app.get("/stats")
+async def stats():
+    """Requests served, inference passes and mean batch size."""
+    return service.stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("drummaroo_api:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,348 @@
+# src/drummaroo_service.py
+# -*- coding: utf-8 -*-
+"""
+drummaroo_service.py – warm, micro-batched DrummAroo generation
+
+* Generation shares Drumify's transformer (drum_model: checkpoint,
+  onset seeding, temperature, genre vocabulary); the model is loaded once
+  per process and kept warm between requests, and the rule-based groove
+  stands in when it is missing
+* style picks the genre vocabulary (drum_model.GENRE_VOCAB); unknown
+  styles are rejected with ValueError
+* submit() queues one request and returns a Future; a batcher thread
+  collects requests for up to max_wait seconds or max_batch requests
+  and generates them in one inference pass
+* Input files are read (length, seed onsets) in the caller's thread,
+  before queuing, so the batcher only runs the model
+* Results carry the notes as columns (pitch, start, end, velocity) built
+  straight from the generator output; writing a MIDI file is optional
+  (write_midi, through a temporary name so concurrent writers of the
+  same output never leave a mixed file) and never needed to return the
+  notes
+"""
+
+from __future__ import annotations
+import logging
+import math
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+import drum_model
+
+logger = logging.getLogger("main")
+
+DEFAULT_MODEL_PATH = drum_model.MODEL_PATH
+DEFAULT_MAX_BATCH = 16
+DEFAULT_MAX_WAIT = 0.01          # seconds the first request waits for company
+STEPS_PER_BEAT = 4               # 1/16-note grid
+BEATS_PER_BAR = 4
+NOTE_LENGTH = 0.1                # seconds
+
+DEFAULT_OPTIONS: Dict[str, Any] = {
+    "input_path": None,
+    "style": "default",  # a key of drum_model.GENRE_VOCAB
+    "swing": 0.0,
+    "complexity": 0.5,
+    "bars": None,        # None: match the input's length (4 bars without input)
+    "tempo": 120.0,
+}
+
+NOTE_FIELDS = ("pitch", "start", "end", "velocity")
+
+class DrummarooService:
+    """
+    Resident DrummAroo generator with request micro-batching.
+
+    :param model_path: Checkpoint folder; when it cannot be loaded the
+                       rule-based groove is used.
+    :param max_batch: Most requests per inference pass.
+    :param max_wait: Seconds to hold the first request of a batch while
+                     more arrive.
+    :param generate_batch: Override of the batch generator,
+                           f(list of prepared requests) -> list of note columns.
+    """
+
+    def __init__(self, model_path: str = DEFAULT_MODEL_PATH, max_batch: int = DEFAULT_MAX_BATCH,
+                 max_wait: float = DEFAULT_MAX_WAIT,
+                 generate_batch: Optional[Callable[[List[Dict[str, Any]]], List[Dict[str, np.ndarray]]]] = None):
+        self.model_path = model_path
+        self.max_batch = max(int(max_batch), 1)
+        self.max_wait = max(float(max_wait), 0.0)
+        self._generate_batch = generate_batch
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.wall_seconds = 0.0
+
+    # ── model ────────────────────────────────────────────────────────────────
+    @property
+    def model(self) -> Any:
+        """The loaded transformer, or None when the rule-based groove is used."""
+        return drum_model.get_model(self.model_path)
+
+    def warm(self) -> "DrummarooService":
+        """Load the model and start the batcher now rather than on the first request."""
+        if self._generate_batch is None:
+            self.model
+        self._ensure_started()
+        return self
+
+    # ── requests ─────────────────────────────────────────────────────────────
+    def submit(self, **request: Any) -> Future:
+        """
+        Queue one generation request (keys of DEFAULT_OPTIONS). The Future
+        resolves to {"status", "notes", "bars", "tempo"}; notes are columns
+        of NOTE_FIELDS in onset order. Cancelling the Future before its
+        batch runs drops the request.
+        """
+        job = prepare(request)
+        future: Future = Future()
+        self._ensure_started()
+        self._queue.put((job, future))
+        return future
+
+    def generate(self, out_dir: Optional[str] = None, **request: Any) -> Dict[str, Any]:
+        """Blocking submit(); with `out_dir` the MIDI is written there too."""
+        result = self.submit(**request).result()
+        if out_dir is not None:
+            result["output_file"] = write_midi(result["notes"], output_path(out_dir, request.get("input_path")),
+                                               tempo=result["tempo"])
+        return result
+
+    def close(self) -> None:
+        with self._start_lock:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join()
+                self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "mean_batch": round(self.requests / self.batches, 2) if self.batches else None,
+                "wall_seconds": round(self.wall_seconds, 3),
+            }
+
+    # ── batcher ──────────────────────────────────────────────────────────────
+    def _ensure_started(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="drummaroo-batcher", daemon=True)
+                self._thread.start()
+
+    def _loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0.0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                self._run(batch)
+            except Exception as exc:   # keep the batcher alive; fail only this batch
+                logger.exception("DrummAroo batcher error")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+            if stop:
+                return
+
+    def _run(self, batch: List[tuple]) -> None:
+        # drop requests cancelled while queued; the rest can no longer be cancelled
+        batch = [(job, future) for job, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        jobs = [job for job, _ in batch]
+        t0 = time.perf_counter()
+        try:
+            generate = self._generate_batch or self._default_generate
+            outputs = generate(jobs)
+        except Exception as exc:
+            logger.exception("DrummAroo batch failed")
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+        with self._stats_lock:
+            self.requests += len(batch)
+            self.batches += 1
+            self.wall_seconds += time.perf_counter() - t0
+        for (job, future), notes in zip(batch, outputs):
+            future.set_result({"status": "success", "notes": notes, "bars": job["bars"],
+                               "tempo": job["tempo"], "batch_size": len(batch)})
+
+    def _default_generate(self, jobs: List[Dict[str, Any]]) -> List[Dict[str, np.ndarray]]:
+        model = self.model
+        if model is None:
+            return [rule_groove(job) for job in jobs]
+        return _model_generate(model, jobs)
+
+# ─── Request preparation ──────────────────────────────────────────────────────
+def prepare(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate a request and read what it needs from its input file."""
+    unknown = set(request) - set(DEFAULT_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown DrummAroo options: {sorted(unknown)}")
+    job = {k: request.get(k, v) for k, v in DEFAULT_OPTIONS.items()}
+    if job["style"] not in drum_model.GENRE_VOCAB:
+        raise ValueError(f"Unknown DrummAroo style '{job['style']}' "
+                         f"(one of: {', '.join(drum_model.GENRE_VOCAB)})")
+    job["vocab"] = drum_model.GENRE_VOCAB[job["style"]]
+    job["tempo"] = float(job["tempo"])
+    bar_seconds = BEATS_PER_BAR * 60.0 / job["tempo"]
+    onsets = np.zeros(0, np.float32)
+    duration = 0.0
+    path = job["input_path"]
+    if path is not None:
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Input not found: {path}")
+        if os.path.splitext(path)[1].lower() in (".mid", ".midi"):
+            from piano_roll import load_piano_roll
+            roll = load_piano_roll(path)
+            onsets, duration = roll.onsets(track=0), roll.duration
+        else:
+            import soundfile as sf
+            duration = sf.info(path).duration
+    if job["bars"] is None:
+        job["bars"] = max(int(math.ceil(duration / bar_seconds)), 1) if duration else 4
+    job["bars"] = int(job["bars"])
+    job["onsets"] = onsets
+    return job
+
+# ─── Generators ───────────────────────────────────────────────────────────────
+def rule_groove(job: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Kick on every downbeat; with rising complexity a backbeat snare, 1/8
+    hats, then a pickup kick and the style's fourth voice (open hat, clap)
+    where it has one. Pitches come from the style's vocabulary. Swing
+    delays off-beat 1/8s by up to a third of an eighth note.
+    """
+    step = 60.0 / job["tempo"] / STEPS_PER_BEAT
+    steps_per_bar = STEPS_PER_BEAT * BEATS_PER_BAR
+    complexity = job["complexity"]
+    vocab = job["vocab"]
+    kick, snare, hat = vocab[1], vocab[2], vocab[3]
+    bar_pattern = [(0, kick, 110)]
+    if complexity >= 0.25:
+        bar_pattern += [(4, snare, 100), (12, snare, 100)]
+    if complexity >= 0.5:
+        bar_pattern += [(s, hat, 70) for s in range(0, steps_per_bar, 2)]
+    if complexity >= 0.75:
+        bar_pattern += [(10, kick, 90)]
+        if 4 in vocab:
+            bar_pattern += [(14, vocab[4], 80)]
+    steps = np.array([s for s, _, _ in bar_pattern], np.int64)
+    grid = (np.arange(job["bars"])[:, None] * steps_per_bar + steps[None, :]).ravel()
+    start = grid * step
+    offbeat = (grid % STEPS_PER_BEAT) == 2
+    start = start + offbeat * job["swing"] * (2 * step) / 3.0
+    pitch = np.tile([p for _, p, _ in bar_pattern], job["bars"])
+    velocity = np.tile([v for _, _, v in bar_pattern], job["bars"])
+    return _columns(pitch, start, velocity)
+
+def _model_generate(model: Any, jobs: List[Dict[str, Any]]) -> List[Dict[str, np.ndarray]]:
+    """One drum_model.generate() call per distinct temperature in the batch."""
+    out: List[Optional[Dict[str, np.ndarray]]] = [None] * len(jobs)
+    groups: Dict[float, List[int]] = {}
+    for i, job in enumerate(jobs):
+        groups.setdefault(round(drum_model.sampling_temperature(job["complexity"]), 2), []).append(i)
+    for temperature, idx in groups.items():
+        seeds = np.stack([drum_model.encode_onsets(jobs[i]["onsets"]) for i in idx])
+        tokens = drum_model.generate(model, seeds, temperature)
+        for row, i in zip(tokens, idx):
+            out[i] = _tile(row, jobs[i])
+    return out
+
+def _tile(tokens: np.ndarray, job: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """Model tokens → notes, the generated pattern repeated over the requested bars."""
+    onsets, pitch = drum_model.decode(tokens, job["vocab"])
+    period = drum_model.MAX_LENGTH / float(drum_model.STEPS_PER_SECOND)
+    total = job["bars"] * BEATS_PER_BAR * 60.0 / job["tempo"]
+    repeats = np.arange(int(math.ceil(total / period)))
+    start = (repeats[:, None] * period + onsets[None, :]).ravel()
+    keep = start < total
+    return _columns(np.tile(pitch, len(repeats))[keep], start[keep], np.full(int(keep.sum()), 100))
+
+def _columns(pitch, start, velocity) -> Dict[str, np.ndarray]:
+    start = np.asarray(start, np.float32)
+    order = np.argsort(start, kind="stable")
+    start = start[order]
+    return {
+        "pitch": np.asarray(pitch, np.uint8)[order],
+        "start": start,
+        "end": start + np.float32(NOTE_LENGTH),
+        "velocity": np.asarray(velocity, np.uint8)[order],
+    }
+
+# ─── Output ───────────────────────────────────────────────────────────────────
+def output_path(out_dir: str, input_path: Optional[str] = None) -> str:
+    name = os.path.splitext(os.path.basename(input_path))[0] if input_path else "groove"
+    return os.path.join(out_dir, f"drummaroo_{name}.mid")
+
+def write_midi(notes: Dict[str, np.ndarray], path: Any, tempo: float = 120.0) -> Any:
+    """
+    Write note columns as a one-track drum MIDI file (a path or a binary
+    file object). A path is written under a unique temporary name and
+    renamed into place, so readers never see a partial file and
+    concurrent writers of the same path each leave a whole one.
+    """
+    import pretty_midi
+
+    pm = pretty_midi.PrettyMIDI(initial_tempo=tempo)
+    drums = pretty_midi.Instrument(program=0, is_drum=True, name="DrummAroo")
+    drums.notes = [pretty_midi.Note(velocity=int(v), pitch=int(p), start=float(s), end=float(e))
+                   for p, s, e, v in zip(notes["pitch"], notes["start"], notes["end"], notes["velocity"])]
+    pm.instruments.append(drums)
+    if not isinstance(path, str):
+        pm.write(path)
+        return path
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        pm.write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return path
+
+def note_rows(notes: Dict[str, np.ndarray], digits: int = 4) -> List[Dict[str, Any]]:
+    """Note columns as a list of {pitch, start, end, velocity} dicts."""
+    start = np.round(notes["start"].astype(np.float64), digits).tolist()
+    end = np.round(notes["end"].astype(np.float64), digits).tolist()
+    return [{"pitch": p, "start": s, "end": e, "velocity": v}
+            for p, s, e, v in zip(notes["pitch"].tolist(), start, end, notes["velocity"].tolist())]
+
+# ─── Run-wide instance ────────────────────────────────────────────────────────
+_SERVICE: Optional[DrummarooService] = None
+_SERVICE_LOCK = threading.Lock()
+
+def get_service(**kwargs) -> DrummarooService:
+    """Shared DrummarooService, created on first call."""
+    global _SERVICE
+    with _SERVICE_LOCK:
+        if _SERVICE is None:
+            _SERVICE = DrummarooService(**kwargs)
+        return _SERVICE
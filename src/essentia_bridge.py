@@ -1,12 +1,12 @@
 """
 Essentia Bridge Plugin
-Runs Essentia analysis on WAV files via WSL.
+Runs Essentia analysis on WAV files through a persistent Essentia worker
+(local on Linux / Docker, under WSL on Windows).
 """
-import subprocess
-import json
 import os
 import logging
 from typing import List, Dict
+from essentia_worker import EssentiaWorker, get_worker
 from plugin_registry import register_plugin
 
 # Configure logging to match project directory
@@ -18,15 +18,35 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# Worker script next to this file; run under WSL on Windows hosts
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "essentia_worker.py")
+
+def _to_wsl_path(path: str) -> str:
+    """C:\\dir\\a.wav -> /mnt/c/dir/a.wav"""
+    path = os.path.abspath(path)
+    return "/mnt/" + path[0].lower() + path[2:].replace("\\", "/")
+
+def _worker() -> EssentiaWorker:
+    if os.name == "nt" and not os.getenv("ESSENTIA_WORKER_CMD"):
+        return get_worker(command=["wsl", "python3", _to_wsl_path(WORKER_SCRIPT), "--serve"],
+                          path_map=_to_wsl_path)
+    return get_worker()
+
 @register_plugin(
     name="essentia_analysis",
-    description="Runs Essentia analysis on WAV files via WSL",
+    description="Runs Essentia analysis on WAV files in a persistent worker",
     input_type="wav",
-    phase=1
+    phase=1,
+    version="2",
+    batch=True,
+    max_batch_size=64,
+    result_schema={"bpm": "float", "key": "str", "scale": "str", "beats": "list",
+                   "duration": "float"}
 )
 def run_essentia_bridge(audio_paths: List[str], output_dir: str = "reports", analysis_context: dict = None) -> List[Dict]:
     """
-    Runs Essentia analysis on a list of WAV files via WSL.
+    Runs Essentia analysis on a list of WAV files in the shared worker,
+    which keeps Essentia loaded between batches.
 
     Args:
         audio_paths (List[str]): List of paths to the WAV files.
@@ -38,57 +58,31 @@ def run_essentia_bridge(audio_paths: List[str], output_dir: str = "reports", ana
     """
     try:
         os.makedirs(output_dir, exist_ok=True)
-        os.makedirs('logs', exist_ok=True)
 
-        # Validate files
-        valid_paths = []
+        # Missing files get their own error; the rest are still analysed
+        missing = set()
         for audio_path in audio_paths:
             if not os.path.exists(audio_path):
                 logging.error(f"Audio file not found: {audio_path}")
-                return [{"file": audio_path, "error": "File not found"}]
-            valid_paths.append(audio_path)
-
-        # Convert Windows paths to WSL paths
-        wsl_audio_paths = [
-            f"/mnt/{p[0].lower()}{p[2:].replace('\\\\', '/').replace('\\', '/')}"
-            for p in valid_paths
-        ]
-        logging.info(f"Translated paths for WSL: {wsl_audio_paths}")
+                missing.add(audio_path)
+        found = [p for p in audio_paths if p not in missing]
 
-        # Determine runner script path
-        # Local WSL: Use the project directory path
-        # Docker: Use the /app/ directory
-        wsl_runner_path = "/mnt/c/Users/12502/Documents/AI_music_assistant/essentia_runner.py" if not os.getenv("DOCKER_ENV") else "/app/essentia_runner.py"
-        result = subprocess.run(
-            ["wsl", "test", "-f", wsl_runner_path],
-            capture_output=True,
-            text=True
-        )
-        if result.returncode != 0:
-            logging.error(f"Essentia runner script not found: {wsl_runner_path}")
-            return [{"error": "Essentia runner script not found"}]
-
-        # Run Essentia analysis (batch mode)
-        cmd = ["wsl", "python3", wsl_runner_path] + wsl_audio_paths
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=60 * len(audio_paths)  # Adjust timeout for batch
-        )
-
-        if result.returncode != 0:
-            logging.error(f"Essentia analysis failed: {result.stderr}")
-            return [{"error": result.stderr.strip()}]
-
-        # Parse results
-        analysis = json.loads(result.stdout.strip())
-        logging.info(f"Essentia analysis completed: {analysis}")
-        return analysis if isinstance(analysis, list) else [analysis]
+        # One request for the whole batch; results stream back per file, in order
+        analyzed = iter(_worker().analyze(found)) if found else iter(())
+        results = []
+        for audio_path in audio_paths:
+            if audio_path in missing:
+                results.append({"file": audio_path, "error": "File not found"})
+                continue
+            res = next(analyzed)
+            if "beats" in res:
+                res["beats"] = res["beats"].tolist()
+            if "error" in res:
+                logging.error(f"Essentia analysis failed for {res['file']}: {res['error']}")
+            results.append(res)
+        logging.info(f"Essentia analysis completed for {len(results)} file(s)")
+        return results
 
-    except subprocess.TimeoutExpired:
-        logging.error(f"Essentia analysis timed out for {audio_paths}")
-        return [{"error": "Analysis timed out"}]
     except Exception as e:
         logging.error(f"Error in Essentia bridge for {audio_paths}: {str(e)}")
-        return [{"error": str(e)}]
\ No newline at end of file
+        return [{"error": str(e)}]
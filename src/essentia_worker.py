@@ -0,0 +1,341 @@
+# src/essentia_worker.py
+# -*- coding: utf-8 -*-
+"""
+essentia_worker.py – long-lived Essentia analysis worker
+
+* One worker process per run keeps Essentia imported and its algorithms
+  instantiated; batches of files are sent to it and results stream back
+  one file at a time
+* Messages are length-prefixed frames on the worker's stdin / stdout:
+  a 4-byte big-endian length and a JSON header, then one raw frame per
+  NumPy array listed in header["arrays"] (name, dtype, shape)
+* The client restarts the worker when it dies or a file exceeds its
+  timeout; the file in flight is reported as an error and the batch
+  carries on with the next one
+* Backends: "essentia" (the real thing) and "stub" (stdlib + NumPy only,
+  deterministic, for tests and machines without Essentia)
+
+Run as a worker with:  python3 essentia_worker.py --serve [--backend stub]
+"""
+
+from __future__ import annotations
+import atexit
+import json
+import logging
+import os
+import queue
+import struct
+import subprocess
+import sys
+import threading
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("main")
+
+PROTOCOL_VERSION = 1
+DEFAULT_TIMEOUT = 60.0   # seconds per file
+MAX_RESTARTS = 3         # per batch, before the remaining files are failed
+_LEN = struct.Struct(">I")
+
+# ─── Framing ──────────────────────────────────────────────────────────────────
+def write_message(stream: BinaryIO, header: Dict[str, Any],
+                  arrays: Optional[Dict[str, np.ndarray]] = None) -> None:
+    """Send `header` (JSON-serialisable) plus named NumPy arrays."""
+    arrays = arrays or {}
+    header = dict(header, arrays=[
+        {"name": k, "dtype": a.dtype.str, "shape": list(a.shape)} for k, a in arrays.items()])
+    body = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    parts = [_LEN.pack(len(body)), body]
+    for a in arrays.values():
+        raw = np.ascontiguousarray(a).tobytes()
+        parts += [_LEN.pack(len(raw)), raw]
+    stream.write(b"".join(parts))
+    stream.flush()
+
+def read_message(stream: BinaryIO) -> Optional[Tuple[Dict[str, Any], Dict[str, np.ndarray]]]:
+    """Next (header, arrays) from `stream`, or None at end of stream."""
+    body = _read_frame(stream)
+    if body is None:
+        return None
+    header = json.loads(body.decode("utf-8"))
+    arrays = {}
+    for spec in header.pop("arrays", []):
+        raw = _read_frame(stream)
+        if raw is None:
+            return None
+        arrays[spec["name"]] = np.frombuffer(raw, dtype=np.dtype(spec["dtype"])).reshape(spec["shape"])
+    return header, arrays
+
+def _read_frame(stream: BinaryIO) -> Optional[bytes]:
+    head = stream.read(_LEN.size)
+    if len(head) < _LEN.size:
+        return None
+    (n,) = _LEN.unpack(head)
+    data = stream.read(n)
+    return data if len(data) == n else None
+
+# ─── Backends (worker side) ───────────────────────────────────────────────────
+class EssentiaBackend:
+    """Essentia algorithms built once and reused for every file."""
+
+    name = "essentia"
+
+    def __init__(self, sample_rate: int = 44100):
+        import essentia.standard as es
+        self.es = es
+        self.sample_rate = sample_rate
+        self.rhythm = es.RhythmExtractor2013(method="multifeature")
+        self.key = es.KeyExtractor()
+        self.loudness = es.Loudness()
+
+    def analyze(self, path: str) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        audio = self.es.MonoLoader(filename=path, sampleRate=self.sample_rate)()
+        bpm, beats, confidence, _, _ = self.rhythm(audio)
+        key, scale, strength = self.key(audio)
+        result = {
+            "bpm": float(bpm),
+            "beat_confidence": float(confidence),
+            "key": key,
+            "scale": scale,
+            "key_strength": float(strength),
+            "loudness": float(self.loudness(audio)),
+            "duration": len(audio) / float(self.sample_rate),
+        }
+        return result, {"beats": np.asarray(beats, dtype=np.float32)}
+
+class StubBackend:
+    """Deterministic stand-in with the Essentia backend's result keys."""
+
+    name = "stub"
+
+    def analyze(self, path: str) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        import wave
+        with wave.open(path, "rb") as w:
+            duration = w.getnframes() / float(w.getframerate())
+        bpm = 120.0
+        beats = np.arange(0.0, duration, 60.0 / bpm, dtype=np.float32)
+        result = {"bpm": bpm, "beat_confidence": 0.0, "key": "C", "scale": "major",
+                  "key_strength": 0.0, "loudness": 0.0, "duration": duration}
+        return result, {"beats": beats}
+
+BACKENDS = {"essentia": EssentiaBackend, "stub": StubBackend}
+
+def serve(backend_name: str = "essentia", stdin: Optional[BinaryIO] = None,
+          stdout: Optional[BinaryIO] = None) -> None:
+    """Worker loop: answer requests on stdin until "shutdown" or EOF."""
+    stdin = stdin or sys.stdin.buffer
+    stdout = stdout or sys.stdout.buffer
+    # anything a library prints must not corrupt the protocol stream
+    sys.stdout = sys.stderr
+    backend = BACKENDS[backend_name]()
+    write_message(stdout, {"op": "ready", "backend": backend.name, "version": PROTOCOL_VERSION})
+    while True:
+        msg = read_message(stdin)
+        if msg is None:
+            return
+        req, _ = msg
+        op = req.get("op")
+        if op == "shutdown":
+            return
+        if op == "ping":
+            write_message(stdout, {"op": "pong", "id": req.get("id")})
+            continue
+        if op != "analyze":
+            write_message(stdout, {"op": "error", "id": req.get("id"), "error": f"unknown op {op!r}"})
+            continue
+        for i, path in enumerate(req["paths"]):
+            try:
+                result, arrays = backend.analyze(path)
+                write_message(stdout, {"op": "result", "id": req["id"], "index": i,
+                                       "file": path, "result": result}, arrays)
+            except Exception as exc:
+                write_message(stdout, {"op": "result", "id": req["id"], "index": i,
+                                       "file": path, "error": str(exc)})
+        write_message(stdout, {"op": "done", "id": req["id"]})
+
+# ─── Client ───────────────────────────────────────────────────────────────────
+class WorkerCrashed(RuntimeError):
+    pass
+
+class EssentiaWorker:
+    """
+    Client for one worker process, started on first use.
+
+    :param command: Argv that starts a worker speaking this protocol
+                    (default: this file under the current interpreter).
+    :param backend: Backend name passed to the default command.
+    :param path_map: Translates local paths into the worker's view
+                     (e.g. Windows paths to /mnt/c/... under WSL).
+    """
+
+    def __init__(self, command: Optional[List[str]] = None, backend: str = "essentia",
+                 timeout: float = DEFAULT_TIMEOUT, path_map=None):
+        self.command = command or [sys.executable, os.path.abspath(__file__),
+                                   "--serve", "--backend", backend]
+        self.timeout = timeout
+        self.path_map = path_map or (lambda p: p)
+        self.restarts = 0
+        self._proc: Optional[subprocess.Popen] = None
+        self._inbox: "queue.Queue" = queue.Queue()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    # ── lifecycle ────────────────────────────────────────────────────────────
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def start(self) -> None:
+        if self.alive:
+            return
+        self._proc = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                      stderr=subprocess.DEVNULL)
+        self._inbox = queue.Queue()
+        threading.Thread(target=self._pump, args=(self._proc, self._inbox), daemon=True).start()
+        hello = self._receive(self.timeout)
+        if hello.get("op") != "ready":
+            raise WorkerCrashed(f"unexpected handshake: {hello}")
+        logger.info(f"Essentia worker started (pid {self._proc.pid}, backend {hello.get('backend')})")
+
+    def close(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        if proc.poll() is None:
+            try:
+                write_message(proc.stdin, {"op": "shutdown"})
+                proc.stdin.close()
+                proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                proc.kill()
+                proc.wait()
+
+    def _kill(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is not None and proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+    @staticmethod
+    def _pump(proc: subprocess.Popen, inbox: "queue.Queue") -> None:
+        while True:
+            try:
+                msg = read_message(proc.stdout)
+            except (OSError, ValueError):
+                msg = None
+            inbox.put(msg)
+            if msg is None:
+                return
+
+    def _receive(self, timeout: float) -> Dict[str, Any]:
+        try:
+            msg = self._inbox.get(timeout=timeout)
+        except queue.Empty:
+            raise WorkerCrashed(f"no reply within {timeout:.0f}s")
+        if msg is None:
+            raise WorkerCrashed("worker exited")
+        header, arrays = msg
+        if arrays:
+            header.setdefault("result", {}).update(arrays)
+        return header
+
+    # ── requests ─────────────────────────────────────────────────────────────
+    def analyze(self, paths: List[str]) -> Iterator[Dict[str, Any]]:
+        """Yield one result dict per path, in order, as the worker finishes each."""
+        with self._lock:
+            pending = list(paths)
+            crashes = 0
+            while pending:
+                try:
+                    if crashes:
+                        self.restarts += 1
+                    self.start()
+                except (WorkerCrashed, OSError) as exc:
+                    logger.error(f"Essentia worker could not start: {exc}")
+                    self._kill()
+                    for path in pending:
+                        yield {"file": path, "error": f"Essentia worker unavailable: {exc}"}
+                    return
+                try:
+                    self._next_id += 1
+                    req_id = self._next_id
+                    write_message(self._proc.stdin, {"op": "analyze", "id": req_id,
+                                                     "paths": [self.path_map(p) for p in pending]})
+                    while pending:
+                        msg = self._receive(self.timeout)
+                        if msg.get("id") != req_id or msg.get("op") != "result":
+                            continue  # left over from an abandoned batch
+                        path = pending.pop(0)
+                        if "error" in msg:
+                            yield {"file": path, "error": msg["error"]}
+                        else:
+                            yield {"file": path, "status": "success", **msg["result"]}
+                    while True:
+                        msg = self._receive(self.timeout)
+                        if msg.get("id") == req_id and msg.get("op") == "done":
+                            break
+                except (WorkerCrashed, OSError) as exc:
+                    crashes += 1
+                    logger.warning(f"Essentia worker failed on {pending[:1]}: {exc}; restarting")
+                    self._kill()
+                    if pending:
+                        yield {"file": pending.pop(0), "error": f"Essentia worker crashed: {exc}"}
+                    if crashes > MAX_RESTARTS:
+                        for path in pending:
+                            yield {"file": path, "error": "Essentia worker unavailable"}
+                        return
+
+    def ping(self) -> bool:
+        with self._lock:
+            self.start()
+            self._next_id += 1
+            write_message(self._proc.stdin, {"op": "ping", "id": self._next_id})
+            return self._receive(self.timeout).get("op") == "pong"
+
+# ─── Run-wide instance ────────────────────────────────────────────────────────
+_WORKER: Optional[EssentiaWorker] = None
+_WORKER_LOCK = threading.Lock()
+
+def get_worker(**kwargs) -> EssentiaWorker:
+    """
+    Shared worker, created on first call. ESSENTIA_WORKER_BACKEND picks
+    the backend and ESSENTIA_WORKER_CMD (a JSON argv) replaces the
+    command, e.g. '["wsl", "python3", "/mnt/c/.../essentia_worker.py", "--serve"]'.
+    """
+    global _WORKER
+    with _WORKER_LOCK:
+        if _WORKER is None:
+            cmd = os.getenv("ESSENTIA_WORKER_CMD")
+            kwargs.setdefault("command", json.loads(cmd) if cmd else None)
+            kwargs.setdefault("backend", os.getenv("ESSENTIA_WORKER_BACKEND", "essentia"))
+            _WORKER = EssentiaWorker(**kwargs)
+            atexit.register(_WORKER.close)
+        return _WORKER
+
+def shutdown() -> None:
+    global _WORKER
+    with _WORKER_LOCK:
+        if _WORKER is not None:
+            _WORKER.close()
+            _WORKER = None
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Essentia analysis worker")
+    parser.add_argument("--serve", action="store_true", help="Answer requests on stdin/stdout.")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="essentia")
+    parser.add_argument("paths", nargs="*", help="Analyze these files once and print JSON.")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.backend)
+    else:
+        backend = BACKENDS[args.backend]()
+        out = []
+        for p in args.paths:
+            res, arrays = backend.analyze(p)
+            out.append({"file": p, **res, **{k: a.tolist() for k, a in arrays.items()}})
+        print(json.dumps(out, indent=2))
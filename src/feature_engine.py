@@ -0,0 +1,102 @@
+# src/feature_engine.py
+# -*- coding: utf-8 -*-
+"""
+feature_engine.py – fused spectral features, one STFT per file
+
+* One streaming STFT pass (audio_stream.analyze) yields per-frame RMS,
+  spectral centroid, rolloff and flux; tempo and beat times come from
+  that flux envelope (librosa.beat.beat_track on the envelope only)
+* Registered as the "spectral_features" plugin, so the summary lands in
+  the analysis context (and the result cache) for downstream plugins
+* from_context() reads it back, computing it on the spot when a caller
+  runs without the plugin; results are memoised per file for the run
+"""
+
+from __future__ import annotations
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from analysis_context import lookup
+from audio_stream import analyze as stream_analyze
+from plugin_registry import register_plugin
+
+PLUGIN_NAME = "spectral_features"
+MAX_ENTRIES = 64
+
+def compute(path: str) -> Dict[str, Any]:
+    """Summary features of `path` from a single STFT pass."""
+    frames = stream_analyze(path)
+    sr, hop = frames["sr"], frames["hop_length"]
+    flux = frames["onset_env"]
+
+    tempo, beats = 0.0, np.zeros(0, dtype=int)
+    if len(flux) > 1 and flux.any():
+        import librosa
+        tempo, beats = librosa.beat.beat_track(onset_envelope=flux, sr=sr, hop_length=hop)
+        tempo = float(np.atleast_1d(tempo)[0])
+    # frame t spans [t*hop, t*hop + frame_length); report its centre
+    beat_times = (beats * hop + frames["frame_length"] // 2) / float(sr)
+
+    return {
+        "sr": sr,
+        "duration": round(frames["duration"], 6),
+        "hop_length": hop,
+        "rms": round(frames["rms_mean"], 6),
+        "spectral_centroid": round(frames["centroid_mean"], 6),
+        "spectral_rolloff": round(frames["rolloff_mean"], 6),
+        "spectral_flux": round(float(flux.mean()) if len(flux) else 0.0, 6),
+        "tempo": round(tempo, 3),
+        "beat_times": [round(float(t), 4) for t in beat_times],
+    }
+
+# ─── Run-scoped memo ──────────────────────────────────────────────────────────
+_MEMO: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+_LOCK = threading.Lock()
+
+def features(path: str) -> Dict[str, Any]:
+    """compute(path), memoised on (path, mtime, size) for this process."""
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    with _LOCK:
+        hit = _MEMO.get(key)
+        if hit is not None:
+            _MEMO.move_to_end(key)
+            return hit
+    out = compute(path)
+    with _LOCK:
+        _MEMO[key] = out
+        while len(_MEMO) > MAX_ENTRIES:
+            _MEMO.popitem(last=False)
+    return out
+
+def from_context(ctx: Optional[Dict[str, Any]], path: str) -> Dict[str, Any]:
+    """The spectral_features summary for `path`: from ctx when the plugin
+    already ran, otherwise computed (and memoised) here."""
+    hit = lookup(ctx, PLUGIN_NAME, path)
+    if isinstance(hit, dict) and isinstance(hit.get("spectral"), dict):
+        return hit["spectral"]
+    return features(path)
+
+def reset() -> None:
+    """Forget memoised features; called by run_pipeline at the start of a run."""
+    with _LOCK:
+        _MEMO.clear()
+
+@register_plugin(
+    name="spectral_features",
+    description="RMS, centroid, rolloff, flux, tempo and beats from one fused STFT pass",
+    input_type="audio",
+    phase=1,
+    result_schema={"spectral": "dict"}
+)
+def spectral_features(path: str, output_dir: str = "reports") -> Dict[str, Any]:
+    try:
+        if not os.path.exists(path):
+            return {"status": "error", "error": "Audio file not found", "input": path}
+        return {"status": "success", "file": path, "spectral": features(path)}
+    except Exception as e:
+        return {"status": "error", "error": str(e), "input": path}
@@ -1,7 +1,7 @@
 import os
 import logging
-import json
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable
+from report_sink import ReportSink
 
 # Configure logging
 logging.basicConfig(
@@ -14,37 +14,36 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def main(reports: List[Dict[str, Any]], output_dir: str) -> Dict[str, Any]:
+def main(reports: Iterable[Dict[str, Any]], output_dir: str) -> Dict[str, Any]:
+    """
+    Stream successful reports into <output_dir>/master_report.jsonl.
+
+    Records are written one line at a time as they are read, so `reports`
+    may be a lazy iterator (e.g. ReportReader); the accompanying
+    master_report.index.json lets consumers seek by plugin or file. The
+    report is written to a temp file and renamed into place at the end,
+    so `reports` may read the very report being replaced.
+    """
     try:
         logger.info("Flattening reports into a master report")
-        
-        # Flatten reports into a single master report
-        master_report = {
-            "audio_mastering": [],
-            "audio_features": [],
-            "generate_melody": []
-        }
-        
-        for report in reports:
-            if report["status"] == "success":
-                plugin_name = report.get("plugin_name", "unknown")
-                if plugin_name in master_report:
-                    master_report[plugin_name].append(report)
-                else:
-                    logger.warning(f"Unknown plugin name in report: {plugin_name}")
-        
-        # Save the master report to JSON
-        output_file = os.path.join(output_dir, "master_report.json")
-        with open(output_file, 'w') as f:
-            json.dump(master_report, f, indent=4)
-        logger.info(f"Master report saved to {output_file}")
-        
+
+        output_file = os.path.join(output_dir, "master_report.jsonl")
+        counts: Dict[str, int] = {}
+        with ReportSink(output_file, atomic=True) as sink:
+            for report in reports:
+                if report.get("status") == "success":
+                    plugin_name = report.get("plugin_name", "unknown")
+                    sink.write(report, plugin=plugin_name)
+                    counts[plugin_name] = counts.get(plugin_name, 0) + 1
+        logger.info(f"Master report saved to {output_file} ({sink.count} records)")
+
         return {
             "status": "success",
             "output_file": output_file,
-            "master_report": master_report
+            "index_file": sink.index_path,
+            "counts": counts
         }
-    
+
     except Exception as e:
         logger.error(f"Error flattening reports: {e}")
-        return {"status": "error", "error": str(e)}
\ No newline at end of file
+        return {"status": "error", "error": str(e)}
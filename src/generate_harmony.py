@@ -25,7 +25,9 @@ logger = logging.getLogger(__name__)
     description="Generates harmonic progressions for MIDI inputs, optimized for acoustic guitar songs",
     input_type="midi",
     phase=5,
-    requires=["audio_analysis"]
+    requires=["audio_analysis"],
+    batch=True,
+    max_batch_size=32
 )
 def harmony_generator(midi_paths: List[str], output_dir: str = "reports", analysis_context: dict = None) -> List[Dict[str, Any]]:
     """
@@ -4,9 +4,8 @@ Classifies the genre of an audio file.
 """
 import os
 import logging
-import librosa
-import numpy as np
 from typing import Dict
+from feature_engine import from_context
 from plugin_registry import register_plugin
 
 # Configure logging
@@ -20,7 +19,8 @@ logging.basicConfig(
     name="genre_classifier",
     description="Classifies the genre of an audio file",
     input_type="wav",
-    phase=6
+    phase=6,
+    requires=["spectral_features"]
 )
 def genre_classifier(audio_path: str, output_dir: str = "reports", analysis_context: dict = None) -> Dict:
     """
@@ -40,12 +40,10 @@ def genre_classifier(audio_path: str, output_dir: str = "reports", analysis_cont
             return {"error": "Audio file not found"}
 
         # Load audio features from analysis_context if available
-        features = analysis_context.get("audio_analysis", {}).get("features", {})
+        features = (analysis_context or {}).get("audio_analysis", {}).get("features", {})
         if not features:
-            y, sr = librosa.load(audio_path)
-            features = {
-                "spectral_centroid": float(np.mean(librosa.feature.spectral_centroid(y=y, sr=sr)))
-            }
+            # shared single-pass STFT features instead of a fresh decode + STFT
+            features = from_context(analysis_context, audio_path)
 
         # Simplified genre classification (placeholder)
         genre = "rock" if features["spectral_centroid"] > 3000 else "classical"
@@ -3,8 +3,9 @@ Genre Tag Bridge
 Reads the genre/style label from an E-GMD (or similarly named) MIDI
 and passes it downstream via `analysis_context["genre"]`.
 """
-import os, csv, re, pretty_midi, logging
+import os, csv, re, logging
 from typing import Dict
+from midi_cache import load_pretty_midi
 from plugin_registry import register_plugin
 
 CSV_HINT = "e-gmd-v1.0.0.csv"          # adjust if you renamed it
@@ -25,7 +26,7 @@ def _csv_lookup(midi_path: str) -> str:
 
 def _metadata_lookup(midi_path: str) -> str:
     """Extract style from the MIDI’s track-name or text events."""
-    midi = pretty_midi.PrettyMIDI(midi_path)
+    midi = load_pretty_midi(midi_path)
     for t in midi.text_events + midi.lyrics:
         m = re.search(r"(rock|funk|latin|swing|hiphop|pop)", t.text, re.I)
         if m:
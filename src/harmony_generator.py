@@ -7,6 +7,7 @@ import logging
 import json
 import random
 from typing import List, Dict, Any
+from midi_cache import load_pretty_midi, load_score
 from plugin_registry import register_plugin
 import pretty_midi
 import music21
@@ -27,7 +28,9 @@ logger = logging.getLogger(__name__)
     description="Augments or generates chord progressions for MIDI/audio inputs",
     input_type="midi",
     phase=5,
-    requires=["audio_analysis", "jsymbolic_bridge"]
+    requires=["audio_analysis", "jsymbolic_bridge"],
+    batch=True,
+    max_batch_size=32
 )
 def harmony_generator(midi_paths: List[str], output_dir: str = "reports", analysis_context: dict = None) -> List[Dict[str, Any]]:
     """
@@ -61,8 +64,8 @@ def harmony_generator(midi_paths: List[str], output_dir: str = "reports", analys
 
             try:
                 # Load MIDI
-                midi = pretty_midi.PrettyMIDI(midi_path)
-                stream = music21.converter.parse(midi_path)
+                midi = load_pretty_midi(midi_path)
+                stream = load_score(midi_path)
 
                 # Extract features
                 audio_features = analysis_context.get("audio_analysis", [{}])[0] if analysis_context else {}
@@ -0,0 +1,205 @@
+# src/job_queue.py
+# -*- coding: utf-8 -*-
+"""
+job_queue.py – bounded background job queue for the API server
+
+* submit() hands a job to a fixed pool of worker threads and returns at
+  once; the HTTP handler never runs plugins on the event loop
+* At most max_pending jobs may be queued or running; beyond that
+  submit() raises QueueFull, which the API turns into 429 + Retry-After
+* Each job records a status, a progress counter and an append-only event
+  list (read by the server-sent-events endpoint); finished jobs are kept
+  for keep_finished jobs / ttl seconds, then forgotten
+* job.future belongs to the queue, not the worker pool: a caller that
+  cancels its wait (a disconnected ?wait=true request) does not stop the
+  job, so its slot, cleanup and status are always settled
+"""
+
+from __future__ import annotations
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_PENDING = 16
+DEFAULT_KEEP_FINISHED = 1000
+DEFAULT_TTL = 3600.0   # seconds a finished job stays queryable
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "error"
+
+class QueueFull(RuntimeError):
+    """Raised by submit() when max_pending jobs are already waiting or running."""
+
+    def __init__(self, depth: int, retry_after: int = 5):
+        super().__init__(f"job queue full ({depth} pending)")
+        self.depth = depth
+        self.retry_after = retry_after
+
+class Job:
+    """One submitted job; progress() and the event list are thread-safe."""
+
+    __slots__ = ("id", "kind", "meta", "status", "done", "total", "result", "error",
+                 "created", "started", "finished", "events", "future", "_lock")
+
+    def __init__(self, kind: str, meta: Optional[Dict[str, Any]] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.meta = meta or {}
+        self.status = QUEUED
+        self.done = 0
+        self.total = 0
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.events: List[Dict[str, Any]] = []
+        self.future: Optional[Future] = None
+        self._lock = threading.Lock()
+        self._event("queued")
+
+    def _event(self, event: str, **data: Any) -> None:
+        with self._lock:
+            self.events.append({"event": event, "time": time.time(), **data})
+
+    def progress(self, done: int, total: int, **data: Any) -> None:
+        """Report `done` of `total` steps finished (called from the job)."""
+        self.done, self.total = done, total
+        self._event("progress", done=done, total=total, **data)
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        out = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": {"done": self.done, "total": self.total},
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            **self.meta,
+        }
+        if self.error is not None:
+            out["error"] = self.error
+        if include_result and self.status == DONE:
+            out["result"] = self.result
+        return out
+
+class JobQueue:
+    """
+    :param workers: Jobs run concurrently.
+    :param max_pending: Most jobs queued or running at once.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, max_pending: int = DEFAULT_MAX_PENDING,
+                 keep_finished: int = DEFAULT_KEEP_FINISHED, ttl: float = DEFAULT_TTL):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.keep_finished = keep_finished
+        self.ttl = ttl
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.rejected = 0
+
+    @property
+    def depth(self) -> int:
+        """Jobs queued or running."""
+        return self._pending
+
+    def submit(self, kind: str, fn: Callable[[Job], Any], meta: Optional[Dict[str, Any]] = None,
+               on_reject: Optional[Callable[[], None]] = None) -> Job:
+        """
+        Run fn(job) on a worker; its return value becomes job.result.
+
+        :param on_reject: Cleanup called when the queue is full, before
+                          QueueFull propagates.
+        """
+        with self._lock:
+            self._expire()
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                depth = self._pending
+            else:
+                depth = None
+                self._pending += 1
+                self.submitted += 1
+                job = Job(kind, meta)
+                self._jobs[job.id] = job
+        if depth is not None:
+            if on_reject is not None:
+                on_reject()
+            raise QueueFull(depth)
+        job.future = Future()
+        self._pool.submit(self._run, job, fn)
+        return job
+
+    def completed(self, kind: str, result: Any, meta: Optional[Dict[str, Any]] = None) -> Job:
+        """Record a job that is already done (e.g. answered from a cache),
+        so callers get the same job contract without queuing work."""
+        job = Job(kind, meta)
+        job.status, job.result = DONE, result
+        job.started = job.created
+        job._event(DONE)
+        job.finished = time.time()
+        job.future = Future()
+        job.future.set_result(result)
+        with self._lock:
+            self._expire()
+            self.submitted += 1
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            by_status: Dict[str, int] = {}
+            for job in self._jobs.values():
+                by_status[job.status] = by_status.get(job.status, 0) + 1
+            return {"depth": self._pending, "max_pending": self.max_pending,
+                    "workers": self.workers, "submitted": self.submitted,
+                    "rejected": self.rejected, "jobs": by_status}
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]) -> None:
+        job.status, job.started = RUNNING, time.time()
+        job._event("started")
+        error: Optional[Exception] = None
+        try:
+            job.result = fn(job)
+            job.status = DONE
+        except Exception as exc:
+            error = exc
+            job.error, job.status = str(exc), FAILED
+        finally:
+            # last event first: readers stop once `finished` is set
+            job._event(job.status, **({"error": job.error} if job.error else {}))
+            job.finished = time.time()
+            with self._lock:
+                self._pending -= 1
+        try:
+            if error is None:
+                job.future.set_result(job.result)
+            else:
+                job.future.set_exception(error)
+        except InvalidStateError:   # the caller cancelled its wait; the job still ran
+            pass
+
+    def _expire(self) -> None:
+        """Forget finished jobs past the ttl or beyond keep_finished (lock held)."""
+        now = time.time()
+        finished = [j for j in self._jobs.values() if j.finished is not None]
+        extra = len(finished) - self.keep_finished
+        for job in finished:
+            if extra > 0 or now - job.finished > self.ttl:
+                del self._jobs[job.id]
+                extra -= 1
@@ -3,21 +3,36 @@
 """
 main.py – pipeline orchestrator
 
-* Auto-imports every .py in src/
-* Executes plugins in phase order
+* Discovers plugins from a cached static manifest of src/; each plugin
+  module is imported only when that plugin first runs
+* Executes plugins in dependency order (requires=[...]), then phase order
+* Optionally runs independent plugins concurrently (--jobs N)
 * Passes analysis_context only if the target function accepts it
+  (single-file plugins see a per-file view of it)
+* Optionally fans files out over a worker pool (--workers N)
+* Hands batch plugins (register_plugin(batch=True)) chunks of files
+  instead of one path per call
+* Shares one decoded-audio cache between all audio plugins of a run
+* Computes STFT features once per audio file (spectral_features) for
+  every plugin that needs them
+* Shares one parsed pretty_midi / music21 object per MIDI file
+* Reuses cached results for unchanged inputs across runs (cache/results)
+* Wraps every result once in a typed PluginResult (canonical status /
+  file / error, optional per-plugin result_schema) and encodes it once
+* Streams successful results to <out_dir>/master_report.jsonl (+ index)
+* Profiles every plugin call into <out_dir>/profile.json and
+  profile.trace.json (Chrome trace format)
 """
 
 from __future__ import annotations
 import argparse
-import importlib
 import inspect
 import logging
 import os
-import pkgutil
 import sys
 import pathlib
-from typing import Dict, Any, List
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Sequence
 
 # Logging -----------------------------------------------------------
 os.makedirs("logs", exist_ok=True)
@@ -35,29 +50,27 @@ logger = logging.getLogger("main")
 SRC_DIR = pathlib.Path(__file__).resolve().parent
 sys.path.insert(0, str(SRC_DIR))
 
-# Auto-import every module in src/ so that @register_plugin calls happen
-def _import_all(src: pathlib.Path) -> None:
-    for info in pkgutil.iter_modules([str(src)]):
-        if info.name in {"main"} or info.name.startswith("_"):
-            continue
-        if info.name in sys.modules:
-            continue
-        try:
-            importlib.import_module(info.name)
-        except Exception as exc:
-            logger.warning(f"⚠️  Skipped module {info.name}: {exc}")
-
-_import_all(SRC_DIR)
+# Register every plugin in src/ from the manifest; modules load lazily
+from plugin_registry import PLUGINS, discover  # noqa: E402
+discover(str(SRC_DIR))
 
-# Import only the PLUGINS list from your registry
-from plugin_registry import PLUGINS  # noqa: E402
+import audio_cache  # noqa: E402
+import feature_engine  # noqa: E402
+import midi_cache  # noqa: E402
+import result_store  # noqa: E402
+from analysis_context import AnalysisContext  # noqa: E402
+from plugin_result import PluginResult  # noqa: E402
+from profiler import RunProfile, measure  # noqa: E402
+from report_sink import ReportReader, ReportSink  # noqa: E402
+from result_store import ResultStore  # noqa: E402
+from scheduler import input_types as _input_types, resolve_execution_order, run_dag  # noqa: E402,F401
 
 # Helpers -----------------------------------------------------------
 def _collect(dir_path: str, exts: tuple[str, ...]) -> List[str]:
     p = pathlib.Path(dir_path)
     if not p.exists():
         return []
-    return [str(f) for f in p.iterdir() if f.is_file() and f.suffix.lower() in exts]
+    return sorted(str(f) for f in p.iterdir() if f.is_file() and f.suffix.lower() in exts)
 
 def _call_plugin(func, infile: str, out_dir: str, ctx: Dict[str, Any]) -> Dict[str, Any]:
     """Invoke plugin, passing ctx only if signature includes it."""
@@ -67,60 +80,282 @@ def _call_plugin(func, infile: str, out_dir: str, ctx: Dict[str, Any]) -> Dict[s
     else:
         return func(infile, out_dir)
 
-def _handle(res: Dict[str, Any], name: str, infile: str,
-            reports: List[Dict[str, Any]], ctx: Dict[str, Any]) -> None:
-    res["plugin_name"] = name
-    if res.get("status") == "success":
-        reports.append(res)
-        # merge any new context keys
-        ctx.update({k: v for k, v in res.items()
-                    if k not in {"status", "plugin_name"}})
+def _timed_call(func, infile: str, out_dir: str, ctx: Dict[str, Any]) -> tuple:
+    """_call_plugin() under measure(); returns (result, sample). Runs in the worker."""
+    with measure() as sample:
+        try:
+            res = _call_plugin(func, infile, out_dir, ctx)
+        except Exception as exc:
+            res = {"status": "error", "error": str(exc), "input": infile}
+    return res, sample
+
+def _batches(files: List[str], max_size: int, workers: int) -> List[List[str]]:
+    """Split files into chunks of at most max_size (0: unbounded), small
+    enough that every worker gets one."""
+    size = max_size or len(files)
+    if workers > 1:
+        size = min(size, -(-len(files) // workers))
+    size = max(size, 1)
+    return [files[i:i + size] for i in range(0, len(files), size)]
+
+def _split_batch(files: List[str], out: Any) -> List[Dict[str, Any]]:
+    """
+    Map a batch plugin's return value onto its input files: by each
+    result's "file" key, else by position. Results without a "status"
+    get one from the presence of "error".
+    """
+    if isinstance(out, dict):
+        out = [out]
+    if not isinstance(out, list):
+        out = []
+    by_file = {}
+    for r in out:
+        if isinstance(r, dict) and isinstance(r.get("file"), str):
+            by_file.setdefault(os.path.abspath(r["file"]), r)
+
+    results = []
+    for i, f in enumerate(files):
+        r = by_file.get(os.path.abspath(f))
+        if r is None and not by_file:
+            if len(out) == len(files):
+                r = out[i]
+            elif len(out) == 1:  # one failure for the whole batch
+                r = dict(out[0])
+        if not isinstance(r, dict):
+            r = {"status": "error", "error": "No result returned for this file", "input": f}
+        elif "status" not in r:
+            r["status"] = "error" if "error" in r else "success"
+        results.append(r)
+    return results
+
+def _timed_batch(func, files: List[str], out_dir: str, ctx: Dict[str, Any]) -> tuple:
+    """One call of a batch plugin on `files` under measure(); returns
+    (per-file results, sample). Runs in the worker."""
+    with measure() as sample:
+        try:
+            out = _call_plugin(func, files, out_dir, ctx)
+        except Exception as exc:
+            out = {"status": "error", "error": str(exc)}
+    return _split_batch(files, out), sample
+
+def _make_pool(workers: int, executor: str = "process") -> Optional[Executor]:
+    """Return a worker pool for fanning files out, or None for serial runs."""
+    if workers <= 1:
+        return None
+    if executor == "thread":
+        return ThreadPoolExecutor(max_workers=workers)
+    return ProcessPoolExecutor(max_workers=workers)
+
+def _run_files(pool: Optional[Executor], func, files: List[str],
+               out_dir: str, ctx: Dict[str, Any],
+               name: str = "", profile: Optional[RunProfile] = None) -> List[Dict[str, Any]]:
+    """
+    Run one plugin over every file and return the results in *file order*,
+    whatever order the workers finish in, so merging stays deterministic.
+
+    Each call gets the file's view of ctx. Process workers receive a
+    snapshot of that view, taken before submitting (results may be
+    merging on another thread under --jobs): in-place context writes
+    made by a plugin are lost, only the keys it returns get merged back.
+
+    Every call is measured; samples go to `profile` under `name`.
+    """
+    def view(f: str):
+        return ctx.for_file(f) if isinstance(ctx, AnalysisContext) else ctx
+
+    if pool is None or len(files) < 2:
+        futures = None
+    else:
+        snap = isinstance(pool, ProcessPoolExecutor) and isinstance(ctx, AnalysisContext)
+        futures = [pool.submit(_timed_call, func, f, out_dir, view(f).snapshot() if snap else view(f))
+                   for f in files]
+
+    results: List[Dict[str, Any]] = []
+    for i, f in enumerate(files):
+        try:
+            if futures is None:
+                res, sample = _timed_call(func, f, out_dir, view(f))
+            else:
+                res, sample = futures[i].result()
+        except Exception as exc:
+            results.append({"status": "error", "error": str(exc), "input": f})
+            continue
+        if profile is not None:
+            status = res.get("status") if isinstance(res, dict) else None
+            profile.add(name, f, sample, status or "unknown")
+        results.append(res)
+    return results
+
+def _run_batches(pool: Optional[Executor], func, files: List[str], max_size: int,
+                 out_dir: str, ctx: Dict[str, Any], workers: int = 1,
+                 name: str = "", profile: Optional[RunProfile] = None) -> List[Dict[str, Any]]:
+    """
+    _run_files() for batch plugins: one call per chunk of files, chunks
+    spread over the pool, results returned in file order.
+
+    Process workers get ctx.subset(chunk) rather than the whole context.
+    """
+    chunks = _batches(files, max_size, workers if pool is not None else 1)
+    if pool is None or len(chunks) < 2:
+        futures = None
+    else:
+        def part(chunk):
+            if isinstance(ctx, AnalysisContext) and isinstance(pool, ProcessPoolExecutor):
+                return ctx.subset(chunk)
+            return ctx
+        futures = [pool.submit(_timed_batch, func, c, out_dir, part(c)) for c in chunks]
+
+    results: List[Dict[str, Any]] = []
+    for i, chunk in enumerate(chunks):
+        try:
+            if futures is None:
+                res, sample = _timed_batch(func, chunk, out_dir, ctx)
+            else:
+                res, sample = futures[i].result()
+        except Exception as exc:
+            results.extend({"status": "error", "error": str(exc), "input": f} for f in chunk)
+            continue
+        if profile is not None:
+            errors = sum(r.get("status") != "success" for r in res)
+            profile.add_batch(name, chunk, sample, errors)
+        results.extend(res)
+    return results
+
+def _run_cached(store: Optional[ResultStore], force: bool, plugin: Dict[str, Any],
+                pool: Optional[Executor], files: List[str], out_dir: str,
+                ctx: Dict[str, Any], profile: Optional[RunProfile] = None,
+                workers: int = 1) -> List[PluginResult]:
+    """
+    _run_files() / _run_batches() behind the persistent result store:
+    files whose content, plugin version and config match a stored result
+    are not re-run.
+    """
+    func, name = plugin["func"], plugin["name"]
+    schema = plugin.get("result_schema")
+
+    def run(todo: List[str]) -> List[PluginResult]:
+        if plugin.get("batch"):
+            raw = _run_batches(pool, func, todo, plugin.get("max_batch_size") or 0,
+                               out_dir, ctx, workers, name, profile)
+        else:
+            raw = _run_files(pool, func, todo, out_dir, ctx, name, profile)
+        return [PluginResult.from_raw(r, name, f, schema) for f, r in zip(todo, raw)]
+
+    if store is None:
+        return run(files)
+
+    cfg = result_store.config_hash(plugin, PLUGINS, out_dir)
+    cached = {} if force else {f: store.get(f, name, cfg) for f in files}
+    todo = [f for f in files if cached.get(f) is None]
+    if len(todo) < len(files):
+        logger.info(f"⚡ {name}: {len(files) - len(todo)} of {len(files)} results from cache")
+        if profile is not None:
+            profile.add_cached(name, len(files) - len(todo))
+
+    fresh = dict(zip(todo, run(todo))) if todo else {}
+    for f, res in fresh.items():
+        if res.ok:
+            store.put(f, name, cfg, res.data)
+    return [fresh[f] if f in fresh else PluginResult.from_raw(cached[f], name, f, schema)
+            for f in files]
+
+def _handle(res: Any, plugin: Dict[str, Any], infile: str,
+            reports: ReportSink, ctx: AnalysisContext) -> None:
+    name = plugin["name"]
+    if not isinstance(res, PluginResult):
+        res = PluginResult.from_raw(res, name, infile, plugin.get("result_schema"))
+    if res.ok:
+        reports.write_encoded(res.to_json(), plugin=name, file=infile)
+        # index by (plugin, file) and merge keys into that file's namespace
+        ctx.record(name, infile, res.data)
         logger.info(f"✔ {name} succeeded on {infile}")
     else:
-        logger.warning(f"✖ {name} failed on {infile}: {res.get('error')}")
+        logger.warning(f"✖ {name} failed on {infile}: {res.error}")
 
 # Pipeline ----------------------------------------------------------
 def run_pipeline(audio_dir: str, midi_dir: str,
-                 xml_dir: str, out_dir: str) -> Dict[str, Any]:
-    logger.info("🚀  Pipeline started")
+                 xml_dir: str, out_dir: str,
+                 workers: int = 1, executor: str = "process",
+                 jobs: int = 1, strict_deps: bool = False,
+                 audio_cache_mb: float = audio_cache.DEFAULT_BUDGET_MB,
+                 cache_dir: Optional[str] = result_store.DEFAULT_ROOT,
+                 force: bool = False, invalidate: Sequence[str] = (),
+                 cache_max_mb: float = result_store.DEFAULT_MAX_MB,
+                 cache_max_age_days: float = result_store.DEFAULT_MAX_AGE_DAYS) -> Dict[str, Any]:
+    logger.info(f"🚀  Pipeline started (workers={workers}, executor={executor}, jobs={jobs})")
     os.makedirs(out_dir, exist_ok=True)
+    audio_cache.reset(audio_cache_mb)
+    midi_cache.reset()
+    feature_engine.reset()
+
+    store = None
+    if cache_dir:
+        store = ResultStore(cache_dir, max_mb=cache_max_mb, max_age_days=cache_max_age_days)
+        for name in invalidate:
+            store.invalidate(name)
 
     audio_files = _collect(audio_dir, (".wav", ".flac", ".mp3"))
     midi_files  = _collect(midi_dir,  (".mid", ".midi"))
     xml_files   = _collect(xml_dir,   (".xml", ".musicxml"))
 
-    # sort plugins by (phase, name)
-    plugins = sorted(PLUGINS, key=lambda p: (p.phase, p.name.lower()))
+    files_by_type = {"audio": audio_files, "midi": midi_files, "musicxml": xml_files}
+
+    # validate requires=[...] up front; raises on cycles before anything runs
+    plugins = resolve_execution_order(PLUGINS, strict=strict_deps)
     print("Loaded plugins:")
     for i, p in enumerate(plugins, 1):
-        print(f"  {i:2}. {p.name.ljust(22)} phase {p.phase}")
-
-    ctx: Dict[str, Any] = {}
-    reports: List[Dict[str, Any]] = []
-
-    for p in plugins:
-        print(f"\nRunning plugin: {p.name}")
-        logger.info(f"Running plugin: {p.name}")
-
-        if p.input_type == "audio":
-            for f in audio_files:
-                _handle(_call_plugin(p.module, f, out_dir, ctx),
-                        p.name, f, reports, ctx)
-        elif p.input_type == "midi":
-            for f in midi_files:
-                _handle(_call_plugin(p.module, f, out_dir, ctx),
-                        p.name, f, reports, ctx)
-        elif p.input_type == "musicxml":
-            for f in xml_files:
-                _handle(_call_plugin(p.module, f, out_dir, ctx),
-                        p.name, f, reports, ctx)
-        elif p.input_type == "report":
-            _handle(_call_plugin(p.module, reports, out_dir, ctx),
-                    p.name, "<reports>", reports, ctx)
+        print(f"  {i:2}. {p['name'].ljust(22)} phase {p['phase']}")
+
+    ctx = AnalysisContext()
+    report_path = os.path.join(out_dir, "master_report.jsonl")
+    reports = ReportSink(report_path)
+    pool = _make_pool(workers, executor)
+    profile = RunProfile()
+
+    def _run(p: Dict[str, Any]) -> List[tuple]:
+        name = p["name"]
+        print(f"\nRunning plugin: {name}")
+        logger.info(f"Running plugin: {name}")
+
+        input_types = _input_types(p)
+        if "report" in input_types:
+            # the scheduler holds report plugins until everything before them is done
+            res, sample = _timed_call(p["func"], reports.records(), out_dir, ctx)
+            status = res.get("status") if isinstance(res, dict) else None
+            profile.add(name, "<reports>", sample, status or "unknown")
+            return [("<reports>", res)]
+
+        files = [f for t in input_types for f in files_by_type.get(t, [])]
+        return list(zip(files, _run_cached(store, force, p, pool, files, out_dir, ctx,
+                                           profile, workers)))
+
+    def _merge(p: Dict[str, Any], pairs: List[tuple]) -> None:
+        # called on this thread only, in file order for each plugin
+        for f, res in pairs:
+            _handle(res, p, f, reports, ctx)
+
+    try:
+        run_dag(plugins, _run, _merge, jobs=jobs, strict=strict_deps)
+    finally:
+        reports.close()
+        if pool is not None:
+            pool.shutdown()
+        profile.finish()
+        profile_paths = profile.write(out_dir)
 
+    logger.info(f"Audio cache: {audio_cache.stats()}")
+    logger.info(f"MIDI cache: {midi_cache.stats()}")
+    if store is not None:
+        store.evict()
+        logger.info(f"Result cache: {store.stats()}")
+    for name, p in list(profile.summary().items())[:5]:
+        logger.info(f"⏱  {name}: {p['wall_s']:.2f}s wall, {p['cpu_s']:.2f}s CPU over {p['files']} files")
+    logger.info(f"Profile: {profile_paths['profile']} (trace: {profile_paths['trace']})")
     logger.info("✅  Pipeline finished")
-    print(f"\nAll done! Master report at {out_dir}/master_report.json")
-    return {"status": "success", "reports": reports}
+    print(f"\nAll done! Master report at {report_path} ({reports.count} results)")
+    return {"status": "success", "master_report": report_path,
+            "report_index": reports.index_path, "reports": ReportReader(report_path),
+            "profile": profile_paths["profile"], "trace": profile_paths["trace"]}
 
 # CLI ----------------------------------------------------------------
 if __name__ == "__main__":
@@ -129,6 +364,35 @@ if __name__ == "__main__":
     ap.add_argument("--midi_dir",      required=True)
     ap.add_argument("--musicxml_dir",  required=True)
     ap.add_argument("--out_dir",       required=True)
+    ap.add_argument("--workers",       type=int, default=1,
+                    help="Files processed in parallel per plugin (default: 1, serial)")
+    ap.add_argument("--executor",      choices=("process", "thread"), default="process",
+                    help="Worker pool type used when --workers > 1")
+    ap.add_argument("--jobs",          type=int, default=1,
+                    help="Plugins run concurrently once their requirements are met (default: 1)")
+    ap.add_argument("--strict-deps",   action="store_true",
+                    help="Fail if a plugin requires a plugin that is not registered")
+    ap.add_argument("--audio-cache-mb", type=float, default=audio_cache.DEFAULT_BUDGET_MB,
+                    help="Memory budget of the shared decoded-audio cache (per worker)")
+    ap.add_argument("--cache-dir",     default=result_store.DEFAULT_ROOT,
+                    help="Persistent result cache location")
+    ap.add_argument("--no-cache",      action="store_true",
+                    help="Neither read nor write the persistent result cache")
+    ap.add_argument("--force",         action="store_true",
+                    help="Re-run every plugin, refreshing cached results")
+    ap.add_argument("--invalidate",    action="append", default=[], metavar="PLUGIN",
+                    help="Drop cached results of PLUGIN before running (repeatable)")
+    ap.add_argument("--cache-max-mb",  type=float, default=result_store.DEFAULT_MAX_MB,
+                    help="Evict least recently used results beyond this size")
+    ap.add_argument("--cache-max-age-days", type=float, default=result_store.DEFAULT_MAX_AGE_DAYS,
+                    help="Evict results older than this")
     ns = ap.parse_args()
 
-    run_pipeline(ns.audio_dir, ns.midi_dir, ns.musicxml_dir, ns.out_dir)
+    run_pipeline(ns.audio_dir, ns.midi_dir, ns.musicxml_dir, ns.out_dir,
+                 workers=ns.workers, executor=ns.executor,
+                 jobs=ns.jobs, strict_deps=ns.strict_deps,
+                 audio_cache_mb=ns.audio_cache_mb,
+                 cache_dir=None if ns.no_cache else ns.cache_dir,
+                 force=ns.force, invalidate=ns.invalidate,
+                 cache_max_mb=ns.cache_max_mb,
+                 cache_max_age_days=ns.cache_max_age_days)
@@ -6,7 +6,8 @@ import os
 import logging
 import random
 from typing import Dict
-from music21 import converter, stream, note
+from music21 import stream, note
+from midi_cache import load_score
 from plugin_registry import register_plugin
 
 # Configure logging
@@ -43,7 +44,7 @@ def predict_melody(midi_path: str, output_dir: str = "reports/predicted", analys
         os.makedirs(output_dir, exist_ok=True)
 
         # Load MIDI
-        score = converter.parse(midi_path)
+        score = load_score(midi_path)
         logging.info(f"Loaded MIDI for melody prediction: {midi_path}")
 
         # Extract notes from the first part
@@ -4,8 +4,8 @@ Extracts basic MIDI features like note onsets and durations.
 """
 import os
 import logging
-import pretty_midi
 from typing import Dict
+from midi_cache import load_pretty_midi
 from plugin_registry import register_plugin
 
 # Configure logging
@@ -39,7 +39,7 @@ def midi_analysis(midi_path: str, output_dir: str = "reports", analysis_context:
             return {"error": "MIDI file not found"}
 
         # Load MIDI file
-        midi_data = pretty_midi.PrettyMIDI(midi_path)
+        midi_data = load_pretty_midi(midi_path)
         if not midi_data.instruments:
             logging.error("No instruments found in MIDI file")
             return {"error": "No instruments found"}
@@ -0,0 +1,134 @@
+# src/midi_cache.py
+# -*- coding: utf-8 -*-
+"""
+midi_cache.py – run-scoped parsed-MIDI cache
+
+* One pretty_midi.PrettyMIDI, one music21 score and one compact
+  piano_roll.PianoRoll per file per run
+* Shared objects are read-only by convention (piano-roll arrays are
+  actually flagged read-only); plugins that edit notes ask for copy=True
+  and get a deep copy instead of a re-parse
+* Keyed by (path, mtime, size); LRU-bounded by entry count
+* Hit/miss counters per format
+"""
+
+from __future__ import annotations
+import copy as _copy
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("main")
+
+DEFAULT_MAX_ENTRIES = 256
+
+def _parse_pretty_midi(path: str) -> Any:
+    import pretty_midi
+    return pretty_midi.PrettyMIDI(path)
+
+def _parse_music21(path: str) -> Any:
+    from music21 import converter
+    return converter.parse(path)
+
+def _parse_piano_roll(path: str) -> Any:
+    from piano_roll import PianoRoll
+    roll = PianoRoll.from_pretty_midi(_CACHE.load(path, "pretty_midi"))
+    # shared by every plugin of the run: enforce read-only, not just by convention
+    for name in ("indptr", "start", "end", "velocity", "track"):
+        getattr(roll, name).setflags(write=False)
+    return roll
+
+PARSERS: Dict[str, Callable[[str], Any]] = {
+    "pretty_midi": _parse_pretty_midi,
+    "music21": _parse_music21,
+    "piano_roll": _parse_piano_roll,
+}
+
+class ScoreCache:
+    """LRU cache of parsed MIDI objects, one per (format, file)."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[tuple, threading.Lock] = {}
+        self.counters: Dict[str, Dict[str, int]] = {}
+
+    def load(self, path: str, fmt: str, copy: bool = False) -> Any:
+        """
+        Parsed object for `path` in format `fmt` ("pretty_midi", "music21"
+        or "piano_roll").
+
+        :param copy: Return a private deep copy the caller may mutate.
+        """
+        key = (fmt,) + _stamp(path)
+        obj = self._get(key, fmt)
+        if obj is None:
+            with self._key_lock(key):
+                obj = self._get(key, fmt, count=False)
+                if obj is None:
+                    obj = PARSERS[fmt](path)
+                    self._put(key, obj)
+        return _copy.deepcopy(obj) if copy else obj
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+            self.counters = {}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries),
+                    **{fmt: dict(c) for fmt, c in self.counters.items()}}
+
+    def _key_lock(self, key: tuple) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _get(self, key: tuple, fmt: str, count: bool = True) -> Optional[Any]:
+        with self._lock:
+            obj = self._entries.get(key)
+            if obj is not None:
+                self._entries.move_to_end(key)
+            if count:
+                c = self.counters.setdefault(fmt, {"hits": 0, "misses": 0})
+                c["hits" if obj is not None else "misses"] += 1
+            return obj
+
+    def _put(self, key: tuple, obj: Any) -> None:
+        with self._lock:
+            self._entries[key] = obj
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+def _stamp(path: str) -> tuple:
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+# ─── Run-wide instance ────────────────────────────────────────────────────────
+# Each worker process of a --workers pool gets its own copy.
+_CACHE = ScoreCache()
+
+def load_pretty_midi(path: str, copy: bool = False) -> Any:
+    """Shared pretty_midi.PrettyMIDI for `path`; pass copy=True before editing it."""
+    return _CACHE.load(path, "pretty_midi", copy=copy)
+
+def load_score(path: str, copy: bool = False) -> Any:
+    """Shared music21 score for `path`; pass copy=True before editing it."""
+    return _CACHE.load(path, "music21", copy=copy)
+
+def load_piano_roll(path: str) -> Any:
+    """Shared piano_roll.PianoRoll for `path` (read-only arrays)."""
+    return _CACHE.load(path, "piano_roll")
+
+def reset(max_entries: Optional[int] = None) -> None:
+    """Drop all parsed scores; called by run_pipeline at the start of a run."""
+    _CACHE.clear()
+    if max_entries is not None:
+        _CACHE.max_entries = max_entries
+
+def stats() -> Dict[str, Any]:
+    return _CACHE.stats()
@@ -6,7 +6,7 @@ import os
 import logging
 import jams
 from typing import Dict
-from music21 import converter
+from midi_cache import load_score
 from plugin_registry import register_plugin
 
 # Configure logging
@@ -45,7 +45,7 @@ def export_midi(midi_path: str, output_dir: str = "reports/exports") -> Dict:
         os.makedirs(output_dir, exist_ok=True)
 
         # Load MIDI
-        score = converter.parse(midi_path)
+        score = load_score(midi_path)
         logging.info(f"Loaded MIDI for export: {midi_path}")
 
         # Create JAMS object
@@ -5,7 +5,7 @@ Classifies MIDI tracks as melody, bass, drums, or chords.
 import os
 import logging
 from typing import Dict
-from music21 import converter
+from midi_cache import load_score
 from plugin_registry import register_plugin
 
 # Configure logging
@@ -39,7 +39,7 @@ def classify_midi_roles(midi_path: str, output_dir=None, analysis_context=None)
             return {"file": midi_path, "error": "File not found"}
 
         # Load MIDI
-        score = converter.parse(midi_path)
+        score = load_score(midi_path)
         logging.info(f"Loaded MIDI for role classification: {midi_path}")
 
         roles = {}
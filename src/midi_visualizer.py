@@ -4,9 +4,9 @@ Generates piano-roll visualizations for MIDI files.
 """
 import os
 import logging
-import pretty_midi
-import matplotlib.pyplot as plt
+import threading
 from typing import Dict
+from piano_roll import PianoRollRenderer, load_piano_roll
 from plugin_registry import register_plugin
 
 # Configure logging
@@ -16,15 +16,25 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# one renderer (Figure / Agg canvas) per worker thread, reused across files
+_local = threading.local()
+
+def _renderer() -> PianoRollRenderer:
+    if not hasattr(_local, "renderer"):
+        _local.renderer = PianoRollRenderer(width_px=1200, height_px=600)
+    return _local.renderer
+
 @register_plugin(
     name="visualize_midi",
     description="Generates piano-roll visualizations for MIDI files",
     input_type="midi",
-    phase=2
+    phase=2,
+    result_schema={"visualization": "str"}
 )
 def visualize_midi(midi_path: str, output_dir: str = "reports/visualizations") -> Dict:
     """
-    Generates piano-roll visualizations for MIDI files.
+    Generates piano-roll visualizations for MIDI files, drawn as note
+    rectangles from the shared compact piano roll (no dense matrix).
 
     Args:
         midi_path (str): Path to the MIDI file.
@@ -43,19 +53,11 @@ def visualize_midi(midi_path: str, output_dir: str = "reports/visualizations") -
         os.makedirs(output_dir, exist_ok=True)
 
         # Load MIDI
-        midi_data = pretty_midi.PrettyMIDI(midi_path)
-        logging.info(f"Loaded MIDI for visualization: {midi_path}")
+        roll = load_piano_roll(midi_path)
+        logging.info(f"Loaded MIDI for visualization: {midi_path} ({len(roll)} notes)")
 
-        # Generate piano roll
-        piano_roll = midi_data.get_piano_roll(fs=100)
-        plt.figure(figsize=(12, 6))
-        plt.imshow(piano_roll, aspect='auto', origin='lower', cmap='viridis')
-        plt.title(f"Piano Roll of {base}")
-        plt.xlabel("Time (ticks)")
-        plt.ylabel("Pitch")
-        plt.colorbar(label='Velocity')
-        plt.savefig(output_path)
-        plt.close()
+        # Draw piano roll
+        _renderer().render(roll, output_path, title=f"Piano Roll of {base}")
         logging.info(f"Generated piano-roll visualization: {output_path}")
 
         return {"file": midi_path, "visualization": output_path}
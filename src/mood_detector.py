@@ -5,7 +5,8 @@ Detects the mood of MIDI files based on key and dynamics.
 import os
 import logging
 from typing import Dict
-from music21 import converter
+from midi_cache import load_score
+from analysis_context import lookup
 from plugin_registry import register_plugin
 
 # Configure logging
@@ -42,13 +43,13 @@ def detect_mood(midi_path: str, output_dir: str = "reports/moods", analysis_cont
         os.makedirs(output_dir, exist_ok=True)
 
         # Load MIDI analysis from context
-        midi_analysis = next((r for r in analysis_context.get("analyze_midi", []) if r["file"] == midi_path), None)
+        midi_analysis = lookup(analysis_context, "analyze_midi", midi_path)
         if not midi_analysis or "error" in midi_analysis:
             logging.warning(f"No MIDI analysis available for {midi_path}")
             return {"file": midi_path, "error": "MIDI analysis unavailable"}
 
         # Load MIDI
-        score = converter.parse(midi_path)
+        score = load_score(midi_path)
         logging.info(f"Loaded MIDI for mood detection: {midi_path}")
 
         # Heuristic mood detection
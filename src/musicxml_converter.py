@@ -4,8 +4,8 @@ Converts MIDI files to MusicXML format.
 """
 import os
 import logging
-import music21
 from typing import Dict
+from midi_cache import load_score
 from plugin_registry import register_plugin
 
 # Configure logging
@@ -42,7 +42,7 @@ def musicxml_converter(midi_path: str, output_dir: str = "reports", analysis_con
         output_path = os.path.join(output_dir, f"musicxml_{os.path.basename(midi_path)}.musicxml")
 
         # Convert MIDI to MusicXML
-        stream = music21.converter.parse(midi_path)
+        stream = load_score(midi_path, copy=True)
         stream.write('musicxml', fp=output_path)
 
         logging.info(f"MIDI converted to MusicXML: {output_path}")
@@ -0,0 +1,117 @@
+# src/note_codec.py
+# -*- coding: utf-8 -*-
+"""
+note_codec.py – compact encodings of note columns for API responses
+
+* Notes travel as columns (pitch, start, end, velocity), as
+  drummaroo_service produces them, not as one object per note
+* application/vnd.aimusic.notes: a 12-byte header (magic b"NOTE",
+  version, note count) followed by the columns packed little-endian:
+  pitch uint8[n], velocity uint8[n], start float32[n], end float32[n]
+* application/x-msgpack: a map whose "notes" holds the same column bytes
+  per field (needs the msgpack package)
+* audio/midi: the standard MIDI file itself
+* negotiate() picks the response type from an Accept header; JSON stays
+  the default
+"""
+
+from __future__ import annotations
+import io
+import struct
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+JSON = "application/json"
+PACKED = "application/vnd.aimusic.notes"
+MSGPACK = "application/x-msgpack"
+MIDI = "audio/midi"
+
+MAGIC = b"NOTE"
+VERSION = 1
+_HEADER = struct.Struct("<4sII")   # magic, version, count
+
+# packed order and dtype of each column
+COLUMNS = (("pitch", "<u1"), ("velocity", "<u1"), ("start", "<f4"), ("end", "<f4"))
+
+def negotiate(accept: Optional[str], offered: Sequence[str]) -> Optional[str]:
+    """
+    Best of `offered` for an Accept header; None when nothing offered is
+    acceptable. Each type takes the q of its most specific matching range
+    (type/subtype over type/* over */*), so "application/json;q=0, */*"
+    excludes JSON; ties go to the order in `offered`. A missing header
+    means the first offered type.
+    """
+    if not accept:
+        return offered[0]
+    ranges: Dict[str, float] = {}
+    for part in accept.split(","):
+        fields = [f.strip() for f in part.split(";")]
+        q = 1.0
+        for param in fields[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        ranges.setdefault(fields[0].lower(), q)
+    best, best_q = None, 0.0
+    for candidate in offered:
+        for media in (candidate, candidate.split("/")[0] + "/*", "*/*"):
+            if media in ranges:
+                if ranges[media] > best_q:
+                    best, best_q = candidate, ranges[media]
+                break
+    return best
+
+def pack_notes(notes: Dict[str, np.ndarray]) -> bytes:
+    """Note columns → header + packed little-endian columns."""
+    count = len(notes["pitch"])
+    parts = [_HEADER.pack(MAGIC, VERSION, count)]
+    parts += [np.ascontiguousarray(notes[name], dtype=dtype).tobytes() for name, dtype in COLUMNS]
+    return b"".join(parts)
+
+def unpack_notes(data: bytes) -> Dict[str, np.ndarray]:
+    """Inverse of pack_notes(); the arrays are read-only views of `data`."""
+    magic, version, count = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Not a packed note stream (magic {magic!r}, version {version})")
+    out, offset = {}, _HEADER.size
+    for name, dtype in COLUMNS:
+        out[name] = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+        offset += count * np.dtype(dtype).itemsize
+    return out
+
+def to_msgpack(notes: Dict[str, np.ndarray], **fields: Any) -> bytes:
+    """{"count", "dtypes", "notes": {column: bytes}, **fields} as msgpack."""
+    import msgpack
+
+    return msgpack.packb({
+        **fields,
+        "count": len(notes["pitch"]),
+        "dtypes": dict(COLUMNS),
+        "notes": {name: np.ascontiguousarray(notes[name], dtype=dtype).tobytes() for name, dtype in COLUMNS},
+    }, use_bin_type=True)
+
+def from_msgpack(data: bytes) -> Dict[str, Any]:
+    """Inverse of to_msgpack(), with the columns as NumPy arrays."""
+    import msgpack
+
+    msg = msgpack.unpackb(data, raw=False)
+    msg["notes"] = {name: np.frombuffer(msg["notes"][name], dtype=dtype) for name, dtype in msg["dtypes"].items()}
+    return msg
+
+def msgpack_available() -> bool:
+    try:
+        import msgpack  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def to_midi(notes: Dict[str, np.ndarray], tempo: float = 120.0) -> bytes:
+    """Note columns as the bytes of a one-track drum MIDI file."""
+    from drummaroo_service import write_midi
+
+    buf = io.BytesIO()
+    write_midi(notes, buf, tempo=tempo)
+    return buf.getvalue()
@@ -0,0 +1,171 @@
+# src/piano_roll.py
+# -*- coding: utf-8 -*-
+"""
+piano_roll.py – compact piano rolls and sparse piano-roll rendering
+
+* PianoRoll keeps notes in CSR layout by pitch: indptr[p]:indptr[p + 1]
+  slices the (start, end, velocity, track) columns of pitch p, sorted by
+  start. Velocities are uint8, times float32 seconds, so a roll costs
+  about 11 bytes per note however long the file is
+* to_dense() materialises a uint8 128 × frames window only when a caller
+  really wants a matrix; frames() yields active-pitch tuples per step,
+  the event format of magenta's PianorollSequence
+* load_piano_roll() shares one roll per file per run through midi_cache
+* PianoRollRenderer draws note rectangles straight from the roll with a
+  single PolyCollection on a reused Figure / Agg canvas (no pyplot)
+"""
+
+from __future__ import annotations
+import os
+import threading
+from typing import Any, Iterator, Optional, Tuple
+
+import numpy as np
+
+N_PITCHES = 128
+
+class PianoRoll:
+    """Read-only CSR piano roll of one MIDI file (drum tracks included)."""
+
+    __slots__ = ("indptr", "start", "end", "velocity", "track", "duration")
+
+    def __init__(self, indptr: np.ndarray, start: np.ndarray, end: np.ndarray,
+                 velocity: np.ndarray, track: np.ndarray, duration: float):
+        self.indptr = indptr
+        self.start = start
+        self.end = end
+        self.velocity = velocity
+        self.track = track
+        self.duration = duration
+
+    @classmethod
+    def from_notes(cls, pitch, start, end, velocity, track=None,
+                   duration: Optional[float] = None) -> "PianoRoll":
+        pitch = np.asarray(pitch, dtype=np.uint8)
+        start = np.asarray(start, dtype=np.float32)
+        end = np.asarray(end, dtype=np.float32)
+        velocity = np.asarray(velocity, dtype=np.uint8)
+        track = np.zeros(len(pitch), np.uint8) if track is None else np.asarray(track, dtype=np.uint8)
+        order = np.lexsort((start, pitch))
+        counts = np.bincount(pitch, minlength=N_PITCHES)
+        indptr = np.zeros(N_PITCHES + 1, dtype=np.int32)
+        np.cumsum(counts, out=indptr[1:])
+        if duration is None:
+            duration = float(end.max()) if len(end) else 0.0
+        return cls(indptr, start[order], end[order], velocity[order], track[order], duration)
+
+    @classmethod
+    def from_pretty_midi(cls, pm: Any) -> "PianoRoll":
+        cols = [[], [], [], [], []]
+        for t, inst in enumerate(pm.instruments):
+            for n in inst.notes:
+                cols[0].append(n.pitch)
+                cols[1].append(n.start)
+                cols[2].append(n.end)
+                cols[3].append(n.velocity)
+                cols[4].append(t)
+        return cls.from_notes(*cols, duration=float(pm.get_end_time()))
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, a).nbytes for a in ("indptr", "start", "end", "velocity", "track"))
+
+    @property
+    def pitch(self) -> np.ndarray:
+        """Pitch of every note, in storage order."""
+        return np.repeat(np.arange(N_PITCHES, dtype=np.uint8), np.diff(self.indptr))
+
+    def notes(self, pitch: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(start, end, velocity) of every note of one pitch."""
+        a, b = self.indptr[pitch], self.indptr[pitch + 1]
+        return self.start[a:b], self.end[a:b], self.velocity[a:b]
+
+    def onsets(self, track: Optional[int] = None) -> np.ndarray:
+        """Sorted note-on times, of one track or of all of them."""
+        starts = self.start if track is None else self.start[self.track == track]
+        return np.sort(starts)
+
+    def to_dense(self, fs: float = 100, t0: float = 0.0, t1: Optional[float] = None) -> np.ndarray:
+        """
+        uint8 velocity matrix (128 × frames) of [t0, t1) sampled at `fs`,
+        the same layout as pretty_midi's get_piano_roll(). Overlapping
+        notes of one pitch keep the louder velocity.
+        """
+        t1 = self.duration if t1 is None else t1
+        n_frames = max(int(np.ceil((t1 - t0) * fs)), 0)
+        roll = np.zeros((N_PITCHES, n_frames), dtype=np.uint8)
+        if not n_frames or not len(self):
+            return roll
+        a = np.clip(np.round((self.start - t0) * fs).astype(np.int64), 0, n_frames)
+        b = np.clip(np.round((self.end - t0) * fs).astype(np.int64), 0, n_frames)
+        pitch = self.pitch
+        for i in np.nonzero(b > a)[0]:
+            row = roll[pitch[i], a[i]:b[i]]
+            np.maximum(row, self.velocity[i], out=row)
+        return roll
+
+    def frames(self, steps_per_second: float, t0: float = 0.0,
+               t1: Optional[float] = None) -> Iterator[Tuple[int, ...]]:
+        """Active pitches per step, as PianorollSequence stores its events."""
+        active = self.to_dense(steps_per_second, t0, t1) > 0
+        for col in active.T:
+            yield tuple(int(p) for p in np.flatnonzero(col))
+
+def load_piano_roll(path: str) -> PianoRoll:
+    """Shared PianoRoll for `path`, built from the run's cached PrettyMIDI."""
+    import midi_cache
+    return midi_cache.load_piano_roll(path)
+
+# ─── Rendering ────────────────────────────────────────────────────────────────
+class PianoRollRenderer:
+    """
+    Reusable piano-roll renderer: note rectangles coloured by velocity on
+    one Figure / Agg canvas, cleared and redrawn per file.
+    """
+
+    def __init__(self, width_px: int = 1200, height_px: int = 600, dpi: int = 100,
+                 cmap: str = "viridis"):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.cmap = cmap
+        self.figure = Figure(figsize=(width_px / dpi, height_px / dpi), dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self._lock = threading.Lock()
+
+    def render(self, roll: PianoRoll, out_path: str, title: Optional[str] = None) -> str:
+        from matplotlib.collections import PolyCollection
+        from matplotlib.colors import Normalize
+
+        pitch = roll.pitch.astype(np.float32)
+        x0, x1 = roll.start, roll.end
+        y0, y1 = pitch - 0.4, pitch + 0.4
+        verts = np.stack([np.stack([x0, y0], 1), np.stack([x0, y1], 1),
+                          np.stack([x1, y1], 1), np.stack([x1, y0], 1)], axis=1)
+        with self._lock:
+            self.figure.clear()
+            ax = self.figure.add_subplot(111)
+            rects = PolyCollection(verts, array=roll.velocity.astype(np.float32), cmap=self.cmap,
+                                   norm=Normalize(0, 127), linewidths=0)
+            ax.add_collection(rects)
+            ax.set_xlim(0.0, roll.duration or 1.0)
+            if len(roll):
+                lo, hi = int(pitch.min()), int(pitch.max())
+                ax.set_ylim(lo - 2, hi + 2)
+            else:
+                ax.set_ylim(0, N_PITCHES)
+            ax.set_title(title or "Piano Roll")
+            ax.set_xlabel("Time (s)")
+            ax.set_ylabel("Pitch")
+            self.figure.colorbar(rects, ax=ax, label="Velocity")
+            self.figure.savefig(out_path)
+        return out_path
+
+def render_midi(midi_path: str, out_path: str, renderer: Optional[PianoRollRenderer] = None) -> str:
+    """Draw `midi_path` as a piano roll PNG without a dense matrix."""
+    renderer = renderer or PianoRollRenderer()
+    base = os.path.splitext(os.path.basename(midi_path))[0]
+    return renderer.render(load_piano_roll(midi_path), out_path, title=f"Piano Roll of {base}")
@@ -0,0 +1,127 @@
+# src/plugin_manifest.py
+# -*- coding: utf-8 -*-
+"""
+plugin_manifest.py – static plugin discovery
+
+* Reads @register_plugin(...) decorators with ast instead of importing
+  the module, so listing and scheduling plugins does not pull in torch,
+  transformers, music21 or matplotlib
+* Cached in <project>/cache/plugin_manifest.json (next to src/, not the
+  working directory); a module is re-parsed only when
+  its mtime or size changes
+* Modules whose decorator arguments are not literals are marked
+  "dynamic" and must be imported to learn their plugins
+"""
+
+from __future__ import annotations
+import ast
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("main")
+
+MANIFEST_VERSION = 3
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            "cache", "plugin_manifest.json")
+
+# register_plugin defaults, applied to arguments the decorator leaves out
+DEFAULTS = {"phase": 1, "requires": [], "description": "", "version": "1",
+            "batch": False, "max_batch_size": 0, "result_schema": None}
+
+# modules never scanned: the orchestrator and the registry itself
+SKIP = {"main", "plugin_registry", "plugin_manifest"}
+
+def scan_source(source: str, filename: str = "<src>") -> Dict[str, Any]:
+    """
+    Plugins declared in one module's source.
+
+    :return: {"plugins": [entry, ...], "dynamic": bool}; each entry holds
+             the register_plugin arguments plus "function", the decorated
+             function's name.
+    """
+    tree = ast.parse(source, filename=filename)
+    plugins: List[Dict[str, Any]] = []
+    seen = set()
+    for node in tree.body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        for deco in node.decorator_list:
+            if not (isinstance(deco, ast.Call) and _is_register(deco.func)):
+                continue
+            seen.add(id(deco))
+            try:
+                kwargs = {kw.arg: ast.literal_eval(kw.value) for kw in deco.keywords}
+            except ValueError:
+                return {"plugins": [], "dynamic": True}
+            if deco.args or None in kwargs or "name" not in kwargs:
+                return {"plugins": [], "dynamic": True}
+            plugins.append({**DEFAULTS, **kwargs, "function": node.name})
+
+    # register_plugin(...) used anywhere else (nested, applied by hand)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and _is_register(node.func) and id(node) not in seen:
+            return {"plugins": [], "dynamic": True}
+    return {"plugins": plugins, "dynamic": False}
+
+def _is_register(func: ast.expr) -> bool:
+    if isinstance(func, ast.Name):
+        return func.id == "register_plugin"
+    return isinstance(func, ast.Attribute) and func.attr == "register_plugin"
+
+def build(src_dir: str, path: Optional[str] = DEFAULT_PATH) -> Dict[str, Dict[str, Any]]:
+    """
+    Manifest of every module in `src_dir`, keyed by module name, in
+    module-name order. Reuses `path` for unchanged modules and rewrites
+    it when anything changed; pass path=None to skip the on-disk cache.
+    """
+    cached = _load(path) if path else {}
+    modules: Dict[str, Dict[str, Any]] = {}
+    changed = False
+    for fname in sorted(os.listdir(src_dir)):
+        mod, ext = os.path.splitext(fname)
+        if ext != ".py" or mod.startswith("_") or mod in SKIP or not mod.isidentifier():
+            continue
+        full = os.path.join(src_dir, fname)
+        st = os.stat(full)
+        stamp = [st.st_mtime_ns, st.st_size]
+        entry = cached.get(mod)
+        if entry is None or entry.get("stamp") != stamp:
+            entry = {"stamp": stamp, **_scan_file(full)}
+            changed = True
+        modules[mod] = entry
+    if path and (changed or set(modules) != set(cached)):
+        _save(path, modules)
+    return modules
+
+def _scan_file(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            source = f.read()
+        if "register_plugin" not in source:
+            return {"plugins": [], "dynamic": False}
+        return scan_source(source, filename=path)
+    except (SyntaxError, UnicodeDecodeError) as exc:
+        return {"plugins": [], "dynamic": False, "error": str(exc)}
+
+def _load(path: str) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("modules", {})
+
+def _save(path: str, modules: Dict[str, Dict[str, Any]]) -> None:
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "modules": modules}, f, indent=1)
+        os.replace(tmp, path)
+    except OSError as exc:
+        logger.debug(f"Could not write plugin manifest {path}: {exc}")
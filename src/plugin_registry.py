@@ -4,17 +4,71 @@ import os
 import sys
 import pkgutil
 import importlib
-from typing import Callable, Dict, List, Any
+import inspect
+import logging
+import threading
+from typing import Callable, Dict, List, Any, Optional
+
+logger = logging.getLogger("main")
 
 # ─── Global registry ──────────────────────────────────────────────────────────
 PLUGINS: List[Dict[str, Any]] = []
 
+class LazyPlugin:
+    """
+    Stand-in for a plugin function whose module has not been imported yet.
+
+    The module is imported on the first call (or signature lookup); until
+    then the registry entry comes from the static manifest. Pickles by
+    module and function name, so worker processes import it themselves.
+    """
+
+    def __init__(self, module: str, function: str):
+        self.__module__ = module
+        self.__name__ = self.__qualname__ = function
+        self._fn: Optional[Callable] = None
+        self._error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+
+    def resolve(self) -> Callable:
+        if self._fn is None:
+            with self._lock:
+                if self._error is not None:
+                    raise self._error
+                if self._fn is None:
+                    try:
+                        mod = importlib.import_module(self.__module__)
+                        self._fn = getattr(mod, self.__name__)
+                    except Exception as exc:
+                        self._error = exc
+                        raise
+        return self._fn
+
+    @property
+    def __signature__(self) -> inspect.Signature:
+        return inspect.signature(self.resolve())
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __reduce__(self):
+        return (LazyPlugin, (self.__module__, self.__name__))
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._fn is not None else "not loaded"
+        return f"<LazyPlugin {self.__module__}.{self.__name__} ({state})>"
+
 def register_plugin(
     *,
     name: str,
     input_type: str,
     phase: int = 1,
-    requires: List[str] = None
+    requires: List[str] = None,
+    description: str = "",
+    version: str = "1",
+    batch: bool = False,
+    max_batch_size: int = 0,
+    result_schema: Optional[Dict[str, str]] = None
 ) -> Callable[[Callable], Callable]:
     """
     Decorator to register a plugin.
@@ -22,22 +76,106 @@ def register_plugin(
     :param name: Unique plugin name.
     :param input_type: Type of input this plugin consumes.
     :param phase: Execution phase (lower runs earlier).
-    :param requires: List of other plugin names this one depends on.
+    :param requires: List of other plugin names this one depends on;
+                     the scheduler runs this plugin after all of them.
+    :param description: Short human-readable summary.
+    :param version: Bump whenever the plugin's output changes, so results
+                    cached by earlier runs are not reused.
+    :param batch: The plugin takes a list of paths and returns one result
+                  per path, so per-call setup is paid once per batch.
+    :param max_batch_size: Most paths handed to a batch plugin at once
+                           (0: no limit).
+    :param result_schema: Types of the plugin's result fields, e.g.
+                          {"tempo": "float", "key": "str?"} (see
+                          plugin_result.FIELD_TYPES; "?" marks optional).
     """
     requires = requires or []
+    _validate_schema(result_schema, name)
 
     def decorator(fn: Callable) -> Callable:
-        PLUGINS.append({
+        entry = {
             "name": name,
             "input_type": input_type,
             "phase": phase,
             "requires": requires,
+            "description": description,
+            "version": version,
+            "batch": batch,
+            "max_batch_size": max_batch_size,
+            "result_schema": result_schema,
             "func": fn
-        })
+        }
+        # importing a discovered module fills in its lazy entry in place
+        existing = _find(fn.__module__, fn.__name__)
+        if existing is not None and isinstance(existing["func"], LazyPlugin):
+            existing.update(entry)
+        else:
+            PLUGINS.append(entry)
         return fn
 
     return decorator
 
+def _validate_schema(schema: Optional[Dict[str, str]], name: str) -> Optional[Dict[str, str]]:
+    if schema is None:
+        return None
+    try:
+        from plugin_result import validate_schema
+    except ImportError:  # imported as src.plugin_registry
+        from src.plugin_result import validate_schema
+    return validate_schema(schema, name)
+
+def _find(module: str, function: str) -> Optional[Dict[str, Any]]:
+    for p in PLUGINS:
+        func = p["func"]
+        if getattr(func, "__module__", None) == module and getattr(func, "__name__", None) == function:
+            return p
+    return None
+
+def discover(src_dir: Optional[str] = None, manifest_path: Optional[str] = None) -> None:
+    """
+    Register every plugin under `src_dir` from the static manifest,
+    without importing the modules; each is imported on first use.
+    Modules the manifest cannot read statically are imported now.
+
+    :param src_dir: Directory of plugin modules (default: this file's directory).
+    :param manifest_path: Manifest cache file (default: plugin_manifest.DEFAULT_PATH).
+    """
+    try:
+        from . import plugin_manifest   # imported as src.plugin_registry
+    except ImportError:
+        import plugin_manifest          # src/ on sys.path, as main.py runs it
+
+    src_dir = src_dir or os.path.dirname(os.path.abspath(__file__))
+    if src_dir not in sys.path:
+        sys.path.insert(0, src_dir)
+    modules = plugin_manifest.build(src_dir, manifest_path or plugin_manifest.DEFAULT_PATH)
+    for mod, info in modules.items():
+        if info.get("error"):
+            logger.warning(f"⚠️  Skipped module {mod}: {info['error']}")
+            continue
+        if info.get("dynamic"):
+            if mod not in sys.modules:
+                try:
+                    importlib.import_module(mod)
+                except Exception as exc:
+                    logger.warning(f"⚠️  Skipped module {mod}: {exc}")
+            continue
+        for meta in info["plugins"]:
+            if _find(mod, meta["function"]) is not None:
+                continue
+            PLUGINS.append({
+                "name": meta["name"],
+                "input_type": meta["input_type"],
+                "phase": meta["phase"],
+                "requires": list(meta["requires"] or []),
+                "description": meta["description"],
+                "version": meta["version"],
+                "batch": meta["batch"],
+                "max_batch_size": meta["max_batch_size"],
+                "result_schema": _validate_schema(meta.get("result_schema"), meta["name"]),
+                "func": LazyPlugin(mod, meta["function"])
+            })
+
 def import_all(src_dir: str = "src") -> None:
     """
     Dynamically import every module under the given directory
@@ -71,7 +209,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Plugin registry CLI")
     parser.add_argument(
         "--list", action="store_true",
-        help="List all registered plugins after auto-import."
+        help="List all registered plugins (read from the manifest, no imports)."
     )
     parser.add_argument(
         "src_dir", nargs="?", default="src",
@@ -79,7 +217,7 @@ if __name__ == "__main__":
     )
     args = parser.parse_args()
 
-    import_all(args.src_dir)
+    discover(os.path.abspath(args.src_dir))
 
     if args.list:
         if not PLUGINS:
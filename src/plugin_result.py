@@ -0,0 +1,134 @@
+# src/plugin_result.py
+# -*- coding: utf-8 -*-
+"""
+plugin_result.py – typed plugin results
+
+* Plugins keep returning plain dicts; the pipeline wraps each one once in
+  a slotted PluginResult with canonical status / file / error fields:
+  "input_file" and "input" are accepted as the file, a missing status
+  is derived from the presence of "error"
+* register_plugin(result_schema={"tempo": "float", ...}) declares the
+  type of a plugin's result fields. The schema is checked once at
+  registration; per result only the declared fields are checked, and
+  NumPy scalars / arrays in them become plain floats, ints and lists
+  (json's default=str used to turn them into strings)
+* The JSON encoding is produced once (orjson when installed, json
+  otherwise) and reused by the report writer, so merging a result does
+  not re-walk or copy it
+"""
+
+from __future__ import annotations
+import json
+from typing import Any, Dict, Optional
+
+# schema type names → accepted Python types
+FIELD_TYPES: Dict[str, tuple] = {
+    "float": (float, int),
+    "int": (int,),
+    "str": (str,),
+    "bool": (bool,),
+    "list": (list, tuple),
+    "dict": (dict,),
+    "any": (object,),
+}
+
+# keys every result may carry besides its schema fields
+RESERVED_KEYS = ("status", "file", "input_file", "input", "error", "plugin_name")
+
+class SchemaError(TypeError):
+    pass
+
+def validate_schema(schema: Optional[Dict[str, str]], plugin: str = "") -> Optional[Dict[str, str]]:
+    """Check a result_schema at registration time; returns it unchanged."""
+    if schema is None:
+        return None
+    if not isinstance(schema, dict):
+        raise SchemaError(f"{plugin}: result_schema must be a dict of field → type name")
+    for field, type_name in schema.items():
+        if not isinstance(field, str) or field in RESERVED_KEYS:
+            raise SchemaError(f"{plugin}: invalid result field {field!r}")
+        name = type_name[:-1] if isinstance(type_name, str) and type_name.endswith("?") else type_name
+        if name not in FIELD_TYPES:
+            raise SchemaError(f"{plugin}: unknown type {type_name!r} for field {field!r} "
+                              f"(expected one of {sorted(FIELD_TYPES)}, '?' for optional)")
+    return schema
+
+class PluginResult:
+    """
+    One plugin's result for one input. `data` is the plugin's own dict,
+    normalised in place (status, file, plugin_name set), not a copy.
+    """
+
+    __slots__ = ("plugin", "file", "status", "error", "data", "_encoded")
+
+    def __init__(self, plugin: str, file: str, status: str, error: Optional[str],
+                 data: Dict[str, Any]):
+        self.plugin = plugin
+        self.file = file
+        self.status = status
+        self.error = error
+        self.data = data
+        self._encoded: Optional[bytes] = None
+
+    @classmethod
+    def from_raw(cls, raw: Any, plugin: str, file: str,
+                 schema: Optional[Dict[str, str]] = None) -> "PluginResult":
+        if not isinstance(raw, dict):
+            raw = {"status": "error", "error": f"Plugin returned {type(raw).__name__}, not a dict"}
+        error = raw.get("error")
+        status = raw.get("status") or ("error" if error is not None else "success")
+        if status == "success" and schema:
+            problem = _check(raw, schema)
+            if problem:
+                status, error = "error", f"Result does not match schema: {problem}"
+                raw["error"] = error
+        raw["status"] = status
+        raw["plugin_name"] = plugin
+        if "file" not in raw:
+            raw["file"] = raw.get("input_file") or raw.get("input") or file
+        return cls(plugin, raw["file"], status, None if error is None else str(error), raw)
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "success"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.data
+
+    def to_json(self) -> bytes:
+        """UTF-8 JSON of the result, encoded on first use and then reused."""
+        if self._encoded is None:
+            self._encoded = dumps(self.data)
+        return self._encoded
+
+def _check(raw: Dict[str, Any], schema: Dict[str, str]) -> Optional[str]:
+    for field, type_name in schema.items():
+        optional = type_name.endswith("?")
+        if field not in raw or raw[field] is None:
+            if optional:
+                continue
+            return f"missing field {field!r}"
+        value = raw[field] = _plain(raw[field])
+        base = type_name.rstrip("?")
+        if not isinstance(value, FIELD_TYPES[base]) or (isinstance(value, bool) and base in ("int", "float")):
+            return f"field {field!r} is {type(value).__name__}, expected {base}"
+    return None
+
+def _plain(value: Any) -> Any:
+    """NumPy scalars / arrays → Python numbers / lists; anything else unchanged."""
+    tolist = getattr(value, "tolist", None)
+    if tolist is not None and type(value).__module__ == "numpy":
+        return tolist()
+    return value
+
+def dumps(obj: Any) -> bytes:
+    try:
+        import orjson
+    except ImportError:
+        return json.dumps(obj, default=_default, ensure_ascii=False).encode("utf-8")
+    return orjson.dumps(obj, default=_default,
+                        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+def _default(value: Any) -> Any:
+    plain = _plain(value)
+    return plain if plain is not value else str(value)
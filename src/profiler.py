@@ -0,0 +1,239 @@
+# src/profiler.py
+# -*- coding: utf-8 -*-
+"""
+profiler.py – per-plugin, per-file run instrumentation
+
+* measure() records wall time, CPU time, peak-RSS growth and bytes
+  read/written around one plugin call
+* RunProfile collects the samples of a run and writes profile.json
+  (per-plugin totals, files/sec, per-file samples) and profile.trace.json
+  (Chrome trace format; open in chrome://tracing or Perfetto)
+* METRICS keeps cumulative per-plugin counters for the lifetime of the
+  process and renders them in Prometheus text format (api_server /metrics)
+"""
+
+from __future__ import annotations
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_VERSION = 1
+
+# ─── Raw counters ─────────────────────────────────────────────────────────────
+def _max_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # bytes on macOS
+
+def _io_bytes() -> Optional[tuple]:
+    """(read, written) by this thread on Linux, else by the process via psutil."""
+    try:
+        with open(f"/proc/self/task/{threading.get_native_id()}/io", "rb") as f:
+            fields = dict(line.split(b": ") for line in f.read().splitlines())
+        return int(fields[b"rchar"]), int(fields[b"wchar"])
+    except (OSError, KeyError, ValueError):
+        pass
+    try:
+        import psutil
+        io = psutil.Process().io_counters()
+        return io.read_bytes, io.write_bytes
+    except Exception:
+        return None
+
+@contextmanager
+def measure() -> Iterator[Dict[str, Any]]:
+    """
+    Time the body of the with-block; the yielded dict is filled in on exit.
+
+    Keys: start (epoch s), wall_s, cpu_s, rss_delta_kb, read_bytes,
+    write_bytes, pid, tid. Counters the platform cannot provide are None.
+    CPU time is the calling thread's, so concurrent plugins do not
+    inflate each other.
+    """
+    sample: Dict[str, Any] = {}
+    rss0, io0 = _max_rss_kb(), _io_bytes()
+    start, t0, c0 = time.time(), time.perf_counter(), time.thread_time()
+    try:
+        yield sample
+    finally:
+        wall, cpu = time.perf_counter() - t0, time.thread_time() - c0
+        rss1, io1 = _max_rss_kb(), _io_bytes()
+        sample.update({
+            "start": start,
+            "wall_s": wall,
+            "cpu_s": cpu,
+            "rss_delta_kb": None if rss0 is None else rss1 - rss0,
+            "read_bytes": None if io0 is None or io1 is None else io1[0] - io0[0],
+            "write_bytes": None if io0 is None or io1 is None else io1[1] - io0[1],
+            "pid": os.getpid(),
+            "tid": threading.get_native_id(),
+        })
+
+# ─── Cumulative process metrics ───────────────────────────────────────────────
+class Metrics:
+    """Per-plugin counters summed over every sample seen by this process."""
+
+    FIELDS = ("calls", "errors", "cached", "wall_s", "cpu_s", "read_bytes", "write_bytes")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._plugins: Dict[str, Dict[str, float]] = {}
+
+    def observe(self, plugin: str, sample: Optional[Dict[str, Any]] = None,
+                error: bool = False, cached: bool = False,
+                files: int = 1, errors: Optional[int] = None) -> None:
+        """Count one measured call covering `files` inputs (a batch when > 1)."""
+        with self._lock:
+            c = self._plugins.setdefault(plugin, dict.fromkeys(self.FIELDS, 0))
+            if cached:
+                c["cached"] += 1
+                return
+            c["calls"] += files
+            c["errors"] += int(error) if errors is None else errors
+            for k in ("wall_s", "cpu_s", "read_bytes", "write_bytes"):
+                c[k] += (sample or {}).get(k) or 0
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: dict(c) for name, c in self._plugins.items()}
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        series = [
+            ("calls", "plugin_calls_total", "counter", "Plugin invocations"),
+            ("errors", "plugin_errors_total", "counter", "Plugin invocations that failed"),
+            ("cached", "plugin_cache_hits_total", "counter", "Results served from the result cache"),
+            ("wall_s", "plugin_wall_seconds_total", "counter", "Wall-clock time spent in plugins"),
+            ("cpu_s", "plugin_cpu_seconds_total", "counter", "CPU time spent in plugins"),
+            ("read_bytes", "plugin_read_bytes_total", "counter", "Bytes read by plugins"),
+            ("write_bytes", "plugin_written_bytes_total", "counter", "Bytes written by plugins"),
+        ]
+        snap = self.snapshot()
+        lines: List[str] = []
+        for key, metric, kind, help_text in series:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for name in sorted(snap):
+                label = name.replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'{metric}{{plugin="{label}"}} {_sample_value(snap[name][key])}')
+        return "\n".join(lines) + "\n"
+
+def _sample_value(value: float) -> str:
+    """Exact sample text: integers as digits, floats round-trip (no 6-digit :g rounding)."""
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+METRICS = Metrics()
+
+# ─── One run ──────────────────────────────────────────────────────────────────
+class RunProfile:
+    """Samples of one pipeline run, exported as JSON and as a Chrome trace."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: List[Dict[str, Any]] = []
+        self.cached: Dict[str, int] = {}
+        self.started = time.time()
+        self.finished: Optional[float] = None
+
+    def add(self, plugin: str, file: str, sample: Dict[str, Any], status: str) -> None:
+        with self._lock:
+            self.samples.append({"plugin": plugin, "file": file, "status": status, **sample})
+        METRICS.observe(plugin, sample, error=status != "success")
+
+    def add_batch(self, plugin: str, files: List[str], sample: Dict[str, Any], errors: int) -> None:
+        """One measured call that processed several files."""
+        with self._lock:
+            self.samples.append({"plugin": plugin, "file": files[0], "files": list(files),
+                                 "batch_size": len(files), "errors": errors,
+                                 "status": "success" if not errors else "error", **sample})
+        METRICS.observe(plugin, sample, files=len(files), errors=errors)
+
+    def add_cached(self, plugin: str, count: int) -> None:
+        with self._lock:
+            self.cached[plugin] = self.cached.get(plugin, 0) + count
+        for _ in range(count):
+            METRICS.observe(plugin, cached=True)
+
+    def finish(self) -> None:
+        self.finished = time.time()
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Per-plugin totals; files_per_s is files over the plugin's first-start
+        to last-end span, so parallel workers raise it."""
+        out: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            samples, cached = list(self.samples), dict(self.cached)
+        for s in samples:
+            p = out.setdefault(s["plugin"], {
+                "files": 0, "errors": 0, "cached": cached.get(s["plugin"], 0),
+                "wall_s": 0.0, "cpu_s": 0.0, "max_rss_delta_kb": None,
+                "read_bytes": 0, "write_bytes": 0, "_first": s["start"], "_last": 0.0,
+            })
+            p["files"] += s.get("batch_size", 1)
+            p["errors"] += s.get("errors", int(s["status"] != "success"))
+            p["wall_s"] += s["wall_s"]
+            p["cpu_s"] += s["cpu_s"]
+            if s["rss_delta_kb"] is not None:
+                p["max_rss_delta_kb"] = max(p["max_rss_delta_kb"] or 0, s["rss_delta_kb"])
+            p["read_bytes"] += s["read_bytes"] or 0
+            p["write_bytes"] += s["write_bytes"] or 0
+            p["_first"] = min(p["_first"], s["start"])
+            p["_last"] = max(p["_last"], s["start"] + s["wall_s"])
+        for name, n in cached.items():
+            out.setdefault(name, {"files": 0, "errors": 0, "cached": n, "wall_s": 0.0,
+                                  "cpu_s": 0.0, "max_rss_delta_kb": None,
+                                  "read_bytes": 0, "write_bytes": 0})
+        for p in out.values():
+            span = p.pop("_last", 0.0) - p.pop("_first", 0.0)
+            p["files_per_s"] = p["files"] / span if span > 0 else None
+        return dict(sorted(out.items(), key=lambda kv: -kv[1]["wall_s"]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.finished or time.time()
+        return {
+            "version": PROFILE_VERSION,
+            "started": self.started,
+            "wall_s": end - self.started,
+            "plugins": self.summary(),
+            "samples": list(self.samples),
+        }
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Trace Event Format: one complete ("X") event per plugin call."""
+        events = []
+        for s in self.samples:
+            events.append({
+                "name": s["plugin"],
+                "cat": "plugin",
+                "ph": "X",
+                "ts": int((s["start"] - self.started) * 1e6),
+                "dur": int(s["wall_s"] * 1e6),
+                "pid": s["pid"],
+                "tid": s["tid"],
+                "args": {k: s[k] for k in ("file", "batch_size", "status", "cpu_s",
+                                           "rss_delta_kb", "read_bytes", "write_bytes")
+                         if k in s},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self, out_dir: str) -> Dict[str, str]:
+        """Write profile.json and profile.trace.json; returns their paths."""
+        paths = {"profile": os.path.join(out_dir, "profile.json"),
+                 "trace": os.path.join(out_dir, "profile.trace.json")}
+        with open(paths["profile"], "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+        with open(paths["trace"], "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f, default=str)
+        return paths
@@ -0,0 +1,151 @@
+# src/report_sink.py
+# -*- coding: utf-8 -*-
+"""
+report_sink.py – streaming master report
+
+* ReportSink appends one JSON line per result as soon as it is merged,
+  so the pipeline never holds or re-serialises the whole report
+* On close it writes <name>.index.json mapping plugin and file names to
+  byte offsets in the .jsonl file
+* With atomic=True the report and index are written to temp files and
+  renamed over the targets on close, so the sink may replace the very
+  report it is being fed from
+* ReportReader uses that index to seek straight to one plugin's or one
+  file's records without parsing the rest
+"""
+
+from __future__ import annotations
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+INDEX_VERSION = 1
+
+def index_path_for(jsonl_path: str) -> str:
+    return os.path.splitext(jsonl_path)[0] + ".index.json"
+
+class ReportSink:
+    """Append-only JSON Lines writer with a (plugin, file) → offset index."""
+
+    def __init__(self, path: str, atomic: bool = False):
+        self.path = path
+        self.index_path = index_path_for(path)
+        self.atomic = atomic
+        self._write_path = f"{path}.tmp" if atomic else path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._f = open(self._write_path, "wb")
+        self._plugins: Dict[str, List[Tuple[int, int]]] = {}
+        self._files: Dict[str, List[Tuple[int, int]]] = {}
+        self.count = 0
+
+    def write(self, record: Dict[str, Any], plugin: Optional[str] = None,
+              file: Optional[str] = None) -> None:
+        line = json.dumps(record, default=str, ensure_ascii=False).encode("utf-8")
+        plugin = plugin or record.get("plugin_name", "unknown")
+        file = file or record.get("file") or record.get("input_file")
+        self.write_encoded(line, plugin, file)
+
+    def write_encoded(self, line: bytes, plugin: str, file: Optional[str] = None) -> None:
+        """Append one record already encoded as a single line of UTF-8 JSON."""
+        span = (self._f.tell(), len(line) + 1)
+        self._f.write(line)
+        self._f.write(b"\n")
+        self.count += 1
+        self._plugins.setdefault(plugin, []).append(span)
+        if file:
+            self._files.setdefault(file, []).append(span)
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """Re-read the records written so far, one at a time; records
+        appended after this call are not included."""
+        self._f.flush()
+        return _iter_lines(self._write_path, end=self._f.tell())
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+        self._f.close()
+        index = {
+            "version": INDEX_VERSION,
+            "data": os.path.basename(self.path),
+            "count": self.count,
+            "plugins": self._plugins,
+            "files": self._files,
+        }
+        index_path = f"{self.index_path}.tmp" if self.atomic else self.index_path
+        with open(index_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        if self.atomic:
+            os.replace(self._write_path, self.path)
+            os.replace(index_path, self.index_path)
+
+    def abort(self) -> None:
+        """Close without publishing; an atomic sink leaves the target untouched."""
+        if not self._f.closed:
+            self._f.close()
+        if self.atomic:
+            try:
+                os.remove(self._write_path)
+            except OSError:
+                pass
+
+    def __enter__(self) -> "ReportSink":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is not None and self.atomic:
+            self.abort()
+        else:
+            self.close()
+
+class ReportReader:
+    """Random access to a report written by ReportSink."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(index_path_for(path), "r", encoding="utf-8") as f:
+            self.index = json.load(f)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return _iter_lines(self.path)
+
+    def __len__(self) -> int:
+        return self.index["count"]
+
+    def plugins(self) -> List[str]:
+        return sorted(self.index["plugins"])
+
+    def files(self) -> List[str]:
+        return sorted(self.index["files"])
+
+    def for_plugin(self, plugin: str) -> List[Dict[str, Any]]:
+        return self._read(self.index["plugins"].get(plugin, []))
+
+    def for_file(self, file: str) -> List[Dict[str, Any]]:
+        return self._read(self.index["files"].get(file, []))
+
+    def get(self, plugin: str, file: str) -> Optional[Dict[str, Any]]:
+        """First record of `plugin` for `file`, or None."""
+        spans = set(map(tuple, self.index["files"].get(file, [])))
+        for span in self.index["plugins"].get(plugin, []):
+            if tuple(span) in spans:
+                return self._read([span])[0]
+        return None
+
+    def _read(self, spans: List[List[int]]) -> List[Dict[str, Any]]:
+        out = []
+        with open(self.path, "rb") as f:
+            for offset, length in spans:
+                f.seek(offset)
+                out.append(json.loads(f.read(length)))
+        return out
+
+def _iter_lines(path: str, end: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    with open(path, "rb") as f:
+        for line in f:
+            if end is not None:
+                end -= len(line)
+                if end < 0:
+                    break
+            if line.strip():
+                yield json.loads(line)
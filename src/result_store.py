@@ -0,0 +1,187 @@
+# src/result_store.py
+# -*- coding: utf-8 -*-
+"""
+result_store.py – persistent, content-addressed plugin result cache
+
+* Key: (sha256 of the input file, plugin name, plugin config hash)
+* The config hash covers the plugin's version and defining module, the
+  output directory and the versions of the plugins it requires
+* Layout: <root>/<plugin>/<hash[:2]>/<file hash>-<config hash>.json
+* Stored under <project>/cache/results by default, wherever the run
+  starts from
+* Eviction by age, then least-recently-used until under the size budget
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("main")
+
+# <project>/cache/results, next to src/ rather than the working directory
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            "cache", "results")
+DEFAULT_MAX_MB = 2048
+DEFAULT_MAX_AGE_DAYS = 30
+
+# result keys that point at files the plugin wrote; a hit is only valid
+# while those files still exist
+OUTPUT_KEYS = ("output_file", "output_path", "output_midi", "visualization", "exported")
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def config_hash(plugin: Dict[str, Any], plugins: List[Dict[str, Any]], out_dir: str) -> str:
+    """Hash of everything besides the input bytes that shapes a plugin's result."""
+    versions = {p["name"]: str(p.get("version", "1")) for p in plugins}
+    payload = {
+        "version": str(plugin.get("version", "1")),
+        # two modules may register the same name (classify_midi_roles)
+        "module": getattr(plugin.get("func"), "__module__", None),
+        "out_dir": os.path.abspath(out_dir),
+        "requires": {r: versions.get(r) for r in sorted(plugin.get("requires") or [])},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+
+class ResultStore:
+    """On-disk result cache shared by every run that uses the same root."""
+
+    def __init__(self, root: str = DEFAULT_ROOT,
+                 max_mb: float = DEFAULT_MAX_MB,
+                 max_age_days: float = DEFAULT_MAX_AGE_DAYS):
+        self.root = root
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_age = max_age_days * 86400
+        self._digests: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    # ── lookup / store ────────────────────────────────────────────────────────
+    def digest(self, path: str) -> str:
+        """sha256 of `path`, memoised on (path, mtime, size) for this run."""
+        st = os.stat(path)
+        stamp = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._digests.get(stamp)
+        if cached is None:
+            cached = file_digest(path)
+            with self._lock:
+                self._digests[stamp] = cached
+        return cached
+
+    def remember(self, path: str, digest: str) -> None:
+        """Seed the digest memo for `path`, e.g. with a hash computed while
+        the file was being written, so it is not read again."""
+        st = os.stat(path)
+        with self._lock:
+            self._digests[(os.path.abspath(path), st.st_mtime_ns, st.st_size)] = digest
+
+    def forget(self, path: str) -> None:
+        """Drop memoised digests of `path` (e.g. a temp upload being deleted),
+        so a long-lived process does not accumulate them."""
+        key = os.path.abspath(path)
+        with self._lock:
+            for stamp in [s for s in self._digests if s[0] == key]:
+                del self._digests[stamp]
+
+    def _entry_path(self, digest: str, plugin: str, cfg: str) -> str:
+        return os.path.join(self.root, plugin, digest[:2], f"{digest}-{cfg}.json")
+
+    def get(self, path: str, plugin: str, cfg: str) -> Optional[Dict[str, Any]]:
+        entry = self._entry_path(self.digest(path), plugin, cfg)
+        try:
+            with open(entry, "r", encoding="utf-8") as f:
+                result = json.load(f)["result"]
+        except (OSError, ValueError, KeyError):
+            result = None
+        if result is not None and not _outputs_exist(result):
+            result = None
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if result is not None:
+            os.utime(entry)  # mark as recently used for eviction
+        return result
+
+    def put(self, path: str, plugin: str, cfg: str, result: Dict[str, Any]) -> bool:
+        """Store a successful result; returns False if it is not JSON-serialisable."""
+        digest = self.digest(path)
+        entry = self._entry_path(digest, plugin, cfg)
+        try:
+            data = json.dumps({"plugin": plugin, "file_sha256": digest, "config": cfg,
+                               "created": time.time(), "result": result})
+        except (TypeError, ValueError):
+            logger.debug(f"Result of {plugin} on {path} is not JSON-serialisable; not cached")
+            return False
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        # write-then-rename so concurrent workers never see half a file
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(entry), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, entry)
+        with self._lock:
+            self.writes += 1
+        return True
+
+    # ── maintenance ───────────────────────────────────────────────────────────
+    def invalidate(self, plugin: Optional[str] = None) -> None:
+        """Forget every cached result of `plugin`, or of all plugins."""
+        target = self.root if plugin is None else os.path.join(self.root, plugin)
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+            logger.info(f"Invalidated cached results in {target}")
+
+    def evict(self) -> int:
+        """Drop entries older than max_age, then the least recently used
+        ones until the store fits max_bytes. Returns the number removed."""
+        entries = []
+        for dirpath, _, files in os.walk(self.root):
+            for name in files:
+                p = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+
+        now = time.time()
+        removed = 0
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, p in sorted(entries):
+            if now - mtime <= self.max_age and total <= self.max_bytes:
+                break
+            try:
+                os.remove(p)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"Evicted {removed} cached results from {self.root}")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "writes": self.writes}
+
+def _outputs_exist(result: Dict[str, Any]) -> bool:
+    for k in OUTPUT_KEYS:
+        v = result.get(k)
+        if isinstance(v, str) and not os.path.exists(v):
+            return False
+    return True
@@ -0,0 +1,152 @@
+# src/scheduler.py
+# -*- coding: utf-8 -*-
+"""
+scheduler.py – dependency-aware plugin scheduling
+
+* Builds a DAG from register_plugin(requires=[...])
+* Rejects cycles (and, in strict mode, unknown requirements) before anything runs
+* Launches a plugin as soon as its requirements and every lower-phase plugin
+  ahead of it have finished, so independent plugins overlap
+"""
+
+from __future__ import annotations
+import heapq
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Set
+
+logger = logging.getLogger("main")
+
+# (plugin, requirement) pairs already reported, so re-planning stays quiet
+_WARNED: Set[tuple] = set()
+
+# registry input types that name the same file set (some plugins still
+# register with the older "wav" input type)
+INPUT_ALIASES = {"wav": "audio"}
+
+def input_types(plugin: Dict[str, Any]) -> List[str]:
+    """Normalised input types of a registry entry (str or list of str)."""
+    types = plugin["input_type"]
+    if isinstance(types, str):
+        types = [types]
+    return [INPUT_ALIASES.get(t, t) for t in types]
+
+def _requirements(plugins: List[Dict[str, Any]], strict: bool) -> List[Set[int]]:
+    """Indices each plugin depends on; names may map to several entries."""
+    by_name: Dict[str, List[int]] = {}
+    for i, p in enumerate(plugins):
+        by_name.setdefault(p["name"], []).append(i)
+
+    deps: List[Set[int]] = []
+    for i, p in enumerate(plugins):
+        d: Set[int] = set()
+        for req in p.get("requires") or []:
+            if req not in by_name:
+                msg = f"Plugin '{p['name']}' requires unknown plugin '{req}'"
+                if strict:
+                    raise RuntimeError(msg)
+                if (p["name"], req) not in _WARNED:
+                    _WARNED.add((p["name"], req))
+                    logger.warning(f"⚠️  {msg}; ignoring requirement")
+                continue
+            d.update(j for j in by_name[req] if j != i)
+        deps.append(d)
+    return deps
+
+def _toposort(plugins: List[Dict[str, Any]], deps: List[Set[int]]) -> List[int]:
+    """Kahn's algorithm, breaking ties by (phase, name) like the old sort."""
+    dependents: List[List[int]] = [[] for _ in plugins]
+    indegree = [len(d) for d in deps]
+    for i, d in enumerate(deps):
+        for j in d:
+            dependents[j].append(i)
+
+    def key(i: int):
+        return (plugins[i]["phase"], plugins[i]["name"].lower(), i)
+
+    heap = [key(i) for i, n in enumerate(indegree) if n == 0]
+    heapq.heapify(heap)
+    order: List[int] = []
+    while heap:
+        i = heapq.heappop(heap)[-1]
+        order.append(i)
+        for j in dependents[i]:
+            indegree[j] -= 1
+            if indegree[j] == 0:
+                heapq.heappush(heap, key(j))
+
+    if len(order) != len(plugins):
+        stuck = sorted(plugins[i]["name"] for i, n in enumerate(indegree) if n > 0)
+        raise RuntimeError(f"Cyclic plugin requirements between: {', '.join(stuck)}")
+    return order
+
+def resolve_execution_order(plugins: List[Dict[str, Any]],
+                            strict: bool = False) -> List[Dict[str, Any]]:
+    """
+    Order registry entries so every plugin runs after the ones it requires.
+
+    Plugins without a mutual dependency keep the (phase, name) order.
+    Raises RuntimeError on cycles, and on unknown requirements if strict.
+    """
+    deps = _requirements(plugins, strict)
+    return [plugins[i] for i in _toposort(plugins, deps)]
+
+def _wait_sets(plugins: List[Dict[str, Any]], order: List[int],
+               deps: List[Set[int]]) -> List[Set[int]]:
+    """
+    For each position in `order`, the positions that must finish first:
+    its requirements, every earlier plugin of a lower phase and, for
+    report plugins, everything before them.
+    """
+    pos = {idx: k for k, idx in enumerate(order)}
+    waits: List[Set[int]] = []
+    for k, idx in enumerate(order):
+        p = plugins[idx]
+        w = {pos[j] for j in deps[idx]}
+        if "report" in input_types(p):
+            w.update(range(k))
+        else:
+            w.update(j for j in range(k) if plugins[order[j]]["phase"] < p["phase"])
+        waits.append(w)
+    return waits
+
+def run_dag(plugins: List[Dict[str, Any]],
+            run: Callable[[Dict[str, Any]], Any],
+            on_done: Callable[[Dict[str, Any], Any], None],
+            jobs: int = 1,
+            strict: bool = False) -> List[Dict[str, Any]]:
+    """
+    Execute `run(plugin)` for every plugin in dependency order.
+
+    `on_done(plugin, result)` is always called from the calling thread, so
+    merging results needs no locking. With jobs > 1, up to `jobs` plugins
+    whose inputs are ready run at the same time.
+
+    Returns the resolved execution order.
+    """
+    deps = _requirements(plugins, strict)
+    order = _toposort(plugins, deps)
+    ordered = [plugins[i] for i in order]
+
+    if jobs <= 1:
+        for p in ordered:
+            on_done(p, run(p))
+        return ordered
+
+    waits = _wait_sets(plugins, order, deps)
+    pending = list(range(len(ordered)))
+    done: Set[int] = set()
+    running: Dict[Future, int] = {}
+
+    with ThreadPoolExecutor(max_workers=jobs) as ex:
+        while pending or running:
+            ready = [k for k in pending if waits[k] <= done]
+            for k in ready:
+                pending.remove(k)
+                running[ex.submit(run, ordered[k])] = k
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in sorted(finished, key=running.get):
+                k = running.pop(fut)
+                on_done(ordered[k], fut.result())
+                done.add(k)
+    return ordered
@@ -5,8 +5,9 @@ Analyzes MIDI to create a musical 'sense profile' (smell, taste, touch, sight, h
 import os
 import logging
 from typing import List, Dict
-from music21 import converter, key, tempo, meter
+from music21 import key, tempo, meter
 
+from midi_cache import load_score
 from plugin_registry import register_plugin
 
 # Configure logging
@@ -21,7 +22,9 @@ logging.basicConfig(
     description="Generates a musical senses profile from MIDI",
     input_type="midi",
     phase=2,
-    requires=["midi_analysis"]
+    requires=["midi_analysis"],
+    batch=True,
+    max_batch_size=32
 )
 def analyze_senses(midi_paths: List[str], output_dir: str = "reports", analysis_context: dict = None) -> List[Dict]:
     results = []
@@ -34,7 +37,7 @@ def analyze_senses(midi_paths: List[str], output_dir: str = "reports", analysis_
                 results.append({"file": midi_path, "error": "File not found"})
                 continue
 
-            score = converter.parse(midi_path)
+            score = load_score(midi_path)
 
             # Default senses
             smell = "fresh"
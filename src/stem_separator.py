@@ -1,11 +1,12 @@
 """
 Stem Separator Plugin
-Separates WAV audio into stems using Demucs.
+Separates WAV audio into stems using Demucs, in overlapping chunks with
+one model shared by every file of the run.
 """
 import os
 import logging
-from typing import Dict
-from demucs import separate
+from typing import Dict, List
+from stem_service import get_service
 from plugin_registry import register_plugin
 
 # Configure logging
@@ -19,37 +20,42 @@ logging.basicConfig(
     name="separate_stems",
     description="Separates WAV audio into stems using Demucs",
     input_type="wav",
-    phase=3
+    phase=3,
+    batch=True,
+    max_batch_size=8,
+    result_schema={"stems": "list"}
 )
-def separate_stems(audio_path: str, output_dir: str = "reports/stems") -> Dict:
+def separate_stems(audio_paths: List[str], output_dir: str = "reports/stems") -> List[Dict]:
     """
-    Separates WAV audio into stems using Demucs.
+    Separates WAV audio into stems using Demucs. The model stays loaded
+    across files and batches; each song is processed in chunks and its
+    stems are written to disk as they are produced.
 
     Args:
-        audio_path (str): Path to the WAV file.
-        output_dir (str): Directory to save outputs.
+        audio_paths (List[str]): Paths to the WAV files.
+        output_dir (str): Directory to save outputs (one folder per file).
 
     Returns:
-        Dict: Stem separation results or error message.
+        List[Dict]: Stem separation results or error messages, per file.
     """
     try:
-        if not os.path.exists(audio_path):
-            logging.error(f"Audio file not found: {audio_path}")
-            return {"file": audio_path, "error": "File not found"}
-
-        base = os.path.splitext(os.path.basename(audio_path))[0]
-        stem_dir = os.path.join(output_dir, base)
-        os.makedirs(stem_dir, exist_ok=True)
-
-        # Run Demucs to separate stems
-        separate.main(["--out", stem_dir, audio_path])
-        logging.info(f"Separated stems for {audio_path} into {stem_dir}")
-
-        # Collect stem files
-        stems = [os.path.join(stem_dir, f) for f in os.listdir(stem_dir) if f.endswith(".wav")]
-
-        return {"file": audio_path, "stems": stems}
+        results = []
+        todo = []
+        for audio_path in audio_paths:
+            if not os.path.exists(audio_path):
+                logging.error(f"Audio file not found: {audio_path}")
+                results.append({"file": audio_path, "error": "File not found"})
+            else:
+                todo.append(audio_path)
+
+        for res in get_service().separate_many(todo, output_dir):
+            if "error" in res:
+                logging.error(f"Error separating stems for {res['file']}: {res['error']}")
+            else:
+                logging.info(f"Separated stems for {res['file']}: {res['stems']}")
+            results.append(res)
+        return results
 
     except Exception as e:
-        logging.error(f"Error separating stems for {audio_path}: {str(e)}")
-        return {"file": audio_path, "error": str(e)}
\ No newline at end of file
+        logging.error(f"Error separating stems for {audio_paths}: {str(e)}")
+        return [{"error": str(e)}]
@@ -0,0 +1,201 @@
+# src/stem_service.py
+# -*- coding: utf-8 -*-
+"""
+stem_service.py – in-process, bounded-memory Demucs stem separation
+
+* The Demucs model is loaded once per process and reused for every file
+  of every batch (the CLI entry point reloads it per call)
+* Audio is read through audio_stream in overlapping chunks of
+  chunk_seconds; each chunk is separated on its own and the chunks are
+  joined by weighted overlap-add (linear cross-fades over the overlap),
+  so memory is bounded by one chunk whatever the song length
+* Finished samples are written to <stem>.wav as soon as no later chunk
+  can touch them, so stems stream to disk while the song is processed
+* Normalisation uses whole-file statistics from one cheap streaming
+  pass, as the Demucs CLI does, so chunk edges do not change the gain
+"""
+
+from __future__ import annotations
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from audio_stream import AudioStream
+
+logger = logging.getLogger("main")
+
+DEFAULT_MODEL = "htdemucs"
+DEFAULT_CHUNK_SECONDS = 20.0
+DEFAULT_OVERLAP_SECONDS = 2.0
+
+class SeparationService:
+    """
+    Separates files into stems with one resident model.
+
+    :param model_name: Pretrained Demucs model to load on first use.
+    :param chunk_seconds: Length of each separated chunk (input audio).
+    :param overlap_seconds: Overlap between consecutive chunks.
+    :param model: Pre-loaded model (anything with samplerate,
+                  audio_channels and sources); skips loading.
+    :param apply: Function (model, mix[channels, samples]) ->
+                  stems[sources, channels, samples], both float32 NumPy;
+                  defaults to demucs.apply.apply_model on the CPU.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL,
+                 chunk_seconds: float = DEFAULT_CHUNK_SECONDS,
+                 overlap_seconds: float = DEFAULT_OVERLAP_SECONDS,
+                 device: str = "cpu", model: Any = None,
+                 apply: Optional[Callable[[Any, np.ndarray], np.ndarray]] = None):
+        if not 0 <= overlap_seconds < chunk_seconds:
+            raise ValueError("overlap_seconds must be in [0, chunk_seconds)")
+        self.model_name = model_name
+        self.chunk_seconds = chunk_seconds
+        self.overlap_seconds = overlap_seconds
+        self.device = device
+        self._model = model
+        self._apply = apply or self._apply_demucs
+        self._lock = threading.Lock()
+        self.files = 0
+        self.chunks = 0
+
+    # ── model ────────────────────────────────────────────────────────────────
+    @property
+    def model(self) -> Any:
+        with self._lock:
+            if self._model is None:
+                from demucs.pretrained import get_model
+                self._model = get_model(self.model_name)
+                self._model.eval()
+                logger.info(f"Loaded Demucs model {self.model_name}")
+            return self._model
+
+    def _apply_demucs(self, model: Any, mix: np.ndarray) -> np.ndarray:
+        import torch
+        from demucs.apply import apply_model
+        with torch.no_grad():
+            out = apply_model(model, torch.from_numpy(mix)[None], shifts=0, split=True,
+                              overlap=0.25, progress=False, device=self.device)
+        return out[0].cpu().numpy()
+
+    # ── separation ───────────────────────────────────────────────────────────
+    def separate(self, path: str, out_dir: str, subtype: str = "PCM_16") -> Dict[str, str]:
+        """Write one <stem>.wav per model source into `out_dir`; returns {stem: path}."""
+        import soundfile as sf
+
+        model = self.model
+        msr, channels, sources = model.samplerate, model.audio_channels, list(model.sources)
+        stream = AudioStream(path)
+        sr = stream.samplerate
+        mean, std = _mono_stats(stream)
+
+        chunk = max(int(round(self.chunk_seconds * sr)), 1)
+        overlap = int(round(self.overlap_seconds * sr))
+        step = chunk - overlap
+        ramp = max(int(round(self.overlap_seconds * msr)), 0)
+        total = int(round(stream.frames * msr / float(sr)))
+
+        os.makedirs(out_dir, exist_ok=True)
+        paths = {s: os.path.join(out_dir, f"{s}.wav") for s in sources}
+        writers = [sf.SoundFile(paths[s], "w", samplerate=msr, channels=channels, subtype=subtype)
+                   for s in sources]
+        try:
+            acc = np.zeros((len(sources), channels, 0), np.float32)
+            weight = np.zeros(0, np.float32)
+            acc_start = 0   # output sample index of acc[..., 0]
+            for i, block in enumerate(stream.blocks(chunk, overlap=overlap, mono=False)):
+                mix = _to_model(block.T, sr, msr, channels)
+                mix = (mix - mean) / std
+                stems = self._apply(model, np.ascontiguousarray(mix, dtype=np.float32)) * std + mean
+                self.chunks += 1
+
+                start = int(round(i * step * msr / float(sr)))
+                end = start + stems.shape[-1]
+                if end - acc_start > acc.shape[-1]:
+                    grow = end - acc_start - acc.shape[-1]
+                    acc = np.concatenate([acc, np.zeros(acc.shape[:2] + (grow,), np.float32)], axis=-1)
+                    weight = np.concatenate([weight, np.zeros(grow, np.float32)])
+                w = _window(stems.shape[-1], ramp)
+                acc[..., start - acc_start:end - acc_start] += stems * w
+                weight[start - acc_start:end - acc_start] += w
+
+                # everything before the next chunk's start is final
+                ready = int(round((i + 1) * step * msr / float(sr))) - acc_start
+                if 0 < ready < acc.shape[-1]:
+                    _flush(writers, acc[..., :ready], weight[:ready])
+                    acc, weight = acc[..., ready:], weight[ready:]
+                    acc_start += ready
+            n = min(acc.shape[-1], total - acc_start)
+            if n > 0:
+                _flush(writers, acc[..., :n], weight[:n])
+        finally:
+            for w in writers:
+                w.close()
+        self.files += 1
+        return paths
+
+    def separate_many(self, paths: List[str], output_dir: str) -> Iterator[Dict[str, Any]]:
+        """Separate each file into output_dir/<name>/, one result per file."""
+        for path in paths:
+            base = os.path.splitext(os.path.basename(path))[0]
+            try:
+                stems = self.separate(path, os.path.join(output_dir, base))
+                yield {"file": path, "status": "success", "stems": list(stems.values())}
+            except Exception as exc:
+                logger.error(f"Stem separation failed for {path}: {exc}")
+                yield {"file": path, "error": str(exc)}
+
+def _mono_stats(stream: AudioStream) -> tuple:
+    """Mean and standard deviation of the mono mix, from one streaming pass."""
+    n, s, s2 = 0, 0.0, 0.0
+    for block in stream.blocks(1 << 18, mono=True):
+        n += len(block)
+        s += float(block.sum(dtype=np.float64))
+        s2 += float(np.square(block, dtype=np.float64).sum())
+    if not n:
+        return 0.0, 1.0
+    mean = s / n
+    std = max(s2 / n - mean * mean, 0.0) ** 0.5
+    return mean, std if std > 1e-8 else 1.0
+
+def _to_model(mix: np.ndarray, sr: int, msr: int, channels: int) -> np.ndarray:
+    """(channels, samples) at the model's rate and channel count."""
+    if mix.shape[0] != channels:
+        mono = mix.mean(axis=0, keepdims=True)
+        mix = np.repeat(mono, channels, axis=0) if channels > 1 else mono
+    if sr != msr:
+        import julius
+        import torch
+        mix = julius.resample_frac(torch.from_numpy(np.ascontiguousarray(mix)), sr, msr).numpy()
+    return mix
+
+def _window(n: int, ramp: int) -> np.ndarray:
+    """Overlap-add weights: linear fade in / out over `ramp` samples, never zero."""
+    w = np.ones(n, np.float32)
+    r = min(ramp, n // 2)
+    if r:
+        fade = np.arange(1, r + 1, dtype=np.float32) / (r + 1)
+        w[:r] = fade
+        w[n - r:] = fade[::-1]
+    return w
+
+def _flush(writers, acc: np.ndarray, weight: np.ndarray) -> None:
+    out = acc / weight
+    for stem, f in zip(out, writers):
+        f.write(np.clip(stem.T, -1.0, 1.0))
+
+# ─── Run-wide instance ────────────────────────────────────────────────────────
+# Each worker process of a --workers pool loads its own model.
+_SERVICE: Optional[SeparationService] = None
+_SERVICE_LOCK = threading.Lock()
+
+def get_service(**kwargs) -> SeparationService:
+    """Shared SeparationService, created (model not yet loaded) on first call."""
+    global _SERVICE
+    with _SERVICE_LOCK:
+        if _SERVICE is None:
+            _SERVICE = SeparationService(**kwargs)
+        return _SERVICE
@@ -6,8 +6,8 @@ import os
 import logging
 import json
 from typing import List, Dict, Any
+from midi_cache import load_pretty_midi
 from plugin_registry import register_plugin
-import pretty_midi
 
 # Configure logging
 logging.basicConfig(
@@ -25,7 +25,9 @@ logger = logging.getLogger(__name__)
     description="Applies style transformations to MIDI inputs for acoustic guitar songs",
     input_type="midi",
     phase=5,
-    requires=["genre_classifier"]
+    requires=["genre_classifier"],
+    batch=True,
+    max_batch_size=32
 )
 def style_transfer(midi_paths: List[str], output_dir: str = "reports", analysis_context: dict = None) -> List[Dict[str, Any]]:
     """
@@ -52,8 +54,8 @@ def style_transfer(midi_paths: List[str], output_dir: str = "reports", analysis_
                 continue
 
             try:
-                # Load MIDI file
-                midi = pretty_midi.PrettyMIDI(midi_path)
+                # Load MIDI file (private copy: notes are edited in place below)
+                midi = load_pretty_midi(midi_path, copy=True)
                 
                 # Apply folk-style transformation
                 genre = analysis_context.get("genre_classifier", [{}])[0].get("genre", "folk") if analysis_context else "folk"
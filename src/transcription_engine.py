@@ -0,0 +1,250 @@
+# src/transcription_engine.py
+# -*- coding: utf-8 -*-
+"""
+transcription_engine.py – model-resident basic_pitch transcription
+
+* The ICASSP 2022 model is loaded once per process and kept
+  (basic_pitch.inference.predict reloads it on every call)
+* Audio comes from the run-wide audio_cache at basic_pitch's 22.05 kHz
+  and is cut into the same overlapping windows basic_pitch uses; windows
+  from several files are stacked into one model call of up to
+  batch_windows windows
+* Onset / frame thresholds, minimum note length and frequency limits are
+  options of each request, applied after inference, so files with
+  different settings still share a batch
+* A failed model call fails only the files with windows in that call
+* stats() reports throughput as audio-seconds per wall-second
+"""
+
+from __future__ import annotations
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+
+from audio_cache import load_audio
+
+logger = logging.getLogger("main")
+
+DEFAULT_BATCH_WINDOWS = 32
+N_OVERLAPPING_FRAMES = 30   # as basic_pitch.inference.run_inference
+
+DEFAULT_OPTIONS: Dict[str, Any] = {
+    "onset_threshold": 0.5,
+    "frame_threshold": 0.3,
+    "minimum_note_length": 127.70,   # ms
+    "minimum_frequency": None,
+    "maximum_frequency": None,
+    "multiple_pitch_bends": False,
+    "melodia_trick": True,
+    "midi_tempo": 120,
+}
+
+class TranscriptionEngine:
+    """
+    basic_pitch transcription with one resident model.
+
+    :param model_path: Saved model to load (default: ICASSP_2022_MODEL_PATH).
+    :param batch_windows: Most audio windows per model call.
+    """
+
+    def __init__(self, model_path: Any = None, batch_windows: int = DEFAULT_BATCH_WINDOWS):
+        self.model_path = model_path
+        self.batch_windows = max(int(batch_windows), 1)
+        self._predict = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.files = 0
+        self.calls = 0
+        self.audio_seconds = 0.0
+        self.wall_seconds = 0.0
+
+    # ── model ────────────────────────────────────────────────────────────────
+    def _model(self):
+        """Batch predict function of the loaded model: (n, samples, 1) -> {output: array}."""
+        if self._predict is None:
+            from basic_pitch import ICASSP_2022_MODEL_PATH
+            path = self.model_path or ICASSP_2022_MODEL_PATH
+            try:
+                from basic_pitch.inference import Model
+                model = Model(path)
+                self._predict = model.predict
+            except ImportError:  # basic_pitch < 0.3: TensorFlow saved model only
+                import tensorflow as tf
+                model = tf.saved_model.load(str(path))
+                self._predict = lambda x: {k: np.asarray(v) for k, v in model(x).items()}
+            logger.info(f"Loaded basic_pitch model from {path}")
+        return self._predict
+
+    # ── transcription ────────────────────────────────────────────────────────
+    def transcribe(self, requests: List[Union[str, Dict[str, Any]]],
+                   output_dir: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Transcribe each request (a path, or {"path": ..., **options}) and
+        yield one result per request, in order. With `output_dir` the MIDI
+        is written to transcribed_<name>.mid there; the PrettyMIDI object
+        is always in result["midi"].
+        """
+        from basic_pitch.constants import AUDIO_N_SAMPLES, AUDIO_SAMPLE_RATE, FFT_HOP
+
+        jobs = [_job(r) for r in requests]
+        overlap = N_OVERLAPPING_FRAMES * FFT_HOP
+        hop = AUDIO_N_SAMPLES - overlap
+
+        with self._lock:
+            predict = self._model()
+            queue: List[tuple] = []   # (job index, window index, window)
+            next_out = 0
+            for j, job in enumerate(jobs):
+                t0 = time.perf_counter()
+                try:
+                    y, _ = load_audio(job["path"], sr=AUDIO_SAMPLE_RATE, mono=True)
+                    job["length"] = len(y)
+                    windows = _windows(y, overlap, hop, AUDIO_N_SAMPLES)
+                    job["outputs"] = [None] * len(windows)
+                    queue.extend((j, i, w) for i, w in enumerate(windows))
+                except Exception as exc:
+                    job["error"] = str(exc)
+                job["wall"] += time.perf_counter() - t0
+                last = j == len(jobs) - 1
+                while len(queue) >= self.batch_windows or (last and queue):
+                    self._run(predict, queue[:self.batch_windows], jobs)
+                    del queue[:self.batch_windows]
+                # files whose windows have all been through the model, in order
+                while next_out < len(jobs) and _ready(jobs[next_out]):
+                    yield self._finish(jobs[next_out], output_dir)
+                    next_out += 1
+
+    def _run(self, predict, batch: List[tuple], jobs: List[Dict[str, Any]]) -> None:
+        """
+        One model call over `batch`. If it fails, only the files with a
+        window in this call get the error; the rest of the run goes on.
+        """
+        batch = [b for b in batch if "error" not in jobs[b[0]]]   # skip files that already failed
+        if not batch:
+            return
+        t0 = time.perf_counter()
+        x = np.stack([w for _, _, w in batch])[..., None]
+        try:
+            out = predict(x)
+        except Exception as exc:
+            failed = sorted({j for j, _, _ in batch})
+            logger.warning(f"basic_pitch model call failed for {len(failed)} file(s): {exc}")
+            for j in failed:
+                jobs[j]["error"] = f"Model inference failed: {exc}"
+            return
+        with self._stats_lock:
+            self.calls += 1
+        share = (time.perf_counter() - t0) / len(batch)
+        for n, (j, i, _) in enumerate(batch):
+            jobs[j]["outputs"][i] = {k: v[n] for k, v in out.items()}
+            jobs[j]["wall"] += share
+
+    def _finish(self, job: Dict[str, Any], output_dir: Optional[str]) -> Dict[str, Any]:
+        path = job["path"]
+        if "error" in job:
+            return {"file": path, "error": job["error"]}
+        from basic_pitch.constants import AUDIO_SAMPLE_RATE, FFT_HOP
+
+        t0 = time.perf_counter()
+        try:
+            from basic_pitch.note_creation import model_output_to_notes
+
+            opts = job["options"]
+            keys = job["outputs"][0].keys()
+            output = {k: _unwrap(np.stack([o[k] for o in job["outputs"]]), job["length"]) for k in keys}
+            min_note_len = int(np.round(opts["minimum_note_length"] / 1000 * (AUDIO_SAMPLE_RATE / FFT_HOP)))
+            midi, notes = model_output_to_notes(
+                output,
+                onset_thresh=opts["onset_threshold"],
+                frame_thresh=opts["frame_threshold"],
+                min_note_len=min_note_len,
+                min_freq=opts["minimum_frequency"],
+                max_freq=opts["maximum_frequency"],
+                multiple_pitch_bends=opts["multiple_pitch_bends"],
+                melodia_trick=opts["melodia_trick"],
+                midi_tempo=opts["midi_tempo"],
+            )
+            result = {"file": path, "status": "success", "midi": midi, "note_count": len(notes)}
+            if output_dir is not None:
+                os.makedirs(output_dir, exist_ok=True)
+                out_path = os.path.join(output_dir, f"transcribed_{os.path.basename(path)}.mid")
+                midi.write(out_path)
+                result["output_file"] = out_path
+        except Exception as exc:
+            result = {"file": path, "error": str(exc)}
+        job["outputs"] = None  # release the model output
+        wall = job["wall"] + time.perf_counter() - t0
+        audio = job.get("length", 0) / float(AUDIO_SAMPLE_RATE)
+        with self._stats_lock:
+            self.files += 1
+            self.audio_seconds += audio
+            self.wall_seconds += wall
+        result["audio_seconds"] = round(audio, 3)
+        result["realtime_factor"] = round(audio / wall, 2) if wall > 0 else None
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "files": self.files,
+                "model_calls": self.calls,
+                "audio_seconds": round(self.audio_seconds, 3),
+                "wall_seconds": round(self.wall_seconds, 3),
+                "audio_seconds_per_wall_second":
+                    round(self.audio_seconds / self.wall_seconds, 2) if self.wall_seconds else None,
+            }
+
+def _job(request: Union[str, Dict[str, Any]]) -> Dict[str, Any]:
+    if isinstance(request, str):
+        request = {"path": request}
+    unknown = set(request) - set(DEFAULT_OPTIONS) - {"path"}
+    if unknown:
+        raise ValueError(f"Unknown transcription options: {sorted(unknown)}")
+    options = {k: request.get(k, v) for k, v in DEFAULT_OPTIONS.items()}
+    return {"path": request["path"], "options": options, "outputs": [], "wall": 0.0}
+
+def _ready(job: Dict[str, Any]) -> bool:
+    return "error" in job or (job["outputs"] is not None and "length" in job
+                              and all(o is not None for o in job["outputs"]))
+
+def _unwrap(windows: np.ndarray, length: int) -> np.ndarray:
+    """
+    Per-window model output (n, frames, bins) → one (frames, bins) array
+    for `length` samples of audio, as basic_pitch.inference.unwrap_output
+    does (that one expects a TensorFlow tensor in basic_pitch 0.2).
+    """
+    from basic_pitch.constants import ANNOTATIONS_FPS, AUDIO_SAMPLE_RATE
+
+    n_olap = N_OVERLAPPING_FRAMES // 2
+    if n_olap > 0:   # drop half the overlapping frames at both ends of each window
+        windows = windows[:, n_olap:-n_olap, :]
+    frames = int(np.floor(length * (ANNOTATIONS_FPS / AUDIO_SAMPLE_RATE)))
+    return windows.reshape(-1, windows.shape[2])[:frames, :]
+
+def _windows(y: np.ndarray, overlap: int, hop: int, size: int) -> List[np.ndarray]:
+    """basic_pitch's framing: overlap/2 zeros in front, zero-padded last window."""
+    y = np.concatenate([np.zeros(overlap // 2, np.float32), np.asarray(y, np.float32)])
+    out = []
+    for start in range(0, max(len(y), 1), hop):
+        w = y[start:start + size]
+        if len(w) < size:
+            w = np.pad(w, (0, size - len(w)))
+        out.append(w)
+    return out
+
+# ─── Run-wide instance ────────────────────────────────────────────────────────
+# Each worker process of a --workers pool loads its own model.
+_ENGINE: Optional[TranscriptionEngine] = None
+_ENGINE_LOCK = threading.Lock()
+
+def get_engine(**kwargs) -> TranscriptionEngine:
+    """Shared TranscriptionEngine, created (model not yet loaded) on first call."""
+    global _ENGINE
+    with _ENGINE_LOCK:
+        if _ENGINE is None:
+            _ENGINE = TranscriptionEngine(**kwargs)
+        return _ENGINE
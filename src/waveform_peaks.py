@@ -0,0 +1,185 @@
+# src/waveform_peaks.py
+# -*- coding: utf-8 -*-
+"""
+waveform_peaks.py – min/max peak pyramids and waveform overviews
+
+* One streaming pass builds min/max peaks per BASE_BUCKET samples; each
+  further level halves the previous one, down to a few hundred columns
+* The pyramid is cached next to the audio as <file>.peaks.npz (or under
+  cache/peaks/ when that directory is read-only) and rebuilt only when
+  the audio's mtime or size changes
+* peaks() answers any column count from the nearest level, so drawing
+  never touches more than about twice as many points as there are pixels
+* WaveformRenderer draws on one reused Figure / Agg canvas (no pyplot),
+  so a batch of files shares one figure; peaks_json() emits the same
+  data for the web UI
+"""
+
+from __future__ import annotations
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from audio_stream import AudioStream
+
+PYRAMID_VERSION = 1
+BASE_BUCKET = 512          # samples per column at level 0
+MIN_LEVEL_COLUMNS = 256    # stop halving below this many columns
+FALLBACK_DIR = os.path.join("cache", "peaks")
+
+# ─── Pyramid ──────────────────────────────────────────────────────────────────
+def build_pyramid(path: str, base: int = BASE_BUCKET) -> Dict[str, Any]:
+    """Min/max levels of `path` (mono mix) from one streaming pass."""
+    stream = AudioStream(path)
+    mins: List[np.ndarray] = []
+    maxs: List[np.ndarray] = []
+    # blocks are a multiple of `base`, so buckets never straddle two blocks
+    for block in stream.blocks(base * 1024, mono=True):
+        if not len(block):
+            continue
+        edges = np.arange(0, len(block), base)
+        mins.append(np.minimum.reduceat(block, edges))
+        maxs.append(np.maximum.reduceat(block, edges))
+    lo = np.concatenate(mins) if mins else np.zeros(1, np.float32)
+    hi = np.concatenate(maxs) if maxs else np.zeros(1, np.float32)
+
+    levels = [(lo, hi)]
+    while len(lo) >= 2 * MIN_LEVEL_COLUMNS:
+        n = len(lo) // 2 * 2
+        tail_lo, tail_hi = lo[n:], hi[n:]
+        lo = np.minimum(lo[0:n:2], lo[1:n:2])
+        hi = np.maximum(hi[0:n:2], hi[1:n:2])
+        if len(tail_lo):  # fold an odd last bucket into the new last column
+            lo[-1] = min(lo[-1], tail_lo[0])
+            hi[-1] = max(hi[-1], tail_hi[0])
+        levels.append((lo, hi))
+    return {"sr": stream.samplerate, "frames": stream.frames, "base": base, "levels": levels}
+
+def _stamp(path: str) -> np.ndarray:
+    st = os.stat(path)
+    return np.array([PYRAMID_VERSION, st.st_mtime_ns, st.st_size], dtype=np.int64)
+
+def _cache_paths(path: str) -> List[str]:
+    digest = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+    return [path + ".peaks.npz",
+            os.path.join(FALLBACK_DIR, f"{os.path.basename(path)}.{digest}.peaks.npz")]
+
+def _read(cache: str, stamp: np.ndarray) -> Optional[Dict[str, Any]]:
+    try:
+        with np.load(cache) as z:
+            if not np.array_equal(z["stamp"], stamp):
+                return None
+            n = int(z["n_levels"])
+            return {"sr": int(z["sr"]), "frames": int(z["frames"]), "base": int(z["base"]),
+                    "levels": [(z[f"min{i}"], z[f"max{i}"]) for i in range(n)]}
+    except (OSError, KeyError, ValueError):
+        return None
+
+def _write(cache: str, stamp: np.ndarray, pyr: Dict[str, Any]) -> bool:
+    arrays = {"stamp": stamp, "sr": pyr["sr"], "frames": pyr["frames"], "base": pyr["base"],
+              "n_levels": len(pyr["levels"])}
+    for i, (lo, hi) in enumerate(pyr["levels"]):
+        arrays[f"min{i}"], arrays[f"max{i}"] = lo, hi
+    try:
+        d = os.path.dirname(os.path.abspath(cache))
+        os.makedirs(d, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=d, suffix=".tmp.npz")
+    except OSError:
+        return False
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, cache)
+        return True
+    except OSError:
+        return False
+    finally:
+        # a failed save or rename must not leave the temp file beside the audio
+        if os.path.exists(tmp):
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+
+def load_pyramid(path: str) -> Dict[str, Any]:
+    """Cached pyramid of `path`, building and storing it on a miss."""
+    stamp = _stamp(path)
+    caches = _cache_paths(path)
+    for cache in caches:
+        pyr = _read(cache, stamp)
+        if pyr is not None:
+            return pyr
+    pyr = build_pyramid(path)
+    for cache in caches:
+        if _write(cache, stamp, pyr):
+            break
+    return pyr
+
+def peaks(path: str, columns: int, pyramid: Optional[Dict[str, Any]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """(mins, maxs) with `columns` entries (fewer for very short files)."""
+    pyr = pyramid or load_pyramid(path)
+    levels = pyr["levels"]
+    # coarsest level that still has at least `columns` buckets
+    lo, hi = levels[0]
+    for cand_lo, cand_hi in levels:
+        if len(cand_lo) >= columns:
+            lo, hi = cand_lo, cand_hi
+    if len(lo) <= columns:
+        return lo, hi
+    edges = (np.arange(columns) * len(lo)) // columns
+    return np.minimum.reduceat(lo, edges), np.maximum.reduceat(hi, edges)
+
+def peaks_json(path: str, out_path: str, columns: int = 2000) -> str:
+    """Write the overview as JSON ({"min": [...], "max": [...], ...}) for the web UI."""
+    pyr = load_pyramid(path)
+    lo, hi = peaks(path, columns, pyr)
+    doc = {
+        "file": os.path.basename(path),
+        "sample_rate": pyr["sr"],
+        "duration": pyr["frames"] / float(pyr["sr"]) if pyr["sr"] else 0.0,
+        "columns": len(lo),
+        "min": np.round(lo, 4).tolist(),
+        "max": np.round(hi, 4).tolist(),
+    }
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, separators=(",", ":"))
+    return out_path
+
+# ─── Rendering ────────────────────────────────────────────────────────────────
+class WaveformRenderer:
+    """
+    Reusable waveform overview renderer: one Figure on an Agg canvas,
+    cleared and redrawn per file. Not thread-safe; use one per thread.
+    """
+
+    def __init__(self, width_px: int = 1000, height_px: int = 400, dpi: int = 100,
+                 color: str = "blue"):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.width_px = width_px
+        self.color = color
+        self.figure = Figure(figsize=(width_px / dpi, height_px / dpi), dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot(111)
+        self._lock = threading.Lock()
+
+    def render(self, path: str, out_path: str, title: Optional[str] = None) -> str:
+        pyr = load_pyramid(path)
+        lo, hi = peaks(path, self.width_px, pyr)
+        duration = pyr["frames"] / float(pyr["sr"]) if pyr["sr"] else 0.0
+        t = np.linspace(0.0, duration, len(lo))
+        with self._lock:
+            ax = self.ax
+            ax.clear()
+            ax.fill_between(t, lo, hi, color=self.color, linewidth=0.5)
+            ax.set_xlim(0.0, duration or 1.0)
+            ax.set_title(title or f"Waveform of {os.path.splitext(os.path.basename(path))[0]}")
+            ax.set_xlabel("Time (s)")
+            ax.set_ylabel("Amplitude")
+            self.figure.savefig(out_path)
+        return out_path
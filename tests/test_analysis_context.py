@@ -0,0 +1,31 @@
+import pickle
+from src.analysis_context import AnalysisContext, lookup
+
+def test_context_indexes_by_plugin_and_file():
+    ctx = AnalysisContext()
+    ctx.record("audio_analysis", "a.wav", {"status": "success", "input_file": "a.wav", "rms": 0.1})
+    ctx.record("audio_analysis", "b.wav", {"status": "success", "input_file": "b.wav", "rms": 0.2})
+
+    assert ctx.result("audio_analysis", "b.wav")["rms"] == 0.2
+    assert lookup(ctx, "audio_analysis", "a.wav")["rms"] == 0.1
+    assert len(ctx["audio_analysis"]) == 2  # legacy list access
+
+    view = ctx.for_file("a.wav")
+    assert view["rms"] == 0.1 and view["audio_analysis"]["rms"] == 0.1
+    view["genre"] = "rock"
+    assert "genre" not in ctx.for_file("b.wav")
+
+def test_file_view_pickles_to_small_snapshot():
+    ctx = AnalysisContext()
+    for name in ("a.wav", "b.wav"):
+        ctx.record("audio_analysis", name, {"status": "success", "file": name})
+    snap = pickle.loads(pickle.dumps(ctx.for_file("a.wav")))
+    assert snap["audio_analysis"]["file"] == "a.wav"
+    assert lookup(snap, "audio_analysis", "a.wav")["file"] == "a.wav"
+
+def test_subset_pickles_without_its_lock():
+    ctx = AnalysisContext()
+    ctx.record("audio_analysis", "a.wav", {"status": "success", "file": "a.wav"})
+    sub = pickle.loads(pickle.dumps(ctx.subset(["a.wav"])))
+    assert sub.result("audio_analysis", "a.wav")["file"] == "a.wav"
+    sub.record("audio_analysis", "b.wav", {"status": "success", "file": "b.wav"})  # lock restored
@@ -0,0 +1,112 @@
+import pytest
+
+requests = pytest.importorskip("requests")
+
+import src.main  # noqa: F401  (puts src/ on sys.path, as the pipeline runs it)
+import api_client
+from api_client import AnalysisClient, CircuitBreaker
+
+class FakeResponse:
+    def __init__(self, status, body=None):
+        self.status_code = status
+        self.headers = {}
+        self._body = body or {}
+
+    def json(self):
+        return self._body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(str(self.status_code), response=self)
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def request(self, method, url, timeout=None, **kwargs):
+        self.calls += 1
+        r = self.responses.pop(0)
+        if isinstance(r, Exception):
+            raise r
+        return r
+
+    def close(self):
+        pass
+
+def test_retries_transient_errors_then_succeeds():
+    client = AnalysisClient(retries=3, backoff=0)
+    client.session = FakeSession([requests.ConnectionError("down"), FakeResponse(503),
+                                  FakeResponse(200, {"status": "success"})])
+    assert client.request_analysis("audio-analysis", {"file_path": "x.wav"}) == {"status": "success"}
+    assert client.session.calls == 3
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+def test_open_circuit_skips_the_server_and_runs_locally(monkeypatch):
+    local = []
+    monkeypatch.setattr(api_client, "analyze_file", lambda path, name: local.append((path, name)) or {"local": True})
+    client = AnalysisClient(retries=0, backoff=0, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    client.session = FakeSession([FakeResponse(503), FakeResponse(503)])
+
+    for _ in range(3):
+        assert client.request_analysis("audio-analysis", {"file_path": "x.wav"}) == {"local": True}
+    assert client.session.calls == 2          # third call never reached the server
+    assert client.breaker.state == CircuitBreaker.OPEN
+    assert local == [("x.wav", "audio_analysis")] * 3
+
+    client.local_fallback = False
+    with pytest.raises(api_client.CircuitOpen):
+        client.request_analysis("audio-analysis", {"file_path": "x.wav"})
+
+def test_client_errors_are_raised_not_run_locally(monkeypatch):
+    monkeypatch.setattr(api_client, "analyze_file", lambda *a: pytest.fail("ran locally"))
+    client = AnalysisClient(retries=2, backoff=0)
+    client.session = FakeSession([FakeResponse(400)])
+    with pytest.raises(requests.HTTPError):
+        client.request_analysis("audio-analysis", {"file_path": "x.wav"})
+    assert client.session.calls == 1
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+def test_unexpected_error_during_probe_does_not_wedge_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    client = AnalysisClient(retries=0, backoff=0, breaker=breaker, local_fallback=False)
+    client.session = FakeSession([requests.TooManyRedirects("loop"), FakeResponse(200, {"ok": 1})])
+    with pytest.raises(requests.TooManyRedirects):
+        client.request_analysis("audio-analysis", {})
+    assert client.request_analysis("audio-analysis", {}) == {"ok": 1}
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_analyze_many_sends_bulk_requests_in_order(tmp_path):
+    paths = []
+    for name in ("a.mid", "b.mid", "c.mid"):
+        p = tmp_path / name
+        p.write_bytes(b"MThd")
+        paths.append(str(p))
+
+    class BatchSession(FakeSession):
+        def request(self, method, url, timeout=None, files=None, **kwargs):
+            self.calls += 1
+            assert url.endswith("/analyze/batch") and kwargs["params"]["wait"] == "true"
+            names = [f[1][0] for f in files]
+            return FakeResponse(200, {"results": [{"file": n, "results": [{"n": n}]} for n in names]})
+
+    client = AnalysisClient(retries=0, backoff=0)
+    client.session = BatchSession([])
+    out = client.analyze_many(paths, bulk_size=2)
+    assert client.session.calls == 2
+    assert [e["file"] for e in out] == paths
+    assert [e["results"][0]["n"] for e in out] == ["a.mid", "b.mid", "c.mid"]
+
+    client.session = BatchSession([])
+    out = client.analyze_many(paths, bulk_size=0)   # clamped to one file per request
+    assert client.session.calls == 3
+    assert [e["file"] for e in out] == paths
+
+def test_analyze_many_runs_unreachable_chunks_locally(tmp_path, monkeypatch):
+    p = tmp_path / "a.mid"
+    p.write_bytes(b"MThd")
+    monkeypatch.setattr(api_client, "run_local", lambda path, name: [{"local": path}])
+    client = AnalysisClient(retries=0, backoff=0)
+    client.session = FakeSession([requests.ConnectionError("down")])
+    assert client.analyze_many([str(p)]) == [{"file": str(p), "results": [{"local": str(p)}], "local": True}]
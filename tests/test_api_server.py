@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(SRC)
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "logs").mkdir()
+    import api_server
+
+    def fake(path, output_dir):
+        return {"status": "success", "size": os.path.getsize(path)}
+
+    monkeypatch.setattr(api_server, "PLUGINS", [{"name": "fake", "input_type": "midi", "func": fake}])
+    monkeypatch.setattr(api_server, "store", None)
+    monkeypatch.setattr(api_server, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    return api_server
+
+def test_batch_endpoint_runs_every_file_in_one_job(api, tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    client = TestClient(api.app)
+    files = [("files", ("a.mid", b"AAAA")), ("files", ("b.mid", b"BB"))]
+    resp = client.post("/analyze/batch", params={"wait": "true"}, files=files)
+    assert resp.status_code == 200
+    entries = resp.json()["results"]
+    assert [e["file"] for e in entries] == ["a.mid", "b.mid"]
+    assert [e["results"][0]["size"] for e in entries] == [4, 2]
+    assert os.listdir(tmp_path / "uploads") == []   # spooled files removed
+
+    monkeypatch.setattr(api, "MAX_BATCH_FILES", 1)
+    assert client.post("/analyze/batch", files=files).status_code == 413
+
+def test_cached_upload_gets_a_finished_job_unless_waiting(api, tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from result_store import ResultStore
+
+    store = ResultStore(str(tmp_path / "cache"))
+    monkeypatch.setattr(api, "store", store)
+    client = TestClient(api.app)
+    upload = {"file": ("a.mid", b"MThd same")}
+
+    first = client.post("/analyze", params={"wait": "true"}, files=upload)
+    assert first.status_code == 200 and first.json()["results"][0]["size"] == 9
+
+    again = client.post("/analyze", files=upload)
+    assert again.status_code == 202
+    body = again.json()
+    assert body["deduplicated"] and body["status"] == "done"
+    job = client.get(body["status_url"]).json()
+    assert job["result"]["results"] == first.json()["results"]
+
+    waited = client.post("/analyze", params={"wait": "true"}, files=upload)
+    assert waited.status_code == 200 and waited.json()["deduplicated"]
+    assert store._digests == {}   # temp uploads are not memoised forever
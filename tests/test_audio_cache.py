@@ -0,0 +1,17 @@
+import numpy as np
+import soundfile as sf
+from src.audio_cache import AudioCache
+
+def test_audio_cache_decodes_once(tmp_path):
+    path = str(tmp_path / "tone.wav")
+    sf.write(path, np.zeros((8000, 2), dtype="float32"), 8000)
+
+    cache = AudioCache()
+    y, sr = cache.load(path)
+    again, _ = cache.load(path)
+    low, low_sr = cache.load(path, sr=4000)
+
+    assert again is y and sr == 8000 and y.ndim == 1
+    assert low_sr == 4000 and len(low) == 4000
+    assert not y.flags.writeable
+    assert cache.stats()["decodes"] == 1
@@ -0,0 +1,30 @@
+import os
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+pytest.importorskip("pedalboard")
+
+import src.main  # noqa: F401  (puts src/ on sys.path, as the pipeline runs it)
+import audio_cache
+from audio_mastering import main, master_batch
+
+def test_streaming_master_matches_in_memory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)   # anything written relative to cwd stays out of the repo
+    sr = 22050
+    t = np.arange(sr * 3) / sr
+    y = (0.8 * np.sin(2 * np.pi * 440 * t) * np.linspace(0.1, 1, len(t))).astype(np.float32)
+    path = str(tmp_path / "tone.wav")
+    sf.write(path, y, sr, subtype="FLOAT")
+
+    audio_cache.reset()
+    os.makedirs(tmp_path / "whole")
+    whole = main(path, str(tmp_path / "whole"), streaming=False)
+    streamed = master_batch([path], str(tmp_path / "blocks"), block_size=4096)[0]
+    assert whole["status"] == streamed["status"] == "success"
+
+    a, _ = sf.read(whole["output_file"])
+    b, _ = sf.read(streamed["output_file"])
+    assert a.shape == b.shape == (len(y), 2)
+    np.testing.assert_allclose(a, b, atol=2 / 32768)
@@ -0,0 +1,42 @@
+import wave
+
+import numpy as np
+import soundfile as sf
+
+from src.audio_stream import AudioStream, analyze
+
+def _write_wav(path, y, sr=8000, channels=1):
+    pcm = (y * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(sr)
+        w.writeframes(pcm.tobytes())
+
+def test_memory_mapped_blocks_match_soundfile(tmp_path):
+    rng = np.random.default_rng(0)
+    y = rng.uniform(-0.5, 0.5, size=(10001, 2))
+    path = tmp_path / "a.wav"
+    _write_wav(path, y, channels=2)
+
+    stream = AudioStream(str(path))
+    assert stream.memory_mapped and stream.frames == 10001 and stream.channels == 2
+    blocks = list(stream.blocks(4096, overlap=1024, mono=False))
+    ref = list(sf.blocks(str(path), blocksize=4096, overlap=1024, dtype="float32", always_2d=True))
+    assert len(blocks) == len(ref)
+    for a, b in zip(blocks, ref):
+        np.testing.assert_allclose(a, b, atol=1e-6)
+
+def test_analyze_streams_rms_centroid_and_envelope(tmp_path):
+    sr = 8000
+    t = np.arange(sr * 3) / sr
+    y = 0.5 * np.sin(2 * np.pi * 1000 * t)
+    path = tmp_path / "tone.wav"
+    _write_wav(path, y, sr=sr)
+
+    stats = analyze(str(path), envelope_points=100)
+    assert abs(stats["rms_mean"] - 0.5 / np.sqrt(2)) < 1e-3
+    assert abs(stats["centroid_mean"] - 1000) < 50
+    mins, maxs = stats["envelope"]
+    assert len(mins) == 100
+    assert np.all(maxs > 0.49) and np.all(mins < -0.49)
@@ -0,0 +1,16 @@
+import filecmp
+import wave
+
+from benchmarks.corpus import build_corpus
+
+def test_build_corpus_is_deterministic(tmp_path):
+    a = build_corpus(str(tmp_path / "a"), files=2, seconds=2.0, seed=7)
+    b = build_corpus(str(tmp_path / "b"), files=2, seconds=2.0, seed=7)
+    for kind in ("audio", "midi", "musicxml"):
+        names = sorted((tmp_path / "a" / kind).iterdir())
+        assert len(names) == 2
+        for p in names:
+            assert filecmp.cmp(str(p), str(tmp_path / "b" / kind / p.name), shallow=False)
+    with wave.open(str(tmp_path / "a" / "audio" / "synth_000.wav")) as w:
+        assert w.getnframes() == 2 * 22050
+    assert open(str(tmp_path / "a" / "midi" / "synth_000.mid"), "rb").read(4) == b"MThd"
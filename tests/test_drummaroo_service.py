@@ -0,0 +1,101 @@
+import os
+import threading
+
+import numpy as np
+import pretty_midi
+import pytest
+
+import src.main  # noqa: F401  (puts src/ on sys.path, as the pipeline runs it)
+import drum_model
+from drummaroo_service import DrummarooService, _tile, note_rows, rule_groove, prepare, write_midi
+
+def test_concurrent_requests_share_one_batch():
+    sizes = []
+
+    def fake_batch(jobs):
+        sizes.append(len(jobs))
+        return [rule_groove(job) for job in jobs]
+
+    service = DrummarooService(max_batch=8, max_wait=0.5, generate_batch=fake_batch)
+    gate = threading.Barrier(4)
+    futures = []
+
+    def client(complexity):
+        gate.wait()
+        futures.append(service.submit(bars=2, complexity=complexity))
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in (0.0, 0.3, 0.6, 0.9)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    results = [f.result(timeout=5) for f in futures]
+    service.close()
+
+    assert sizes == [4]
+    assert all(r["status"] == "success" and r["batch_size"] == 4 for r in results)
+    assert service.stats()["batches"] == 1
+
+def test_rule_groove_columns_are_in_onset_order():
+    notes = rule_groove(prepare({"bars": 2, "complexity": 1.0, "swing": 0.5}))
+    assert set(notes) == {"pitch", "start", "end", "velocity"}
+    assert np.all(np.diff(notes["start"]) >= 0)
+    assert (notes["pitch"] == 36).sum() == 4   # downbeat + pickup kick per bar
+    rows = note_rows(notes)
+    assert rows[0] == {"pitch": 36, "start": 0.0, "end": 0.1, "velocity": 110}
+
+def test_style_picks_the_genre_vocabulary():
+    swing = rule_groove(prepare({"bars": 1, "complexity": 1.0, "style": "swing"}))
+    funk = rule_groove(prepare({"bars": 1, "complexity": 1.0, "style": "funk"}))
+    assert 40 in swing["pitch"] and 38 not in swing["pitch"]   # sidestick snare
+    assert 46 in funk["pitch"]                                  # open hat
+    with pytest.raises(ValueError, match="style"):
+        prepare({"style": "post-folk"})
+
+def test_model_tokens_are_decoded_and_tiled_with_the_shared_vocabulary():
+    tokens = np.zeros(drum_model.MAX_LENGTH, np.int64)
+    tokens[[0, 8]] = [1, 2]                     # kick at 0 s, snare at 0.5 s
+    notes = _tile(tokens, prepare({"bars": 8, "style": "swing"}))   # 16 s at 120 bpm, 8 s pattern
+    assert notes["start"].tolist() == [0.0, 0.5, 8.0, 8.5]
+    assert notes["pitch"].tolist() == [36, 40, 36, 40]
+
+def test_write_midi_replaces_the_file_whole(tmp_path):
+    path = str(tmp_path / "drummaroo_x.mid")
+    notes = rule_groove(prepare({"bars": 1}))
+    write_midi(notes, path)
+    write_midi(rule_groove(prepare({"bars": 2})), path)
+    assert os.listdir(tmp_path) == ["drummaroo_x.mid"]
+    assert len(pretty_midi.PrettyMIDI(path).instruments[0].notes) == 2 * len(notes["pitch"])
+
+def test_cancelled_request_does_not_stop_the_batcher():
+    started, release = threading.Event(), threading.Event()
+
+    def slow_batch(jobs):
+        started.set()
+        release.wait(5)
+        return [rule_groove(job) for job in jobs]
+
+    service = DrummarooService(max_batch=1, max_wait=0.0, generate_batch=slow_batch)
+    first = service.submit(bars=1)
+    assert started.wait(5)
+    queued = service.submit(bars=1)          # waits behind the first batch
+    assert queued.cancel()
+    release.set()
+    assert first.result(timeout=5)["status"] == "success"
+    assert service.submit(bars=1).result(timeout=5)["status"] == "success"
+    service.close()
+    assert service.stats()["requests"] == 2
+
+def test_unexpected_batch_error_fails_only_that_batch():
+    calls = []
+
+    def flaky(jobs):
+        calls.append(len(jobs))
+        return None if len(calls) == 1 else [rule_groove(job) for job in jobs]   # first: not a list
+
+    service = DrummarooService(max_batch=1, max_wait=0.0, generate_batch=flaky)
+    broken = service.submit(bars=1)
+    with pytest.raises(TypeError):
+        broken.result(timeout=5)
+    assert service.submit(bars=1).result(timeout=5)["status"] == "success"
+    service.close()
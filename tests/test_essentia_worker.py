@@ -0,0 +1,51 @@
+import wave
+
+import numpy as np
+
+import src.main  # noqa: F401  (puts src/ on sys.path, as the pipeline runs it)
+from essentia_worker import EssentiaWorker
+
+def _wav(path, seconds, sr=8000):
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sr)
+        w.writeframes(np.zeros(int(sr * seconds), "<i2").tobytes())
+    return path
+
+def test_stub_worker_streams_results_and_restarts(tmp_path):
+    a = _wav(str(tmp_path / "a.wav"), 2.0)
+    b = _wav(str(tmp_path / "b.wav"), 1.0)
+    worker = EssentiaWorker(backend="stub", timeout=30)
+    try:
+        results = list(worker.analyze([a, str(tmp_path / "missing.wav"), b]))
+        assert [r["file"] for r in results] == [a, str(tmp_path / "missing.wav"), b]
+        assert results[0]["bpm"] == 120.0
+        np.testing.assert_allclose(results[0]["beats"], [0.0, 0.5, 1.0, 1.5])
+        assert "error" in results[1]
+        assert abs(results[2]["duration"] - 1.0) < 1e-9
+
+        # a dead worker is replaced on the next request
+        pid = worker._proc.pid
+        worker._proc.kill()
+        worker._proc.wait()
+        assert list(worker.analyze([b]))[0]["status"] == "success"
+        assert worker._proc.pid != pid
+        assert worker.ping()
+    finally:
+        worker.close()
+
+def test_bridge_reports_missing_files_without_dropping_the_batch(tmp_path, monkeypatch):
+    import essentia_bridge
+
+    a = _wav(str(tmp_path / "a.wav"), 1.0)
+    missing = str(tmp_path / "missing.wav")
+    worker = EssentiaWorker(backend="stub", timeout=30)
+    monkeypatch.setattr(essentia_bridge, "_worker", lambda: worker)
+    try:
+        results = essentia_bridge.run_essentia_bridge([missing, a], output_dir=str(tmp_path / "out"))
+    finally:
+        worker.close()
+    assert [r["file"] for r in results] == [missing, a]
+    assert results[0]["error"] == "File not found"
+    assert results[1]["status"] == "success" and results[1]["beats"] == [0.0, 0.5]
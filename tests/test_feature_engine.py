@@ -0,0 +1,31 @@
+import wave
+
+import numpy as np
+
+import src.main  # noqa: F401  (puts src/ on sys.path, as the pipeline runs it)
+import feature_engine
+
+def test_spectral_features_tempo_and_context(tmp_path):
+    sr, bpm = 22050, 120
+    t = np.arange(sr * 8) / sr
+    y = 0.1 * np.sin(2 * np.pi * 220 * t) + 0.6 * np.exp(-(t % (60 / bpm)) * 40) * np.sin(2 * np.pi * 2000 * t)
+    path = str(tmp_path / "click.wav")
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sr)
+        w.writeframes((y * 32767).astype("<i2").tobytes())
+
+    feature_engine.reset()
+    res = feature_engine.spectral_features(path)
+    spectral = res["spectral"]
+    assert res["status"] == "success"
+    assert abs(spectral["tempo"] - bpm) < 5
+    assert 0 < spectral["spectral_centroid"] < spectral["spectral_rolloff"] < sr / 2
+    gaps = np.diff(spectral["beat_times"])
+    assert abs(np.median(gaps) - 60 / bpm) < 0.05
+
+    # downstream plugins read the published result instead of recomputing
+    ctx = {"spectral_features": {"spectral": {"rms": 1.0}}}
+    assert feature_engine.from_context(ctx, path) == {"rms": 1.0}
+    assert feature_engine.from_context(None, path) is spectral
@@ -0,0 +1,67 @@
+import threading
+import time
+
+import pytest
+
+from src.job_queue import DONE, FAILED, JobQueue, QueueFull
+
+def test_job_queue_runs_in_background_and_applies_backpressure():
+    gate = threading.Event()
+    q = JobQueue(workers=1, max_pending=2)
+    try:
+        def slow(job):
+            job.progress(1, 2)
+            gate.wait(5)
+            job.progress(2, 2)
+            return {"ok": True}
+
+        first = q.submit("analyze", slow, meta={"filename": "a.wav"})
+        second = q.submit("analyze", lambda job: 1 / 0)
+        rejected = []
+        with pytest.raises(QueueFull):
+            q.submit("analyze", slow, on_reject=lambda: rejected.append(True))
+        assert rejected == [True] and q.stats()["rejected"] == 1
+
+        gate.set()
+        assert first.future.result(5) == {"ok": True}
+        with pytest.raises(ZeroDivisionError):
+            second.future.result(5)
+
+        done = q.get(first.id).to_dict()
+        assert done["status"] == DONE and done["result"] == {"ok": True}
+        assert done["filename"] == "a.wav" and done["progress"] == {"done": 2, "total": 2}
+        assert [e["event"] for e in first.events] == ["queued", "started", "progress", "progress", "done"]
+        assert q.get(second.id).status == FAILED and "division" in q.get(second.id).error
+        assert q.depth == 0
+    finally:
+        gate.set()
+        q.shutdown()
+
+def test_cancelled_wait_still_runs_the_job_and_frees_its_slot():
+    gate = threading.Event()
+    cleaned = threading.Event()
+    q = JobQueue(workers=1, max_pending=2)
+    try:
+        def cleanup_job(job):
+            try:
+                return "ran"
+            finally:
+                cleaned.set()
+
+        busy = q.submit("analyze", lambda job: gate.wait(5))
+        queued = q.submit("analyze", cleanup_job)
+        assert queued.future.cancel()        # e.g. a ?wait=true client hanging up
+        gate.set()
+        busy.future.result(5)
+        assert cleaned.wait(5)
+        for _ in range(50):
+            if q.get(queued.id).finished is not None:
+                break
+            time.sleep(0.01)
+        assert q.get(queued.id).status == DONE and q.depth == 0
+        # both slots are free again
+        more = [q.submit("analyze", lambda job: 1), q.submit("analyze", lambda job: 2)]
+        assert [j.future.result(5) for j in more] == [1, 2]
+    finally:
+        gate.set()
+        q.shutdown()
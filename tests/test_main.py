@@ -1,3 +1,7 @@
+import json
+import os
+import time
+
 import pytest
 from src.main import resolve_execution_order
 
@@ -18,3 +22,53 @@ def test_resolve_execution_order_cycle():
     ]
     with pytest.raises(RuntimeError):
         resolve_execution_order(plugins)
+
+def test_resolve_execution_order_missing_requirement():
+    plugins = [{"name": "a", "phase": 1, "requires": ["nope"]}]
+    assert [p["name"] for p in resolve_execution_order(plugins)] == ["a"]
+    with pytest.raises(RuntimeError):
+        resolve_execution_order(plugins, strict=True)
+
+def test_run_batches_maps_results_back_to_files():
+    from src.main import _batches, _run_batches
+
+    assert _batches(list("abcde"), 2, 1) == [["a", "b"], ["c", "d"], ["e"]]
+    assert _batches(list("abcde"), 0, 2) == [["a", "b", "c"], ["d", "e"]]
+
+    calls = []
+    def plugin(paths, output_dir):
+        calls.append(list(paths))
+        # out of order, no "status" key, one file missing
+        return [{"file": p, "n": len(p)} for p in reversed(paths) if p != "bb"]
+
+    results = _run_batches(None, plugin, ["a", "bb", "ccc"], 2, "out", {})
+    assert calls == [["a", "bb"], ["ccc"]]
+    assert [r["status"] for r in results] == ["success", "error", "success"]
+    assert results[2]["n"] == 3
+
+def _slow_first(path, output_dir):
+    # the first file finishes last, so completion order differs from file order
+    name = os.path.basename(path)
+    time.sleep(0.3 if name == "a.wav" else 0.0)
+    if name == "c.wav":
+        raise RuntimeError("worker blew up")
+    return {"status": "success", "file": name}
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_run_pipeline_worker_pool_keeps_file_order(tmp_path, executor, monkeypatch):
+    import src.main as main
+
+    audio = tmp_path / "audio"
+    audio.mkdir()
+    for name in ("a.wav", "b.wav", "c.wav", "d.wav"):
+        (audio / name).write_bytes(b"")
+    plugin = {"name": "slow_first", "input_type": "audio", "phase": 1, "requires": [], "func": _slow_first}
+    monkeypatch.setattr(main, "PLUGINS", [plugin])
+
+    out = main.run_pipeline(str(audio), str(tmp_path / "midi"), str(tmp_path / "xml"), str(tmp_path / "out"),
+                            workers=2, executor=executor, cache_dir=None)
+
+    assert [r["file"] for r in out["reports"]] == ["a.wav", "b.wav", "d.wav"]
+    samples = json.load(open(out["profile"]))["samples"]
+    assert [(os.path.basename(s["file"]), s["status"]) for s in samples] == [
+        ("a.wav", "success"), ("b.wav", "success"), ("c.wav", "error"), ("d.wav", "success")]
@@ -0,0 +1,19 @@
+import pretty_midi
+from src.midi_cache import ScoreCache
+
+def test_score_cache_parses_once(tmp_path):
+    path = str(tmp_path / "one.mid")
+    pm = pretty_midi.PrettyMIDI()
+    inst = pretty_midi.Instrument(program=0)
+    inst.notes.append(pretty_midi.Note(velocity=90, pitch=60, start=0.0, end=0.5))
+    pm.instruments.append(inst)
+    pm.write(path)
+
+    cache = ScoreCache()
+    shared = cache.load(path, "pretty_midi")
+    assert cache.load(path, "pretty_midi") is shared
+
+    private = cache.load(path, "pretty_midi", copy=True)
+    private.instruments[0].notes[0].pitch = 72
+    assert shared.instruments[0].notes[0].pitch == 60
+    assert cache.stats()["pretty_midi"] == {"hits": 2, "misses": 1}
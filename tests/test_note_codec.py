@@ -0,0 +1,28 @@
+import numpy as np
+
+from src.note_codec import JSON, MIDI, PACKED, negotiate, pack_notes, unpack_notes
+
+OFFERED = [JSON, PACKED, MIDI]
+
+def test_negotiate_honours_q_values_and_defaults_to_json():
+    assert negotiate(None, OFFERED) == JSON
+    assert negotiate("*/*", OFFERED) == JSON
+    assert negotiate(PACKED, OFFERED) == PACKED
+    assert negotiate(f"{JSON};q=0.5, {MIDI}", OFFERED) == MIDI
+    assert negotiate("audio/*", OFFERED) == MIDI
+    assert negotiate("text/html", OFFERED) is None
+    assert negotiate(f"{PACKED};q=0", OFFERED) is None
+
+def test_negotiate_explicit_exclusion_beats_wildcards():
+    assert negotiate(f"{JSON};q=0, */*", OFFERED) == PACKED
+    assert negotiate(f"{MIDI};q=0, audio/*, {JSON};q=0.1", OFFERED) == JSON
+    assert negotiate(f"*/*;q=0.2, {PACKED}", OFFERED) == PACKED
+
+def test_packed_notes_roundtrip():
+    notes = {"pitch": np.array([36, 42], np.uint8), "start": np.array([0.0, 0.125], np.float32),
+             "end": np.array([0.1, 0.225], np.float32), "velocity": np.array([110, 70], np.uint8)}
+    data = pack_notes(notes)
+    assert len(data) == 12 + 2 * (1 + 1 + 4 + 4)
+    back = unpack_notes(data)
+    for name, col in notes.items():
+        np.testing.assert_array_equal(back[name], col)
@@ -0,0 +1,37 @@
+import os
+
+import numpy as np
+import pretty_midi
+import pytest
+
+import src.main  # noqa: F401  (puts src/ on sys.path, as the pipeline runs it)
+import midi_cache
+from piano_roll import PianoRollRenderer, load_piano_roll
+
+def test_piano_roll_matches_pretty_midi_and_renders(tmp_path):
+    path = str(tmp_path / "two.mid")
+    pm = pretty_midi.PrettyMIDI()
+    lead = pretty_midi.Instrument(program=0)
+    lead.notes += [pretty_midi.Note(velocity=90, pitch=64, start=0.5, end=1.0),
+                   pretty_midi.Note(velocity=70, pitch=60, start=0.0, end=0.5)]
+    bass = pretty_midi.Instrument(program=33)
+    bass.notes.append(pretty_midi.Note(velocity=100, pitch=36, start=0.25, end=2.0))
+    pm.instruments += [lead, bass]
+    pm.write(path)
+
+    midi_cache.reset()
+    roll = load_piano_roll(path)
+    assert load_piano_roll(path) is roll
+    assert len(roll) == 3
+    with pytest.raises(ValueError):   # shared across plugins: read-only
+        roll.start[0] = 9.0
+    np.testing.assert_allclose(roll.onsets(track=0), [0.0, 0.5])
+    assert list(roll.frames(4))[:2] == [(60,), (36, 60)]
+
+    dense = roll.to_dense(fs=100)
+    assert dense.dtype == np.uint8
+    expected = pretty_midi.PrettyMIDI(path).get_piano_roll(fs=100)
+    np.testing.assert_array_equal(dense[:, :expected.shape[1]], expected.astype(np.uint8))
+
+    png = PianoRollRenderer(width_px=200, height_px=100).render(roll, str(tmp_path / "r.png"))
+    assert os.path.getsize(png) > 0
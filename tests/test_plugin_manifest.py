@@ -0,0 +1,47 @@
+import os
+import sys
+import textwrap
+
+from src import plugin_manifest, plugin_registry
+
+PLUGIN_SRC = textwrap.dedent('''
+    from plugin_registry import register_plugin
+
+    @register_plugin(name="lazy_demo", input_type="midi", phase=2, requires=["midi_analysis"])
+    def lazy_demo(path, output_dir="reports"):
+        return {"status": "success", "file": path}
+''')
+
+def test_scan_source_reads_literal_decorators():
+    info = plugin_manifest.scan_source(PLUGIN_SRC)
+    assert not info["dynamic"]
+    assert info["plugins"] == [{
+        "name": "lazy_demo", "input_type": "midi", "phase": 2,
+        "requires": ["midi_analysis"], "description": "", "version": "1",
+        "batch": False, "max_batch_size": 0, "result_schema": None,
+        "function": "lazy_demo",
+    }]
+    dynamic = PLUGIN_SRC.replace('name="lazy_demo"', "name=NAME")
+    assert plugin_manifest.scan_source(dynamic)["dynamic"]
+
+def test_discover_registers_without_importing(tmp_path, monkeypatch):
+    src = tmp_path / "plugins"
+    src.mkdir()
+    (src / "lazy_demo_mod.py").write_text(PLUGIN_SRC)
+    manifest = str(tmp_path / "manifest.json")
+    monkeypatch.setattr(plugin_registry, "PLUGINS", [])
+    monkeypatch.setitem(sys.modules, "plugin_registry", plugin_registry)
+    monkeypatch.syspath_prepend(str(src))
+
+    plugin_registry.discover(str(src), manifest_path=manifest)
+    assert os.path.exists(manifest)
+    assert "lazy_demo_mod" not in sys.modules
+    (entry,) = plugin_registry.PLUGINS
+    assert entry["name"] == "lazy_demo" and entry["phase"] == 2
+
+    assert entry["func"]("x.mid") == {"status": "success", "file": "x.mid"}
+    assert "lazy_demo_mod" in sys.modules
+    # the import filled in the lazy entry instead of adding a second one
+    assert len(plugin_registry.PLUGINS) == 1
+    assert not isinstance(entry["func"], plugin_registry.LazyPlugin)
+    sys.modules.pop("lazy_demo_mod", None)
@@ -0,0 +1,25 @@
+import json
+
+import pytest
+
+from src.plugin_result import PluginResult, SchemaError, validate_schema
+
+def test_plugin_result_normalises_and_checks_schema():
+    res = PluginResult.from_raw({"input_file": "a.mid", "visualization": "a.png"},
+                                "visualize_midi", "a.mid", {"visualization": "str"})
+    assert res.ok and res.file == "a.mid"
+    assert res.data["plugin_name"] == "visualize_midi" and res.data["status"] == "success"
+    assert res.to_json() is res.to_json()  # encoded once
+    assert json.loads(res.to_json())["visualization"] == "a.png"
+
+    failed = PluginResult.from_raw({"error": "boom"}, "drumify", "b.mid")
+    assert failed.status == "error" and failed.error == "boom" and failed.file == "b.mid"
+
+    wrong = PluginResult.from_raw({"status": "success", "note_count": "7"}, "audio_to_midi", "c.wav",
+                                  {"note_count": "int", "realtime_factor": "float?"})
+    assert not wrong.ok and "note_count" in wrong.error
+
+    with pytest.raises(SchemaError):
+        validate_schema({"tempo": "double"}, "bad")
+    with pytest.raises(SchemaError):
+        validate_schema({"status": "str"}, "bad")
@@ -0,0 +1,39 @@
+import json
+
+from src.profiler import Metrics, RunProfile, measure
+
+def test_run_profile_exports_json_and_trace(tmp_path):
+    profile = RunProfile()
+    for f in ("a.wav", "b.wav"):
+        with measure() as sample:
+            sum(range(10000))
+        profile.add("audio_analysis", f, sample, "success")
+    profile.add_cached("audio_analysis", 3)
+    profile.finish()
+
+    paths = profile.write(str(tmp_path))
+    data = json.load(open(paths["profile"]))
+    summary = data["plugins"]["audio_analysis"]
+    assert summary["files"] == 2 and summary["cached"] == 3 and summary["errors"] == 0
+    assert summary["wall_s"] >= 0 and summary["cpu_s"] >= 0
+    assert [s["file"] for s in data["samples"]] == ["a.wav", "b.wav"]
+
+    trace = json.load(open(paths["trace"]))
+    assert [e["ph"] for e in trace["traceEvents"]] == ["X", "X"]
+    assert trace["traceEvents"][0]["args"]["file"] == "a.wav"
+
+def test_metrics_render_prometheus():
+    m = Metrics()
+    m.observe("midi_analysis", {"wall_s": 0.5, "cpu_s": 0.25})
+    m.observe("midi_analysis", {"wall_s": 0.5}, error=True)
+    text = m.render_prometheus()
+    assert 'plugin_calls_total{plugin="midi_analysis"} 2' in text
+    assert 'plugin_errors_total{plugin="midi_analysis"} 1' in text
+    assert 'plugin_wall_seconds_total{plugin="midi_analysis"} 1' in text
+
+def test_metrics_render_prometheus_keeps_every_digit():
+    m = Metrics()
+    m.observe("audio_analysis", {"read_bytes": 123456789, "wall_s": 1234.5678901})
+    text = m.render_prometheus()
+    assert 'plugin_read_bytes_total{plugin="audio_analysis"} 123456789\n' in text
+    assert 'plugin_wall_seconds_total{plugin="audio_analysis"} 1234.5678901\n' in text
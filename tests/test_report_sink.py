@@ -0,0 +1,38 @@
+import os
+
+from src.report_sink import ReportReader, ReportSink
+
+def test_report_sink_streams_and_indexes(tmp_path):
+    path = str(tmp_path / "master_report.jsonl")
+    with ReportSink(path) as sink:
+        sink.write({"status": "success", "rms": 0.1}, plugin="audio_analysis", file="a.wav")
+        sink.write({"status": "success", "rms": 0.2}, plugin="audio_analysis", file="b.wav")
+        partial = sink.records()
+        sink.write({"status": "success", "notes": 3}, plugin="midi_analysis", file="c.mid")
+        assert len(list(partial)) == 2
+
+    reader = ReportReader(path)
+    assert len(reader) == 3
+    assert reader.plugins() == ["audio_analysis", "midi_analysis"]
+    assert reader.get("audio_analysis", "b.wav")["rms"] == 0.2
+    assert reader.for_file("c.mid") == [{"status": "success", "notes": 3}]
+    assert [r.get("rms") for r in reader] == [0.1, 0.2, None]
+
+def test_flatten_in_place_keeps_the_records(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "logs").mkdir()
+    import flatten_reports
+
+    out = tmp_path / "out"
+    path = str(out / "master_report.jsonl")
+    with ReportSink(path) as sink:
+        sink.write({"status": "success", "rms": 0.1}, plugin="audio_analysis", file="a.wav")
+        sink.write({"status": "success", "notes": 3}, plugin="midi_analysis", file="c.mid")
+
+    result = flatten_reports.main(ReportReader(path), str(out))
+    assert result["status"] == "success"
+    reader = ReportReader(path)
+    assert len(reader) == 2
+    assert [r.get("rms") for r in reader] == [0.1, None]
+    assert sorted(p.name for p in out.iterdir()) == ["master_report.index.json", "master_report.jsonl"]
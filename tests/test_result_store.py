@@ -0,0 +1,48 @@
+import os
+from src.result_store import ResultStore, config_hash
+
+def test_result_store_roundtrip(tmp_path):
+    src = tmp_path / "in.wav"
+    src.write_bytes(b"RIFF....")
+    out = tmp_path / "out.json"
+    out.write_text("{}")
+
+    store = ResultStore(str(tmp_path / "cache"))
+    plugin = {"name": "audio_analysis", "version": "1", "requires": []}
+    cfg = config_hash(plugin, [plugin], str(tmp_path))
+    result = {"status": "success", "output_file": str(out)}
+
+    assert store.get(str(src), "audio_analysis", cfg) is None
+    assert store.put(str(src), "audio_analysis", cfg, result)
+    assert store.get(str(src), "audio_analysis", cfg) == result
+
+    # a new plugin version changes the key
+    bumped = dict(plugin, version="2")
+    assert config_hash(bumped, [bumped], str(tmp_path)) != cfg
+
+    # missing outputs invalidate the hit
+    os.remove(out)
+    assert store.get(str(src), "audio_analysis", cfg) is None
+
+    store.invalidate("audio_analysis")
+    assert not (tmp_path / "cache" / "audio_analysis").exists()
+
+def test_result_store_evicts_by_size(tmp_path):
+    src = tmp_path / "in.mid"
+    src.write_bytes(b"MThd")
+    store = ResultStore(str(tmp_path / "cache"), max_mb=0)
+    store.put(str(src), "midi_analysis", "cfg", {"status": "success"})
+    assert store.evict() == 1
+
+def test_result_store_shares_results_by_content(tmp_path):
+    first, second = tmp_path / "upload1.wav", tmp_path / "upload2.wav"
+    first.write_bytes(b"RIFF same")
+    second.write_bytes(b"RIFF same")
+    store = ResultStore(str(tmp_path / "cache"))
+    store.put(str(first), "audio_analysis", "cfg", {"status": "success"})
+    assert store.get(str(second), "audio_analysis", "cfg") == {"status": "success"}
+
+    # a digest computed while spooling is used as is
+    store.remember(str(second), "0" * 64)
+    assert store.digest(str(second)) == "0" * 64
+    assert store.get(str(second), "audio_analysis", "cfg") is None
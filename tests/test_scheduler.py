@@ -0,0 +1,19 @@
+import time
+
+from src.scheduler import run_dag
+
+def _plugin(name, phase, input_type):
+    return {"name": name, "phase": phase, "input_type": input_type, "requires": []}
+
+def test_report_plugin_in_a_type_list_waits_for_everything():
+    plugins = [_plugin("summary", 1, ["report", "midi"]), _plugin("analysis", 1, "wav")]
+    started, finished = [], []
+
+    def run(p):
+        started.append((p["name"], list(finished)))
+        if p["name"] == "analysis":
+            time.sleep(0.2)
+        return p["name"]
+
+    run_dag(plugins, run, lambda p, res: finished.append(res), jobs=2)
+    assert dict(started)["summary"] == ["analysis"]
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+import soundfile as sf
+
+import src.main  # noqa: F401  (puts src/ on sys.path, as the pipeline runs it)
+import audio_cache
+from transcription_engine import TranscriptionEngine
+
+constants = pytest.importorskip("basic_pitch.constants")
+
+def test_windows_from_several_files_share_one_model_call(tmp_path):
+    sr = constants.AUDIO_SAMPLE_RATE
+    paths = []
+    for name, seconds in (("a.wav", 3.0), ("b.wav", 1.0)):
+        p = str(tmp_path / name)
+        sf.write(p, np.zeros(int(sr * seconds), np.float32), sr)
+        paths.append(p)
+
+    calls = []
+
+    def fake_predict(x):
+        calls.append(x.shape[0])
+        frames = constants.AUDIO_N_SAMPLES // constants.FFT_HOP + 1
+        return {"note": np.zeros((len(x), frames, 88), np.float32),
+                "onset": np.zeros((len(x), frames, 88), np.float32),
+                "contour": np.zeros((len(x), frames, 264), np.float32)}
+
+    audio_cache.reset()
+    engine = TranscriptionEngine(batch_windows=64)
+    engine._predict = fake_predict
+    results = list(engine.transcribe([paths[0], {"path": paths[1], "onset_threshold": 0.9}],
+                                     output_dir=str(tmp_path / "out")))
+
+    assert [r["file"] for r in results] == paths
+    assert all(r["status"] == "success" and r["note_count"] == 0 for r in results)
+    assert len(calls) == 1  # both files' windows in one batch
+    stats = engine.stats()
+    assert stats["files"] == 2 and abs(stats["audio_seconds"] - 4.0) < 1e-3
+
+    with pytest.raises(ValueError):
+        list(engine.transcribe([{"path": paths[0], "onset": 0.2}]))
+
+def test_a_failed_model_call_fails_only_its_files(tmp_path):
+    sr = constants.AUDIO_SAMPLE_RATE
+    paths = []
+    for name in ("a.wav", "b.wav", "c.wav"):
+        p = str(tmp_path / name)
+        sf.write(p, np.full(sr, 0.1 if name == "b.wav" else 0.0, np.float32), sr)
+        paths.append(p)
+
+    def fake_predict(x):
+        if np.any(x):   # b.wav's window
+            raise RuntimeError("out of memory")
+        frames = constants.AUDIO_N_SAMPLES // constants.FFT_HOP + 1
+        return {"note": np.zeros((len(x), frames, 88), np.float32),
+                "onset": np.zeros((len(x), frames, 88), np.float32),
+                "contour": np.zeros((len(x), frames, 264), np.float32)}
+
+    audio_cache.reset()
+    engine = TranscriptionEngine(batch_windows=1)
+    engine._predict = fake_predict
+    results = list(engine.transcribe(paths))
+
+    assert [r["file"] for r in results] == paths
+    assert [r.get("status") for r in results] == ["success", None, "success"]
+    assert "out of memory" in results[1]["error"]
+
+def test_unwrap_joins_windows_without_their_overlap():
+    from transcription_engine import N_OVERLAPPING_FRAMES, _unwrap
+
+    frames = constants.AUDIO_N_SAMPLES // constants.FFT_HOP + 1
+    windows = np.arange(2 * frames, dtype=np.float32).reshape(2, frames, 1)   # plain NumPy, as predict returns
+    length = constants.AUDIO_SAMPLE_RATE
+    out = _unwrap(windows, length)
+    n_olap = N_OVERLAPPING_FRAMES // 2
+    assert out.shape == (int(length * constants.ANNOTATIONS_FPS / constants.AUDIO_SAMPLE_RATE), 1)
+    assert out[0, 0] == n_olap
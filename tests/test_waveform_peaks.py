@@ -0,0 +1,47 @@
+import json
+import os
+import wave
+
+import numpy as np
+
+import src.main  # noqa: F401  (puts src/ on sys.path, as the pipeline runs it)
+import waveform_peaks
+
+def test_peak_pyramid_is_cached_and_matches_samples(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sr = 22050
+    y = np.sin(2 * np.pi * 3 * np.arange(sr * 20) / sr) * np.linspace(0, 1, sr * 20)
+    path = str(tmp_path / "ramp.wav")
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sr)
+        w.writeframes((y * 32767).astype("<i2").tobytes())
+
+    pyr = waveform_peaks.load_pyramid(path)
+    assert os.path.exists(path + ".peaks.npz")
+    assert len(pyr["levels"]) > 1
+    lo, hi = waveform_peaks.peaks(path, 100, pyr)
+    assert len(lo) == 100
+    assert abs(hi.max() - y.max()) < 1e-3 and abs(lo.min() - y.min()) < 1e-3
+
+    # second load comes from the .npz and agrees
+    again = waveform_peaks.load_pyramid(path)
+    np.testing.assert_array_equal(again["levels"][-1][1], pyr["levels"][-1][1])
+
+    out = waveform_peaks.peaks_json(path, str(tmp_path / "ramp.json"), columns=50)
+    doc = json.load(open(out))
+    assert doc["columns"] == 50 and abs(doc["duration"] - 20) < 1e-6
+
+    png = waveform_peaks.WaveformRenderer(width_px=200, height_px=100).render(path, str(tmp_path / "r.png"))
+    assert os.path.getsize(png) > 0
+
+def test_failed_cache_write_leaves_no_temp_file(tmp_path, monkeypatch):
+    def refuse(src, dst):
+        raise OSError("read-only")
+
+    monkeypatch.setattr(waveform_peaks.os, "replace", refuse)
+    pyr = {"sr": 100, "frames": 4, "base": 1, "levels": [(np.zeros(4), np.ones(4))]}
+    cache = str(tmp_path / "a.wav.peaks.npz")
+    assert waveform_peaks._write(cache, np.zeros(2), pyr) is False
+    assert os.listdir(tmp_path) == []